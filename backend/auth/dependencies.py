@@ -1,37 +1,51 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Optional
-import os
-from dotenv import load_dotenv
-from pathlib import Path
 
 from .security import verify_token
-from models.user import User, TokenData
-
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
-
-# Database connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+from .user_cache import user_cache
+from .travel_mode import travel_mode_indicator
+from models.user import User, TokenData, ResolvedUser
+from database import get_db
 
 # Security scheme
 security = HTTPBearer()
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> TokenData:
-    """Get current authenticated user from JWT token"""
+# Fields every authenticated handler may need, fetched in one users query.
+# Password hashes are left out so the cached documents never hold them.
+USER_PROJECTION = {
+    "_id": 0,
+    "password_hash": 0,
+    "settings.travel_mode.panic_password_hash": 0
+}
+
+async def load_auth_user(db: AsyncIOMotorDatabase, user_id: str) -> Optional[dict]:
+    """Get the projected user document, from the user cache when possible"""
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"id": user_id}, USER_PROJECTION)
+        if user is not None:
+            user_cache.set(user_id, user)
+    return user
+
+async def get_resolved_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+) -> ResolvedUser:
+    """Resolve the JWT and its user document once per request.
+
+    FastAPI caches dependency results for the duration of a request, so every
+    dependency and handler that asks for this shares a single users lookup,
+    and that lookup is skipped entirely while the user cache holds the user.
+    """
     token = credentials.credentials
     
     # Verify token
     token_data = verify_token(token)
     
-    # Get user from database
-    user = await db.users.find_one({"id": token_data["user_id"]})
+    # Get user from cache or database
+    user = await load_auth_user(db, token_data["user_id"])
     
     if user is None:
         raise HTTPException(
@@ -47,12 +61,21 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return TokenData(
-        username=token_data["username"],
-        user_id=token_data["user_id"],
-        is_panic_mode=token_data["is_panic_mode"]
+    return ResolvedUser(
+        token_data=TokenData(
+            username=token_data["username"],
+            user_id=token_data["user_id"],
+            is_panic_mode=token_data["is_panic_mode"]
+        ),
+        user=user
     )
 
+async def get_current_user(
+    resolved: ResolvedUser = Depends(get_resolved_user)
+) -> TokenData:
+    """Get current authenticated user from JWT token"""
+    return resolved.token_data
+
 async def get_current_active_user(
     current_user: TokenData = Depends(get_current_user)
 ) -> TokenData:
@@ -60,18 +83,13 @@ async def get_current_active_user(
     return current_user
 
 async def check_travel_mode(
-    current_user: TokenData = Depends(get_current_user)
+    resolved: ResolvedUser = Depends(get_resolved_user)
 ) -> bool:
     """Check if user is in travel mode and if access should be restricted"""
-    user = await db.users.find_one({"id": current_user.user_id})
-    
-    if not user:
-        return False
-    
-    travel_mode_enabled = user.get("settings", {}).get("travel_mode", {}).get("travel_mode_enabled", False)
+    travel_mode_enabled = resolved.user.get("settings", {}).get("travel_mode", {}).get("travel_mode_enabled", False)
     
     # If travel mode is enabled and user is NOT in panic mode, restrict access
-    if travel_mode_enabled and not current_user.is_panic_mode:
+    if travel_mode_enabled and not resolved.token_data.is_panic_mode:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Not Found"
@@ -80,7 +98,8 @@ async def check_travel_mode(
     return travel_mode_enabled
 
 async def get_optional_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ) -> Optional[TokenData]:
     """Get current user if authenticated, otherwise return None"""
     if not credentials:
@@ -90,8 +109,8 @@ async def get_optional_user(
         token = credentials.credentials
         token_data = verify_token(token)
         
-        # Get user from database
-        user = await db.users.find_one({"id": token_data["user_id"]})
+        # Get user from cache or database
+        user = await load_auth_user(db, token_data["user_id"])
         
         if user is None or not user.get("is_active", True):
             return None
@@ -104,17 +123,10 @@ async def get_optional_user(
     except:
         return None
 
-async def check_public_access():
+async def check_public_access(db: AsyncIOMotorDatabase = Depends(get_db)):
     """Check if public access is allowed based on travel mode settings"""
-    # Get all users to check if any have travel mode enabled
-    users_cursor = db.users.find({
-        "settings.travel_mode.travel_mode_enabled": True
-    })
-    
-    travel_mode_users = await users_cursor.to_list(length=1)
-    
     # If any user has travel mode enabled, block public access
-    if travel_mode_users:
+    if await travel_mode_indicator.is_enabled(db):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Not Found"
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from typing import Callable
+import asyncio
+import os
+import time
+
+# Pool configuration
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", "64"))
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 1
+
+
+class PasswordHashPool:
+    """Runs bcrypt work on a dedicated thread pool instead of the event loop.
+
+    At most `workers` hashes run at once and at most `queue_depth` callers
+    wait for a slot; anyone beyond that is rejected with a 503 straight away
+    rather than piling up behind the CPU-bound work.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_depth: int = PASSWORD_HASH_QUEUE_DEPTH):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._executor = None
+        self._semaphore = None
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def run(self, func: Callable, *args):
+        """Run a hashing function on the pool, waiting for a free slot"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+
+        if self.waiting >= self.queue_depth:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+            )
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        wait = started_at - queued_at
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+            elapsed = time.perf_counter() - started_at
+            self.completed += 1
+            self.hash_seconds_total += elapsed
+            self.hash_seconds_max = max(self.hash_seconds_max, elapsed)
+
+    def stats(self) -> dict:
+        """Queue, latency and rejection metrics"""
+        completed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "hash_ms_avg": round(self.hash_seconds_total / completed * 1000, 3),
+            "hash_ms_max": round(self.hash_seconds_max * 1000, 3),
+            "queue_wait_ms_avg": round(self.wait_seconds_total / completed * 1000, 3),
+            "queue_wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+        }
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._semaphore = None
+
+
+password_pool = PasswordHashPool()
@@ -0,0 +1,91 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta
+from typing import Optional
+import hashlib
+import os
+import secrets
+import uuid
+
+# Refresh token configuration
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+REFRESH_TOKEN_BYTES = 48
+
+
+def hash_refresh_token(token: str) -> str:
+    """Digest used to store and look up a refresh token.
+
+    Refresh tokens are random and high-entropy, so a plain SHA-256 is enough;
+    unlike passwords they don't need a slow hash.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def issue_refresh_token(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    is_panic_mode: bool,
+    family_id: Optional[str] = None
+) -> str:
+    """Create and store a new opaque refresh token, returning the plain token"""
+    token = secrets.token_urlsafe(REFRESH_TOKEN_BYTES)
+    now = datetime.utcnow()
+
+    await db.refresh_tokens.insert_one({
+        "token_hash": hash_refresh_token(token),
+        "user_id": user_id,
+        "is_panic_mode": is_panic_mode,
+        "family_id": family_id or str(uuid.uuid4()),
+        "created_at": now,
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        "revoked_at": None
+    })
+
+    return token
+
+
+async def consume_refresh_token(db: AsyncIOMotorDatabase, token: str) -> Optional[dict]:
+    """Atomically revoke a live refresh token and return its record.
+
+    Returns None if the token is unknown, expired or already used. Presenting
+    an already-rotated token means it leaked, so its whole family is revoked.
+    """
+    now = datetime.utcnow()
+    token_hash = hash_refresh_token(token)
+
+    record = await db.refresh_tokens.find_one_and_update(
+        {"token_hash": token_hash, "revoked_at": None, "expires_at": {"$gt": now}},
+        {"$set": {"revoked_at": now}},
+        return_document=ReturnDocument.BEFORE
+    )
+
+    if record is None:
+        reused = await db.refresh_tokens.find_one(
+            {"token_hash": token_hash, "revoked_at": {"$ne": None}},
+            {"_id": 0, "family_id": 1}
+        )
+        if reused:
+            await db.refresh_tokens.update_many(
+                {"family_id": reused["family_id"], "revoked_at": None},
+                {"$set": {"revoked_at": now}}
+            )
+
+    return record
+
+
+async def revoke_refresh_token(db: AsyncIOMotorDatabase, token: str) -> bool:
+    """Revoke a single refresh token"""
+    result = await db.refresh_tokens.update_one(
+        {"token_hash": hash_refresh_token(token), "revoked_at": None},
+        {"$set": {"revoked_at": datetime.utcnow()}}
+    )
+    return result.modified_count == 1
+
+
+async def revoke_user_refresh_tokens(db: AsyncIOMotorDatabase, user_id: str) -> int:
+    """Revoke every live refresh token belonging to a user"""
+    result = await db.refresh_tokens.update_many(
+        {"user_id": user_id, "revoked_at": None},
+        {"$set": {"revoked_at": datetime.utcnow()}}
+    )
+    return result.modified_count
@@ -6,6 +6,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
+from .password_pool import password_pool
+from .token_cache import token_cache
+
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
@@ -22,6 +25,14 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password hashing pool"""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    return await password_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -35,7 +46,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_token(token: str) -> dict:
-    """Verify and decode a JWT token"""
+    """Verify and decode a JWT token, reusing earlier verifications"""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return dict(cached)
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -49,11 +64,17 @@ def verify_token(token: str) -> dict:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return {
+        token_data = {
             "username": username,
             "user_id": user_id,
             "is_panic_mode": is_panic_mode
         }
+        
+        # Only tokens with an expiry are cached, and only until that expiry
+        if payload.get("exp") is not None:
+            token_cache.set(token, token_data, float(payload["exp"]))
+        
+        return dict(token_data)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
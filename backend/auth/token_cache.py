@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import os
+import time
+
+# Cache configuration
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of already-verified JWTs mapped to their decoded claims.
+
+    Entries are keyed by a SHA-256 digest of the token, so raw tokens are
+    never held, and each one expires at the token's own `exp` claim.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return the cached claims for a token, or None if missing or expired"""
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def set(self, token: str, claims: dict, expires_at: float):
+        """Cache verified claims until the token's expiry"""
+        if self.max_size <= 0 or expires_at <= time.time():
+            return
+
+        key = self.digest(token)
+        self._entries[key] = (expires_at, claims)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached token"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+token_cache = VerifiedTokenCache()
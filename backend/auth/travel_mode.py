@@ -0,0 +1,41 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import os
+import time
+
+# How long a worker trusts its last answer before asking MongoDB again
+TRAVEL_MODE_CACHE_TTL_SECONDS = float(os.getenv("TRAVEL_MODE_CACHE_TTL_SECONDS", "5"))
+
+# Backed by a partial index containing only users with travel mode on, so the
+# lookup reads at most one small index entry regardless of user count
+TRAVEL_MODE_FILTER = {"settings.travel_mode.travel_mode_enabled": True}
+
+
+class TravelModeIndicator:
+    """Cached answer to "does any user have travel mode enabled?".
+
+    Writers in this worker invalidate it explicitly; other workers pick the
+    change up once the TTL elapses.
+    """
+
+    def __init__(self, ttl_seconds: float = TRAVEL_MODE_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._enabled = None
+        self._expires_at = 0.0
+
+    async def is_enabled(self, db: AsyncIOMotorDatabase) -> bool:
+        """Whether any user currently has travel mode enabled"""
+        if self._enabled is not None and time.monotonic() < self._expires_at:
+            return self._enabled
+
+        user = await db.users.find_one(TRAVEL_MODE_FILTER, {"_id": 1})
+        self._enabled = user is not None
+        self._expires_at = time.monotonic() + self.ttl_seconds
+        return self._enabled
+
+    def invalidate(self):
+        """Forget the cached answer after a travel mode change"""
+        self._enabled = None
+        self._expires_at = 0.0
+
+
+travel_mode_indicator = TravelModeIndicator()
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from typing import Optional
+import os
+import time
+
+# Cache configuration
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+
+class UserCache:
+    """Bounded, TTL-expiring LRU of user documents used for authentication.
+
+    The cache is per process: writers in this worker invalidate explicitly,
+    and the TTL bounds how long another worker can serve a stale entry.
+    """
+
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_size: int = USER_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[dict]:
+        """Return the cached user document, or None if missing or expired"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def set(self, user_id: str, user: dict):
+        """Cache a user document until the TTL elapses"""
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user_id)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: str):
+        """Drop a user after their document changed"""
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        """Drop every cached user"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+user_cache = UserCache()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the vectorized spending analytics.
+
+Builds a synthetic history of 100k+ transactions and times each insight in
+services/analytics.py against a straightforward per-row Python loop over
+the same documents.
+
+Usage: python benchmarks/bench_analytics.py [transactions] [rounds]
+"""
+
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from statistics import median
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import analytics
+
+CATEGORIES = ["Food", "Transport", "Entertainment", "Utilities", "Health", "Shopping"]
+TODAY = date(2024, 12, 15)
+
+
+def generate_documents(count):
+    random.seed(42)
+    documents = []
+    first = TODAY - timedelta(days=3 * 365)
+    day = first
+    while day <= TODAY:
+        if day.day == 1:
+            documents.append({"date": day.isoformat(), "type": "expense", "category": "Rent", "amount": 1200.0, "description": "Rent payment"})
+            documents.append({"date": day.isoformat(), "type": "income", "category": "Salary", "amount": 4000.0, "description": "Salary"})
+        if day.weekday() == 0:
+            documents.append({"date": day.isoformat(), "type": "expense", "category": "Health", "amount": 12.0, "description": "Gym"})
+        day += timedelta(days=1)
+
+    span = (TODAY - first).days
+    while len(documents) < count:
+        documents.append({
+            "date": (first + timedelta(days=random.randint(0, span))).isoformat(),
+            "type": "expense" if random.random() < 0.9 else "income",
+            "category": random.choice(CATEGORIES),
+            "amount": round(random.uniform(1, 200), 2),
+            "description": f"Card purchase {random.randint(1, 5000)}",
+        })
+    return documents
+
+
+def loop_rolling(documents, first, last, windows=(7, 30)):
+    daily = defaultdict(float)
+    for document in documents:
+        if document["type"] == "expense":
+            daily[document["date"]] += document["amount"]
+    result = []
+    day = first
+    while day <= last:
+        row = {"date": day.isoformat(), "spent": daily.get(day.isoformat(), 0.0)}
+        for window in windows:
+            values = [daily.get((day - timedelta(days=i)).isoformat(), 0.0) for i in range(window)]
+            row[f"avg_{window}d"] = sum(values) / window
+        result.append(row)
+        day += timedelta(days=1)
+    return result
+
+
+def loop_category_deltas(documents, year, month):
+    previous = (year - 1, 12) if month == 1 else (year, month - 1)
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for document in documents:
+        if document["type"] != "expense":
+            continue
+        key = (int(document["date"][:4]), int(document["date"][5:7]))
+        if key == (year, month):
+            totals[document["category"]][0] += document["amount"]
+        elif key == previous:
+            totals[document["category"]][1] += document["amount"]
+    return sorted(totals.items(), key=lambda item: -abs(item[1][0] - item[1][1]))
+
+
+def loop_recurring(documents, min_occurrences=3):
+    groups = defaultdict(list)
+    for document in documents:
+        if document["type"] == "expense":
+            key = "".join(ch for ch in document["description"].lower() if not ch.isdigit()).strip()
+            groups[(key, document["category"])].append((date.fromisoformat(document["date"]), document["amount"]))
+    recurring = []
+    for key, payments in groups.items():
+        if len(payments) < min_occurrences:
+            continue
+        payments.sort()
+        gaps = [(b[0] - a[0]).days for a, b in zip(payments, payments[1:])]
+        gap = median(gaps)
+        for name, shortest, longest in analytics.CADENCES:
+            if shortest <= gap <= longest:
+                recurring.append((key, name))
+    return recurring
+
+
+def loop_projection(documents, today):
+    month_prefix = today.strftime("%Y-%m")
+    spent = defaultdict(float)
+    for document in documents:
+        if document["type"] == "expense" and document["date"].startswith(month_prefix) and document["date"] <= today.isoformat():
+            spent[document["category"]] += document["amount"]
+    return {category: total / today.day * 31 for category, total in spent.items()}
+
+
+def measure(label, rounds, func):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    per_call_ms = (time.perf_counter() - start) / rounds * 1000
+    print(f"  {label:<22} {per_call_ms:10.2f} ms")
+    return per_call_ms
+
+
+def compare(name, rounds, vectorized, loop):
+    print(name)
+    after = measure("vectorized (numpy)", rounds, vectorized)
+    before = measure("per-row Python loop", rounds, loop)
+    print(f"  {'speedup':<22} {before / after:10.1f}x")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 120_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    documents = generate_documents(count)
+    columns = [[document[field] for document in documents] for field in ("date", "type", "category", "amount", "description")]
+
+    start = time.perf_counter()
+    frame = analytics.build_frame(*columns)
+    print(f"{len(frame)} transactions loaded into columns in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    first = TODAY - timedelta(days=89)
+    compare(
+        "rolling averages (90 days)", rounds,
+        lambda: analytics.rolling_spending(frame, first, TODAY),
+        lambda: loop_rolling(documents, first, TODAY)
+    )
+    compare(
+        "month-over-month categories", rounds,
+        lambda: analytics.category_deltas(frame, TODAY.year, TODAY.month),
+        lambda: loop_category_deltas(documents, TODAY.year, TODAY.month)
+    )
+    compare(
+        "recurring payments", rounds,
+        lambda: analytics.recurring_payments(frame),
+        lambda: loop_recurring(documents)
+    )
+    recurring = analytics.recurring_payments(frame)
+    compare(
+        "end-of-month projection", rounds,
+        lambda: analytics.month_projection(frame, TODAY, {"Food": 400.0}, recurring),
+        lambda: loop_projection(documents, TODAY)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for transaction inserts against a local mongod.
+
+Compares the single-insert path used by POST /transactions (one
+insert_one per transaction) with the chunked, unordered insert_many used
+by POST /transactions/bulk.
+
+Usage: python benchmarks/bench_bulk_insert.py [transactions] [chunk_size]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from models.transaction import Transaction, TransactionCreate
+from services.bulk_writes import insert_transactions
+
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://127.0.0.1:27017/")
+DATABASE = "budget_planner_benchmark"
+USER_ID = "benchmark-user"
+
+
+def make_transactions(count):
+    return [
+        TransactionCreate(
+            type="expense",
+            category=f"Category {i % 12}",
+            amount=round(1 + (i % 500) * 1.37, 2),
+            description=f"Card payment {i}",
+            date=f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}",
+        )
+        for i in range(count)
+    ]
+
+
+async def single_inserts(db, transactions):
+    for transaction in transactions:
+        document = Transaction(**transaction.dict()).dict()
+        document["user_id"] = USER_ID
+        await db.transactions.insert_one(document)
+
+
+async def bulk_insert(db, transactions, chunk_size):
+    await insert_transactions(db, USER_ID, list(enumerate(transactions)), chunk_size=chunk_size)
+
+
+async def measure(label, db, count, run):
+    await db.transactions.delete_many({})
+    start = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000:10.1f} ms  {count / elapsed:12.0f} transactions/s")
+    return elapsed
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DATABASE]
+    transactions = make_transactions(count)
+
+    try:
+        print(f"Inserting {count} transactions into {DATABASE}")
+        before = await measure("insert_one per transaction", db, count, lambda: single_inserts(db, transactions))
+        after = await measure(f"insert_many, chunks of {chunk_size}", db, count, lambda: bulk_insert(db, transactions, chunk_size))
+        print(f"{'speedup':<32} {before / after:10.1f}x")
+    finally:
+        await client.drop_database(DATABASE)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the columnar transaction list format.
+
+Encodes a page of realistic transactions (a few dozen merchants, a dozen
+categories, two types) as the row JSON GET /transactions returns by default
+and as the opt-in columnar format, and reports payload size and encode time
+for each, uncompressed and with the codings CompressionMiddleware applies.
+
+Usage: python benchmarks/bench_columnar.py [rows] [rounds]
+"""
+
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compression import brotli, compress
+from routes.transactions import TRANSACTION_COLUMNS, TRANSACTION_DICTIONARY_COLUMNS
+from serialization import FastJSONResponse, orjson, to_columnar
+
+MERCHANTS = {
+    "Food": ["Tesco", "Lidl", "Aldi", "Pret A Manger", "Deliveroo", "Local bakery"],
+    "Transport": ["TfL", "Uber", "Shell", "Trainline"],
+    "Entertainment": ["Netflix", "Spotify", "Cinema", "Steam"],
+    "Utilities": ["British Gas", "Thames Water", "Vodafone"],
+    "Health": ["Boots", "PureGym"],
+    "Shopping": ["Amazon", "IKEA", "Zara", "Argos"],
+    "Housing": ["Rent"],
+    "Travel": ["Ryanair", "Booking.com"],
+    "Education": ["Udemy"],
+    "Gifts": ["Etsy"],
+}
+INCOME = {"Salary": ["Salary"], "Freelance": ["Invoice"], "Refunds": ["Refund"]}
+
+
+def mongo_datetime(value: datetime) -> datetime:
+    """BSON dates keep millisecond precision"""
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def transaction_documents(rows):
+    random.seed(7)
+    now = datetime.utcnow()
+    documents = []
+    for i in range(rows):
+        income = random.random() < 0.08
+        category, merchants = random.choice(list((INCOME if income else MERCHANTS).items()))
+        created = mongo_datetime(now - timedelta(minutes=i * 37))
+        documents.append({
+            "type": "income" if income else "expense",
+            "category": category,
+            "amount": round(random.uniform(1500, 3500) if income else random.lognormvariate(3, 1), 2),
+            "description": f"{random.choice(merchants)} {random.randint(1000, 9999)}" if random.random() < 0.3 else random.choice(merchants),
+            "date": created.strftime("%Y-%m-%d"),
+            "id": str(uuid.uuid4()),
+            "created_at": created,
+            "updated_at": created,
+        })
+    return documents
+
+
+def measure(rounds, func):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = func()
+    return result, (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    documents = transaction_documents(rows)
+    response = FastJSONResponse.__new__(FastJSONResponse)
+    formats = {
+        "rows (application/json)": lambda: response.render(documents),
+        "columnar": lambda: response.render(
+            to_columnar(documents, TRANSACTION_COLUMNS, TRANSACTION_DICTIONARY_COLUMNS)
+        ),
+    }
+    codings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+
+    print(f"{rows} transactions, JSON encoder: {'orjson' if orjson is not None else 'pydantic-core'}")
+    if brotli is None:
+        print("brotli not installed; skipping br")
+    print(f"  {'format':<24} {'coding':<9} {'bytes':>9} {'encode ms':>10}")
+    for name, render in formats.items():
+        body, render_ms = measure(rounds, render)
+        for coding in codings:
+            if coding == "identity":
+                size, elapsed = len(body), render_ms
+            else:
+                compressed, compress_ms = measure(rounds, lambda: compress(body, coding))
+                size, elapsed = len(compressed), render_ms + compress_ms
+            print(f"  {name:<24} {coding:<9} {size:>9} {elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark for serializing list endpoint responses.
+
+Compares the previous path for GET /transactions and GET /budgets (build a
+model per row, then FastAPI validates against response_model and encodes
+with json.dumps) against returning the projected documents through
+FastJSONResponse. Both paths must produce the same JSON.
+
+Usage: python benchmarks/bench_list_serialization.py [rows] [rounds]
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+
+from models.budget import Budget
+from models.transaction import Transaction
+from serialization import FastJSONResponse, orjson
+
+
+def mongo_datetime(value: datetime) -> datetime:
+    """BSON dates keep millisecond precision"""
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def transaction_documents(rows):
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "type": "expense" if i % 3 else "income",
+            "category": f"Category {i % 12}",
+            "amount": round(10 + i * 1.37, 2),
+            "description": f"Benchmark transaction {i}",
+            "date": (now - timedelta(days=i % 365)).strftime("%Y-%m-%d"),
+            "created_at": mongo_datetime(now - timedelta(seconds=i)),
+            "updated_at": mongo_datetime(now - timedelta(seconds=i)),
+        }
+        for i in range(rows)
+    ]
+
+
+def budget_documents(rows):
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "category": f"Category {i}",
+            "amount": 100.0 + i,
+            "created_at": mongo_datetime(now),
+            "updated_at": mongo_datetime(now),
+        }
+        for i in range(rows)
+    ]
+
+
+def model_path(model, documents):
+    adapter = TypeAdapter(List[model])
+
+    def render():
+        objects = [model(**document) for document in documents]
+        content = adapter.dump_python(adapter.validate_python(objects), mode="json")
+        return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
+    return render
+
+
+def fast_path(documents):
+    response = FastJSONResponse.__new__(FastJSONResponse)
+
+    def render():
+        return response.render(documents)
+
+    return render
+
+
+def measure(label, rows, rounds, func):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = time.perf_counter() - start
+    per_row_us = elapsed / (rounds * rows) * 1_000_000
+    print(f"  {label:<30} {per_row_us:8.3f} µs/row  ({rounds} x {rows} rows)")
+    return per_row_us
+
+
+def compare(name, model, documents, rounds):
+    before_render = model_path(model, documents)
+    after_render = fast_path(documents)
+    assert json.loads(before_render()) == json.loads(after_render()), f"{name}: outputs differ"
+
+    print(name)
+    before = measure("model per row + response_model", len(documents), rounds, before_render)
+    after = measure("projection + FastJSONResponse", len(documents), rounds, after_render)
+    print(f"  {'speedup':<30} {before / after:8.1f}x")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'pydantic-core'}")
+    compare("GET /transactions", Transaction, transaction_documents(rows), rounds)
+    compare("GET /budgets", Budget, budget_documents(min(rows, 200)), rounds)
+
+
+if __name__ == "__main__":
+    main()
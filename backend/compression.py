@@ -0,0 +1,131 @@
+"""
+Response compression above a size threshold.
+
+Complete JSON and text responses of at least COMPRESSION_MIN_SIZE bytes
+are compressed with brotli when the client accepts it and the `brotli`
+package is installed, otherwise with gzip. Streamed responses (the
+transaction export) pass through untouched.
+
+A strong ETag names one exact body, so compressed responses get the coding
+appended to their ETag (`"...-gzip"`); `identity_etag` strips it again when
+If-None-Match is compared against the data version. A 304 answering a
+compressed representation's tag gets the suffix back, so the client keeps
+the tag it would have had from a 200.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
+import gzip
+import os
+
+from serialization import header_quality
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Smaller bodies aren't worth the CPU or the extra headers
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+CODINGS = ("br", "gzip")
+
+
+def choose_coding(accept_encoding: str) -> Optional[str]:
+    """The content coding to use for a request's Accept-Encoding, if any"""
+    if brotli is not None and header_quality(accept_encoding, "br", wildcard=True) > 0:
+        return "br"
+    if header_quality(accept_encoding, "gzip", wildcard=True) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def identity_etag(etag: str) -> str:
+    """An ETag without the coding suffix added by CompressionMiddleware"""
+    for coding in CODINGS:
+        suffix = f'-{coding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def holds_coded(if_none_match: str, etag: str) -> bool:
+    """Whether If-None-Match lists a compressed representation's tag for etag"""
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return any(candidate != etag and identity_etag(candidate) == etag for candidate in candidates)
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.split(";")[0].strip().lower()
+    return content_type.startswith("text/") or content_type.endswith("json")
+
+
+class CompressionMiddleware:
+    """Compress complete JSON/text responses of at least minimum_size bytes"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        coding = choose_coding(request_headers.get("accept-encoding", ""))
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start" and message["status"] == 304:
+                # No body to compress, but the ETag must still name the representation
+                # a 200 would send: the coded one, when that is what the client holds
+                headers = MutableHeaders(raw=message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and coding and holds_coded(request_headers.get("if-none-match", ""), etag):
+                    headers["ETag"] = f'{etag[:-1]}-{coding}"'
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Hold the headers until the body shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            headers = MutableHeaders(raw=held["headers"])
+            if not is_compressible(headers.get("content-type", "")) or "content-encoding" in headers:
+                await send(held)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            body = message.get("body", b"")
+            if coding is None or message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(held)
+                await send(message)
+                return
+
+            body = compress(body, coding)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(body))
+            etag = headers.get("etag")
+            if etag and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{coding}"'
+            await send(held)
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,161 @@
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+from typing import Optional
+import os
+import logging
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+# Connection pool tuning, all overridable from the environment. Pool sizes
+# match the driver defaults. Two values deliberately differ from them:
+# idle connections are closed after 60 s (driver: never) so a quiet worker
+# gives its sockets back, and server selection gives up after 5 s (driver:
+# 30 s) so requests fail fast instead of hanging while the cluster is down.
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Keeps running counters of connection pool events for this process"""
+
+    def __init__(self):
+        self.pools = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        self.pools += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        self.pools -= 1
+
+    def connection_created(self, event):
+        self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    """Counts the database commands (round-trips) issued by this process"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def started(self, event):
+        self.counts[event.command_name] = self.counts.get(event.command_name, 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+pool_stats = PoolStatsListener()
+command_stats = CommandStatsListener()
+
+# The single client for this process, set by connect() in the app lifespan
+client: Optional[AsyncIOMotorClient] = None
+db: Optional[AsyncIOMotorDatabase] = None
+
+
+def connect() -> AsyncIOMotorDatabase:
+    """Create the process-wide MongoDB client and return the app database"""
+    global client, db
+
+    if db is not None:
+        return db
+
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [pool_stats, command_stats],
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], **options)
+    db = client[os.environ['DB_NAME']]
+    logger.info(
+        f"MongoDB client created (maxPoolSize={MONGO_MAX_POOL_SIZE}, "
+        f"minPoolSize={MONGO_MIN_POOL_SIZE}, compressors={MONGO_COMPRESSORS or 'none'})"
+    )
+    return db
+
+
+def close():
+    """Close the process-wide MongoDB client"""
+    global client, db
+
+    if client is not None:
+        client.close()
+    client = None
+    db = None
+
+
+def get_pool_stats() -> dict:
+    """Snapshot of the connection pool counters and configuration"""
+    return {
+        "pools": pool_stats.pools,
+        "connections_open": pool_stats.connections_created - pool_stats.connections_closed,
+        "connections_in_use": pool_stats.checked_out,
+        "connections_created": pool_stats.connections_created,
+        "connections_closed": pool_stats.connections_closed,
+        "checkout_failures": pool_stats.checkout_failures,
+        "pool_clears": pool_stats.pool_clears,
+        "config": {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "max_idle_time_ms": MONGO_MAX_IDLE_TIME_MS,
+            "server_selection_timeout_ms": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "compressors": MONGO_COMPRESSORS or None,
+        },
+    }
+
+
+def get_command_stats() -> dict:
+    """Number of database commands issued so far, by command name"""
+    counts = dict(command_stats.counts)
+    return {"total": sum(counts.values()), "commands": counts}
+
+
+async def get_db(request: Request) -> AsyncIOMotorDatabase:
+    """Dependency returning the database created in the app lifespan"""
+    return request.app.state.db
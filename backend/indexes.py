@@ -0,0 +1,350 @@
+"""
+Declarative index registry.
+
+Every index the API relies on is listed in INDEXES, and every query the
+routes issue is listed in QUERY_SHAPES next to the index meant to serve it
+(a find filter/sort/limit, or a whole aggregation `pipeline`, with the
+`hint` the route passes, if any).
+`ensure_indexes` creates whatever is missing on startup (or from
+`python manage.py migrate`) and `audit_query_shapes`
+runs explain() for each shape so a COLLSCAN or in-memory SORT is caught
+before it reaches production (see `python manage.py audit-indexes`).
+"""
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from datetime import datetime
+from typing import Dict, List
+import asyncio
+
+from services.sync import SYNC_TOMBSTONE_DAYS
+from services.transaction_search import SEARCH_INDEX_HINT, search_pipeline
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "transactions": [
+        # Transaction list: user_id (+ type/category/date filters), keyset-paginated newest first
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        # Month/year list filters on year_month, already in the list's newest-first order
+        IndexModel([("user_id", ASCENDING), ("year_month", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        # Date range aggregations on the native date_key (series, analytics)
+        IndexModel([("user_id", ASCENDING), ("date_key", ASCENDING)]),
+        # Chat context date sort, and string-date reads until the date_key backfill is done
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)]),
+        # GET /transactions/search: prefix bounds on the words of description and category
+        IndexModel([("user_id", ASCENDING), ("search_terms", ASCENDING)]),
+        # Single transaction get/update/delete
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], unique=True),
+        # GET /sync: changes since a watermark
+        IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING)]),
+    ],
+    "budgets": [
+        # Budget list sorted by category, and get/update/delete by category
+        IndexModel([("user_id", ASCENDING), ("category", ASCENDING)], unique=True),
+        # GET /sync: changes since a watermark
+        IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING)]),
+    ],
+    "sync_tombstones": [
+        # GET /sync: deletions since a watermark
+        IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING)]),
+        # Tombstones outlive every watermark GET /sync still accepts (services.sync)
+        IndexModel([("updated_at", ASCENDING)], expireAfterSeconds=(SYNC_TOMBSTONE_DAYS + 1) * 24 * 3600),
+    ],
+    "monthly_rollups": [
+        # One document per user, month, type and category; monthly summary and budget status
+        IndexModel(
+            [("user_id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING), ("type", ASCENDING), ("category", ASCENDING)],
+            unique=True,
+        ),
+    ],
+    "users": [
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("settings.travel_mode.panic_username", ASCENDING)]),
+        IndexModel(
+            [("settings.travel_mode.travel_mode_enabled", ASCENDING)],
+            partialFilterExpression={"settings.travel_mode.travel_mode_enabled": True},
+        ),
+    ],
+    "refresh_tokens": [
+        IndexModel([("token_hash", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("family_id", ASCENDING)]),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "import_jobs": [
+        IndexModel([("id", ASCENDING), ("user_id", ASCENDING)], unique=True),
+        # Finished jobs are kept for a week
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+    ],
+    "chat_sessions": [
+        IndexModel([("session_id", ASCENDING), ("user_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("last_accessed", DESCENDING)]),
+    ],
+}
+
+# Representative values used when explaining the query shapes
+AUDIT_USER_ID = "index-audit-user"
+AUDIT_DATE_FROM = "2024-01-01"
+AUDIT_DATE_TO = "2024-02-01"
+AUDIT_CURSOR_CREATED_AT = datetime(2024, 6, 1)
+
+QUERY_SHAPES = [
+    {
+        "name": "GET /transactions",
+        "collection": "transactions",
+        "filter": {"user_id": AUDIT_USER_ID, "type": "expense", "year_month": 202401},
+        "sort": [("created_at", DESCENDING), ("id", DESCENDING)],
+        "limit": 101,
+    },
+    {
+        "name": "GET /transactions?year= (no month)",
+        "collection": "transactions",
+        "filter": {"user_id": AUDIT_USER_ID, "year_month": {"$in": [202400 + month for month in range(1, 13)]}},
+        "sort": [("created_at", DESCENDING), ("id", DESCENDING)],
+        "limit": 101,
+    },
+    {
+        # The filter as built while TRANSACTION_DATE_READS=dual (the default)
+        "name": "GET /transactions (dual date reads)",
+        "collection": "transactions",
+        "filter": {
+            "user_id": AUDIT_USER_ID,
+            "type": "expense",
+            "$and": [{
+                "$or": [
+                    {"year_month": 202401},
+                    {"year_month": None, "date": {"$gte": AUDIT_DATE_FROM, "$lt": AUDIT_DATE_TO}},
+                ]
+            }],
+        },
+        "sort": [("created_at", DESCENDING), ("id", DESCENDING)],
+        "limit": 101,
+    },
+    {
+        "name": "GET /transactions?cursor=",
+        "collection": "transactions",
+        "filter": {
+            "user_id": AUDIT_USER_ID,
+            "$or": [
+                {"created_at": {"$lt": AUDIT_CURSOR_CREATED_AT}},
+                {"created_at": AUDIT_CURSOR_CREATED_AT, "id": {"$lt": "index-audit-transaction"}},
+            ],
+        },
+        "sort": [("created_at", DESCENDING), ("id", DESCENDING)],
+        "limit": 101,
+    },
+    {
+        "name": "GET /transactions/export",
+        "collection": "transactions",
+        "filter": {"user_id": AUDIT_USER_ID},
+        "sort": [("created_at", DESCENDING), ("id", DESCENDING)],
+    },
+    {
+        "name": "GET/PUT/DELETE /transactions/{id}",
+        "collection": "transactions",
+        "filter": {"id": "index-audit-transaction", "user_id": AUDIT_USER_ID},
+    },
+    {
+        "name": "GET /transactions/summary/monthly",
+        "collection": "monthly_rollups",
+        "filter": {"user_id": AUDIT_USER_ID, "year": 2024, "month": 1, "count": {"$gt": 0}},
+    },
+    {
+        "name": "GET /budgets/status/summary",
+        "collection": "monthly_rollups",
+        "filter": {"user_id": AUDIT_USER_ID, "year": 2024, "month": 1, "type": "expense", "count": {"$gt": 0}},
+    },
+    {
+        "name": "GET /transactions/summary/series?granularity=month",
+        "collection": "monthly_rollups",
+        "filter": {"user_id": AUDIT_USER_ID, "year": {"$gte": 2023, "$lte": 2024}, "count": {"$gt": 0}},
+    },
+    {
+        "name": "GET /transactions/summary/series?granularity=day|week ($match)",
+        "collection": "transactions",
+        "filter": {"user_id": AUDIT_USER_ID, "date_key": {"$gte": 20240101, "$lte": 20240331}},
+    },
+    {
+        "name": "GET /transactions/search",
+        "collection": "transactions",
+        "pipeline": search_pipeline(AUDIT_USER_ID, ["aud", "it"], {}, 51, {"_id": 0}),
+        "hint": SEARCH_INDEX_HINT,
+    },
+    {
+        "name": "GET /sync (transactions, budgets and sync_tombstones alike)",
+        "collection": "transactions",
+        "filter": {"user_id": AUDIT_USER_ID, "updated_at": {"$gte": AUDIT_CURSOR_CREATED_AT}},
+        "sort": [("updated_at", ASCENDING)],
+        "limit": 5001,
+    },
+    {
+        "name": "ETag data version (list and summary GETs)",
+        "collection": "data_versions",
+        "filter": {"_id": AUDIT_USER_ID},
+    },
+    {
+        "name": "rollup rebuild/verify ($match)",
+        "collection": "transactions",
+        "filter": {"user_id": AUDIT_USER_ID},
+    },
+    {
+        "name": "chat financial context: recent transactions",
+        "collection": "transactions",
+        "filter": {"user_id": AUDIT_USER_ID},
+        "sort": [("date", DESCENDING)],
+        "limit": 10,
+    },
+    {
+        "name": "GET /budgets",
+        "collection": "budgets",
+        "filter": {"user_id": AUDIT_USER_ID},
+        "sort": [("category", ASCENDING)],
+    },
+    {
+        "name": "GET/PUT/DELETE /budgets/{category}",
+        "collection": "budgets",
+        "filter": {"category": "Food", "user_id": AUDIT_USER_ID},
+    },
+    {
+        "name": "POST /login",
+        "collection": "users",
+        "filter": {"username": "index-audit"},
+    },
+    {
+        "name": "POST /panic-login",
+        "collection": "users",
+        "filter": {"settings.travel_mode.panic_username": "index-audit-panic"},
+    },
+    {
+        "name": "authenticated user lookup",
+        "collection": "users",
+        "filter": {"id": AUDIT_USER_ID},
+    },
+    {
+        "name": "travel mode indicator",
+        "collection": "users",
+        "filter": {"settings.travel_mode.travel_mode_enabled": True},
+    },
+    {
+        "name": "POST /refresh",
+        "collection": "refresh_tokens",
+        "filter": {"token_hash": "index-audit-token"},
+    },
+    {
+        "name": "GET /transactions/import/{job_id}",
+        "collection": "import_jobs",
+        "filter": {"id": "index-audit-job", "user_id": AUDIT_USER_ID},
+    },
+    {
+        "name": "GET /chat/sessions",
+        "collection": "chat_sessions",
+        "filter": {"user_id": AUDIT_USER_ID},
+        "sort": [("last_accessed", DESCENDING)],
+        "limit": 20,
+    },
+    {
+        "name": "chat session by id",
+        "collection": "chat_sessions",
+        "filter": {"session_id": "index-audit-session", "user_id": AUDIT_USER_ID},
+    },
+]
+
+# Plan stages that mean a query is not served by an index
+BAD_PLAN_STAGES = {"COLLSCAN", "SORT"}
+
+
+async def find_missing_indexes(collection: AsyncIOMotorCollection, indexes: List[IndexModel]) -> List[IndexModel]:
+    """Registered indexes that don't exist on the collection yet"""
+    existing = {index["name"] async for index in collection.list_indexes()}
+    return [index for index in indexes if index.document["name"] not in existing]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """Create the registered indexes that are missing, returning their names.
+
+    Collections are handled concurrently and each collection's missing
+    indexes go out in a single createIndexes command, so a database that is
+    already up to date costs one listIndexes per collection.
+    """
+    async def ensure(collection_name: str, indexes: List[IndexModel]):
+        collection = db[collection_name]
+        missing = await find_missing_indexes(collection, indexes)
+        if missing:
+            await collection.create_indexes(missing)
+        return collection_name, [index.document["name"] for index in missing]
+
+    results = await asyncio.gather(*(ensure(name, indexes) for name, indexes in INDEXES.items()))
+    return {name: created for name, created in results if created}
+
+
+async def find_unregistered_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """Indexes present in the database but missing from the registry"""
+    drift = {}
+    for collection_name, indexes in INDEXES.items():
+        registered = {index.document["name"] for index in indexes} | {"_id_"}
+        existing = await db[collection_name].index_information()
+        extra = sorted(name for name in existing if name not in registered)
+        if extra:
+            drift[collection_name] = extra
+    return drift
+
+
+def _winning_plans(explain) -> List[dict]:
+    """Every winningPlan in an explain() result; aggregations nest them per pipeline stage"""
+    plans = []
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                plans.append(value)
+            elif key != "rejectedPlans":
+                plans.extend(_winning_plans(value))
+    elif isinstance(explain, list):
+        for item in explain:
+            plans.extend(_winning_plans(item))
+    return plans
+
+
+def _plan_stages(plan) -> List[str]:
+    """All stage names in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def audit_query_shapes(db: AsyncIOMotorDatabase) -> List[dict]:
+    """Explain every registered query shape and report its winning plan"""
+    results = []
+    for shape in QUERY_SHAPES:
+        if "pipeline" in shape:
+            options = {"hint": dict(shape["hint"])} if shape.get("hint") else {}
+            explain = await db.command(
+                "aggregate", shape["collection"], pipeline=shape["pipeline"], explain=True, **options
+            )
+        else:
+            cursor = db[shape["collection"]].find(shape["filter"])
+            if shape.get("hint"):
+                cursor = cursor.hint(shape["hint"])
+            if shape.get("sort"):
+                cursor = cursor.sort(shape["sort"])
+            if shape.get("limit"):
+                cursor = cursor.limit(shape["limit"])
+            explain = await cursor.explain()
+
+        stages = [stage for plan in _winning_plans(explain) for stage in _plan_stages(plan)]
+        problems = sorted(BAD_PLAN_STAGES.intersection(stages))
+
+        results.append({
+            "name": shape["name"],
+            "collection": shape["collection"],
+            "stages": stages,
+            "problems": problems,
+        })
+    return results
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Budget Planner backend.
+
+Usage: python manage.py --help
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+import typer
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import uri_parser
+from pymongo.errors import ConfigurationError
+from dotenv import load_dotenv
+from pathlib import Path
+
+import indexes
+from services import monthly_rollups, transaction_dates, transaction_search
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+app = typer.Typer(help="Budget Planner maintenance commands")
+
+# Hosts audit-indexes may seed without --allow-remote
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+async def seed_audit_data(db, transactions_per_user: int, users: int):
+    """Fill a scratch database with data shaped like production"""
+    categories = ["Food", "Rent", "Transport", "Salary", "Entertainment", "Utilities", "Health"]
+    start = datetime(2022, 1, 1)
+    user_ids = [indexes.AUDIT_USER_ID] + [f"index-audit-user-{i}" for i in range(1, users)]
+
+    await db.users.insert_many([
+        {
+            "id": user_id,
+            "username": f"audit-{user_id}",
+            "email": f"{user_id}@audit.invalid",
+            "is_active": True,
+            "settings": {"travel_mode": {"travel_mode_enabled": False, "panic_username": None}},
+        }
+        for user_id in user_ids
+    ])
+
+    for user_id in user_ids:
+        documents = []
+        for _ in range(transactions_per_user):
+            created_at = start + timedelta(minutes=random.randint(0, 3 * 365 * 24 * 60))
+            documents.append({
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "type": random.choice(["income", "expense", "expense", "expense"]),
+                "category": random.choice(categories),
+                "amount": round(random.uniform(1, 500), 2),
+                "description": "audit",
+                "date": created_at.strftime("%Y-%m-%d"),
+                **transaction_dates.date_fields(created_at.strftime("%Y-%m-%d")),
+                **transaction_search.search_fields("audit", "Food"),
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+        await db.transactions.insert_many(documents)
+        await monthly_rollups.rebuild_rollups(db, user_id)
+
+        await db.budgets.insert_many([
+            {"id": str(uuid.uuid4()), "user_id": user_id, "category": category, "amount": 300.0}
+            for category in categories
+        ])
+        await db.chat_sessions.insert_many([
+            {"session_id": str(uuid.uuid4()), "user_id": user_id, "last_accessed": start + timedelta(days=i)}
+            for i in range(30)
+        ])
+        await db.refresh_tokens.insert_many([
+            {
+                "token_hash": uuid.uuid4().hex,
+                "user_id": user_id,
+                "family_id": str(uuid.uuid4()),
+                "expires_at": datetime.utcnow() + timedelta(days=30),
+            }
+            for _ in range(5)
+        ])
+
+
+def is_local_mongo(mongo_url: str) -> bool:
+    """Whether every host in a MongoDB URL is this machine"""
+    if mongo_url.startswith("mongodb+srv://"):
+        # SRV records name a cluster, never this machine
+        return False
+    try:
+        hosts = [host for host, _port in uri_parser.parse_uri(mongo_url)["nodelist"]]
+    except (ValueError, ConfigurationError):
+        return False
+    return bool(hosts) and all(host in LOCAL_HOSTS for host in hosts)
+
+
+async def run_index_audit(mongo_url: str, database: str, transactions_per_user: int, users: int, keep: bool) -> bool:
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[database]
+    try:
+        await client.drop_database(database)
+        await indexes.ensure_indexes(db)
+        await seed_audit_data(db, transactions_per_user, users)
+
+        results = await indexes.audit_query_shapes(db)
+        ok = True
+        for result in results:
+            status = "FAIL" if result["problems"] else "ok"
+            ok = ok and not result["problems"]
+            typer.echo(f"[{status:>4}] {result['collection']:<15} {result['name']:<45} {' > '.join(result['stages'])}")
+
+        drift = await indexes.find_unregistered_indexes(db)
+        for collection_name, names in drift.items():
+            typer.echo(f"[WARN] {collection_name}: indexes not in registry: {', '.join(names)}")
+
+        return ok
+    finally:
+        if not keep:
+            await client.drop_database(database)
+        client.close()
+
+
+@app.command("migrate")
+def migrate(
+    mongo_url: str = typer.Option(..., envvar="MONGO_URL"),
+    database: str = typer.Option(..., envvar="DB_NAME"),
+):
+    """Create missing registered indexes (run once per deploy, before the workers)"""
+    async def run():
+        client = AsyncIOMotorClient(mongo_url)
+        try:
+            return await indexes.ensure_indexes(client[database])
+        finally:
+            client.close()
+
+    started = time.perf_counter()
+    created = asyncio.run(run())
+    elapsed = (time.perf_counter() - started) * 1000
+
+    if not created:
+        typer.echo(f"Indexes already up to date ({elapsed:.1f} ms)")
+        return
+    for collection_name, names in created.items():
+        typer.echo(f"{collection_name}: created {', '.join(names)}")
+    typer.echo(f"Done in {elapsed:.1f} ms")
+
+
+@app.command("audit-indexes")
+def audit_indexes(
+    mongo_url: str = typer.Option("mongodb://127.0.0.1:27017/", help="Local MongoDB to seed and explain against"),
+    database: str = typer.Option("budget_planner_index_audit", help="Scratch database, dropped before and after the run"),
+    transactions_per_user: int = typer.Option(2000, help="Seeded transactions per user"),
+    users: int = typer.Option(5, help="Seeded users"),
+    keep: bool = typer.Option(False, help="Keep the seeded database after the run"),
+    allow_remote: bool = typer.Option(False, help="Allow a MongoDB that isn't on this machine"),
+):
+    """Explain every registered query shape and fail on COLLSCAN or in-memory SORT"""
+    # The audit drops and seeds a database; never do that to a shared cluster by accident
+    if not allow_remote and not is_local_mongo(mongo_url):
+        typer.echo(f"Refusing to seed a non-local MongoDB ({mongo_url}); pass --allow-remote to do it anyway")
+        raise typer.Exit(code=2)
+    ok = asyncio.run(run_index_audit(mongo_url, database, transactions_per_user, users, keep))
+    if not ok:
+        typer.echo("Index audit failed: some query shapes are not fully served by an index")
+        raise typer.Exit(code=1)
+    typer.echo("Index audit passed")
+
+
+@app.command("index-drift")
+def index_drift(
+    mongo_url: str = typer.Option(..., envvar="MONGO_URL"),
+    database: str = typer.Option(..., envvar="DB_NAME"),
+):
+    """List indexes that exist in a database but are missing from the registry"""
+    async def run():
+        client = AsyncIOMotorClient(mongo_url)
+        try:
+            return await indexes.find_unregistered_indexes(client[database])
+        finally:
+            client.close()
+
+    drift = asyncio.run(run())
+    if not drift:
+        typer.echo("No index drift")
+        return
+    for collection_name, names in drift.items():
+        typer.echo(f"{collection_name}: {', '.join(names)}")
+    raise typer.Exit(code=1)
+
+
+async def run_rollups(mongo_url: str, database: str, user_id: Optional[str], action, mark_ready: bool = False):
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[database]
+    try:
+        user_ids = [user_id] if user_id else await monthly_rollups.rollup_user_ids(db)
+        results = {uid: await action(db, uid) for uid in user_ids}
+        if mark_ready and not user_id:
+            # Every user is rebuilt: summaries stop aggregating the transactions
+            await monthly_rollups.mark_rollups_ready(db)
+        return results
+    finally:
+        client.close()
+
+
+@app.command("rebuild-rollups")
+def rebuild_rollups(
+    mongo_url: str = typer.Option(..., envvar="MONGO_URL"),
+    database: str = typer.Option(..., envvar="DB_NAME"),
+    user_id: Optional[str] = typer.Option(None, help="Only rebuild this user's rollups"),
+):
+    """Recompute monthly_rollups from transactions (run once after deploying rollups, or to repair drift).
+
+    Safe while the API is serving: rollups are repaired in place and
+    re-verified. Summaries aggregate the transactions until the first full
+    run (without --user-id) finishes; it exits non-zero if a user's rollups
+    can't be brought in line.
+    """
+    started = time.perf_counter()
+    written = asyncio.run(run_rollups(mongo_url, database, user_id, monthly_rollups.rebuild_rollups, mark_ready=True))
+    elapsed = (time.perf_counter() - started) * 1000
+    typer.echo(f"Rebuilt {sum(written.values())} rollups for {len(written)} users in {elapsed:.1f} ms")
+
+
+@app.command("verify-rollups")
+def verify_rollups(
+    mongo_url: str = typer.Option(..., envvar="MONGO_URL"),
+    database: str = typer.Option(..., envvar="DB_NAME"),
+    user_id: Optional[str] = typer.Option(None, help="Only verify this user's rollups"),
+):
+    """Compare monthly_rollups with the transactions and list any differences"""
+    results = asyncio.run(run_rollups(mongo_url, database, user_id, monthly_rollups.verify_rollups))
+    mismatches = [mismatch for user_mismatches in results.values() for mismatch in user_mismatches]
+    if not mismatches:
+        typer.echo(f"Rollups match transactions for {len(results)} users")
+        return
+    for m in mismatches:
+        typer.echo(
+            f"{m['user_id']} {m['year']}-{m['month']:02d} {m['type']:<7} {m['category']}: "
+            f"stored {m['stored']['total']:.2f} ({m['stored']['count']}), "
+            f"expected {m['expected']['total']:.2f} ({m['expected']['count']})"
+        )
+    typer.echo(f"{len(mismatches)} rollups differ; run rebuild-rollups to repair")
+    raise typer.Exit(code=1)
+
+
+def run_backfill(mongo_url: str, database: str, backfill, batch_size: int, pause_ms: int, restart: bool, skipped_label: str) -> dict:
+    def report(state):
+        typer.echo(f"  updated {state['updated']} ({skipped_label}: {state['skipped']})")
+
+    async def run():
+        client = AsyncIOMotorClient(mongo_url)
+        try:
+            return await backfill(client[database], batch_size, restart, pause_ms / 1000, report)
+        finally:
+            client.close()
+
+    started = time.perf_counter()
+    state = asyncio.run(run())
+    elapsed = (time.perf_counter() - started) * 1000
+    typer.echo(f"Backfill complete: {state['updated']} transactions updated in {elapsed:.1f} ms")
+    return state
+
+
+@app.command("backfill-dates")
+def backfill_dates(
+    mongo_url: str = typer.Option(..., envvar="MONGO_URL"),
+    database: str = typer.Option(..., envvar="DB_NAME"),
+    batch_size: int = typer.Option(1000, help="Transactions updated per batch"),
+    pause_ms: int = typer.Option(0, help="Pause between batches to limit load on a live database"),
+    restart: bool = typer.Option(False, help="Ignore the saved checkpoint and start from the beginning"),
+):
+    """Add date_key/year_month to existing transactions; safe to interrupt and re-run"""
+    run_backfill(
+        mongo_url, database, transaction_dates.backfill_date_fields,
+        batch_size, pause_ms, restart, "unparsable dates"
+    )
+    typer.echo("Set TRANSACTION_DATE_READS=native once every worker runs code that writes date_key")
+
+
+@app.command("backfill-search")
+def backfill_search(
+    mongo_url: str = typer.Option(..., envvar="MONGO_URL"),
+    database: str = typer.Option(..., envvar="DB_NAME"),
+    batch_size: int = typer.Option(1000, help="Transactions updated per batch"),
+    pause_ms: int = typer.Option(0, help="Pause between batches to limit load on a live database"),
+    restart: bool = typer.Option(False, help="Ignore the saved checkpoint and start from the beginning"),
+):
+    """Add search_terms to existing transactions so search finds them; safe to interrupt and re-run"""
+    run_backfill(
+        mongo_url, database, transaction_search.backfill_search_terms,
+        batch_size, pause_ms, restart, "skipped"
+    )
+
+
+if __name__ == "__main__":
+    app()
@@ -19,4 +19,12 @@ class Budget(BudgetBase):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BudgetListItem(BaseModel):
+    """A budget row of GET /budgets; `fields` can leave out any but id"""
+    id: str
+    category: Optional[str] = None
+    amount: Optional[float] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
@@ -33,4 +33,12 @@ class ChatSessionResponse(BaseModel):
     title: str
     created_at: datetime
     last_accessed: datetime
-    message_count: int
\ No newline at end of file
+    message_count: int
+
+class ChatSessionListItem(BaseModel):
+    """A session row of GET /sessions; `fields` can leave out any but session_id"""
+    session_id: str
+    title: Optional[str] = None
+    created_at: Optional[datetime] = None
+    last_accessed: Optional[datetime] = None
+    message_count: Optional[int] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Dict, List, Optional, Literal, Any
 from datetime import datetime
 import uuid
 
@@ -26,4 +26,40 @@ class Transaction(TransactionBase):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TransactionListItem(BaseModel):
+    """A transaction row of GET /transactions; `fields` can leave out any but id"""
+    id: str
+    type: Optional[Literal["income", "expense"]] = None
+    category: Optional[str] = None
+    amount: Optional[float] = None
+    description: Optional[str] = None
+    date: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class BulkTransactionResult(BaseModel):
+    index: int
+    success: bool
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkTransactionResponse(BaseModel):
+    inserted: int
+    failed: int
+    results: List[BulkTransactionResult]
+
+class ImportJob(BaseModel):
+    id: str
+    status: Literal["pending", "running", "completed", "failed"]
+    format: str
+    filename: Optional[str] = None
+    rows_read: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = Field(default_factory=list)
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
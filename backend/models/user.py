@@ -50,12 +50,21 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: UserResponse
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username: Optional[str] = None
     user_id: Optional[str] = None
     is_panic_mode: bool = False
 
+class ResolvedUser(BaseModel):
+    """Token claims plus the user document, resolved once per request"""
+    token_data: TokenData
+    user: dict
+
 class UserUpdate(BaseModel):
     full_name: Optional[str] = None
     email: Optional[EmailStr] = None
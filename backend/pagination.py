@@ -0,0 +1,70 @@
+from fastapi import HTTPException
+from datetime import datetime
+from typing import Optional, Tuple
+import base64
+import binascii
+import json
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, item_id: str) -> str:
+    """Opaque cursor pointing just past an item in (created_at, id) order"""
+    payload = json.dumps({"c": created_at.isoformat(), "i": item_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Parse a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(cursor: Optional[str]) -> dict:
+    """Filter selecting items after the cursor in (created_at desc, id desc) order"""
+    if not cursor:
+        return {}
+
+    created_at, item_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": item_id}}
+        ]
+    }
+
+
+# Sort order matching keyset_filter and the (user_id, created_at, id) index
+KEYSET_SORT = [("created_at", -1), ("id", -1)]
+
+
+def encode_ranked_cursor(score: float, created_at: datetime, item_id: str) -> str:
+    """Opaque cursor pointing just past an item in (score, created_at, id) order"""
+    payload = json.dumps({"s": score, "c": created_at.isoformat(), "i": item_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def ranked_keyset_filter(cursor: Optional[str]) -> dict:
+    """Filter selecting items after the cursor in (score desc, created_at desc, id desc) order"""
+    if not cursor:
+        return {}
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        score, created_at, item_id = float(payload["s"]), datetime.fromisoformat(payload["c"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return {
+        "$or": [
+            {"score": {"$lt": score}},
+            {"score": score, "created_at": {"$lt": created_at}},
+            {"score": score, "created_at": created_at, "id": {"$lt": item_id}}
+        ]
+    }
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Optional
+from datetime import date, datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from auth.dependencies import get_current_active_user, check_travel_mode, TokenData
+from database import get_db
+from services import analytics
+
+router = APIRouter(prefix="/analytics")
+
+@router.get("/rolling")
+async def get_rolling_spending(
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    days: int = Query(90, ge=1, le=730, description="Number of days to return, ending today"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Daily spending with 7- and 30-day rolling averages"""
+    try:
+        last = datetime.utcnow().date()
+        first = last - timedelta(days=days - 1)
+        
+        # Load enough history for the first 30-day window
+        frame = await analytics.load_frame(db, current_user.user_id, first - timedelta(days=29), last)
+        
+        return {"days": analytics.rolling_spending(frame, first, last)}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing rolling spending: {str(e)}")
+
+@router.get("/category-deltas")
+async def get_category_deltas(
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Month (1-12), defaults to the current month"),
+    year: Optional[int] = Query(None, ge=2000, le=2100, description="Year, defaults to the current year"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Spending per category against the previous month"""
+    try:
+        now = datetime.utcnow()
+        month = month or now.month
+        year = year or now.year
+        
+        # The requested month and the one before it
+        first = date(year - 1, 12, 1) if month == 1 else date(year, month - 1, 1)
+        last = (date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)) - timedelta(days=1)
+        frame = await analytics.load_frame(db, current_user.user_id, first, last)
+        
+        return {
+            "month": month,
+            "year": year,
+            "categories": analytics.category_deltas(frame, year, month)
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing category deltas: {str(e)}")
+
+@router.get("/recurring")
+async def get_recurring_payments(
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Payments that repeat on a weekly, monthly, quarterly or yearly cadence"""
+    try:
+        last = datetime.utcnow().date()
+        first = last - timedelta(days=analytics.RECURRING_LOOKBACK_DAYS)
+        frame = await analytics.load_frame(db, current_user.user_id, first, last)
+        
+        return {"recurring": analytics.recurring_payments(frame)}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error detecting recurring payments: {str(e)}")
+
+@router.get("/projection")
+async def get_month_projection(
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Projected end-of-month spending, overall and against each budget"""
+    try:
+        today = datetime.utcnow().date()
+        
+        # Enough history to know which of this month's payments are recurring
+        frame = await analytics.load_frame(
+            db, current_user.user_id, today - timedelta(days=analytics.RECURRING_LOOKBACK_DAYS), today
+        )
+        recurring = analytics.recurring_payments(frame)
+        
+        budget_cursor = db.budgets.find({"user_id": current_user.user_id}, {"_id": 0, "category": 1, "amount": 1})
+        budgets = {budget["category"]: budget["amount"] async for budget in budget_cursor}
+        
+        return analytics.month_projection(frame, today, budgets, recurring)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error projecting monthly spending: {str(e)}")
@@ -2,42 +2,37 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import HTTPBearer
 from typing import Optional
 from datetime import timedelta, datetime
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
-from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from models.user import (
     User, UserCreate, UserLogin, UserResponse, Token, 
-    TravelModeUpdate, PasswordUpdate, PanicCredentials
+    TravelModeUpdate, PasswordUpdate, PanicCredentials, ResolvedUser,
+    RefreshTokenRequest
 )
 from auth.security import (
-    verify_password, get_password_hash, create_access_token, 
+    verify_password_async, get_password_hash_async, create_access_token, 
     validate_password_strength, ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from auth.dependencies import get_current_active_user, TokenData
-
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
+from auth.dependencies import get_current_active_user, get_resolved_user, load_auth_user, TokenData
+from auth.user_cache import user_cache
+from auth.travel_mode import travel_mode_indicator
+from auth.refresh_tokens import (
+    issue_refresh_token, consume_refresh_token, revoke_refresh_token,
+    revoke_user_refresh_tokens
+)
+from database import get_db
 
 router = APIRouter()
 security = HTTPBearer()
 
-# Database connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 @router.post("/register", response_model=Token)
-async def register(user_data: UserCreate):
+async def register(
+    user_data: UserCreate,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """Register a new user"""
     # Check if travel mode is enabled globally (blocks registration)
-    travel_mode_users = await db.users.find_one({
-        "settings.travel_mode.travel_mode_enabled": True
-    })
-    
-    if travel_mode_users:
+    if await travel_mode_indicator.is_enabled(db):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Not Found"
@@ -72,7 +67,7 @@ async def register(user_data: UserCreate):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     user = User(
         username=user_data.username,
         email=user_data.email,
@@ -95,15 +90,20 @@ async def register(user_data: UserCreate):
         },
         expires_delta=access_token_expires
     )
+    refresh_token = await issue_refresh_token(db, user.id, False)
     
     return Token(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse(**user_dict)
+        user=UserResponse(**user_dict),
+        refresh_token=refresh_token
     )
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin):
+async def login(
+    user_credentials: UserLogin,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """Login with normal credentials"""
     # Find user by username
     user = await db.users.find_one({"username": user_credentials.username})
@@ -116,7 +116,7 @@ async def login(user_credentials: UserLogin):
         )
     
     # Verify password
-    if not verify_password(user_credentials.password, user["password_hash"]):
+    if not await verify_password_async(user_credentials.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -149,15 +149,20 @@ async def login(user_credentials: UserLogin):
         },
         expires_delta=access_token_expires
     )
+    refresh_token = await issue_refresh_token(db, user["id"], False)
     
     return Token(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse(**user)
+        user=UserResponse(**user),
+        refresh_token=refresh_token
     )
 
 @router.post("/panic-login", response_model=Token)
-async def panic_login(user_credentials: UserLogin):
+async def panic_login(
+    user_credentials: UserLogin,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """Login with panic credentials"""
     # Find user by panic username
     user = await db.users.find_one({
@@ -181,7 +186,7 @@ async def panic_login(user_credentials: UserLogin):
         )
     
     # Verify panic password
-    if not verify_password(user_credentials.password, panic_password_hash):
+    if not await verify_password_async(user_credentials.password, panic_password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect credentials",
@@ -206,32 +211,91 @@ async def panic_login(user_credentials: UserLogin):
         },
         expires_delta=access_token_expires
     )
+    refresh_token = await issue_refresh_token(db, user["id"], True)
     
     return Token(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse(**user)
+        user=UserResponse(**user),
+        refresh_token=refresh_token
     )
 
-@router.get("/me", response_model=UserResponse)
-async def get_me(current_user: TokenData = Depends(get_current_active_user)):
-    """Get current user information"""
-    user = await db.users.find_one({"id": current_user.user_id})
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    refresh_request: RefreshTokenRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Exchange a refresh token for a new access token and refresh token"""
+    # Consume the refresh token (rotation: each one can be used once)
+    record = await consume_refresh_token(db, refresh_request.refresh_token)
     
-    if not user:
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user = await load_auth_user(db, record["user_id"])
+    
+    if not user or not user.get("is_active", True):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Normal sessions can't be refreshed while travel mode is on, same as login
+    travel_mode_enabled = user.get("settings", {}).get("travel_mode", {}).get("travel_mode_enabled", False)
+    if travel_mode_enabled and not record["is_panic_mode"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+            detail="Not Found"
         )
     
-    return UserResponse(**user)
+    # Create access token
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={
+            "sub": user["username"],
+            "user_id": user["id"],
+            "is_panic_mode": record["is_panic_mode"]
+        },
+        expires_delta=access_token_expires
+    )
+    refresh_token = await issue_refresh_token(
+        db, user["id"], record["is_panic_mode"], family_id=record["family_id"]
+    )
+    
+    return Token(
+        access_token=access_token,
+        token_type="bearer",
+        user=UserResponse(**user),
+        refresh_token=refresh_token
+    )
+
+@router.post("/logout", response_model=dict)
+async def logout(
+    refresh_request: RefreshTokenRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Revoke a refresh token"""
+    await revoke_refresh_token(db, refresh_request.refresh_token)
+    return {"message": "Logged out successfully"}
+
+@router.get("/me", response_model=UserResponse)
+async def get_me(resolved: ResolvedUser = Depends(get_resolved_user)):
+    """Get current user information"""
+    return UserResponse(**resolved.user)
 
 @router.post("/travel-mode", response_model=dict)
 async def update_travel_mode(
     travel_settings: TravelModeUpdate,
-    current_user: TokenData = Depends(get_current_active_user)
+    resolved: ResolvedUser = Depends(get_resolved_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Update travel mode settings"""
+    current_user = resolved.token_data
     update_data = {
         "settings.travel_mode.travel_mode_enabled": travel_settings.travel_mode_enabled,
         "settings.travel_mode.hide_stats": travel_settings.hide_stats,
@@ -248,21 +312,22 @@ async def update_travel_mode(
             )
         
         # Check if panic username is different from normal username
-        user = await db.users.find_one({"id": current_user.user_id})
-        if user and user["username"] == travel_settings.panic_username:
+        if resolved.user["username"] == travel_settings.panic_username:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Panic username must be different from normal username"
             )
         
         update_data["settings.travel_mode.panic_username"] = travel_settings.panic_username
-        update_data["settings.travel_mode.panic_password_hash"] = get_password_hash(travel_settings.panic_password)
+        update_data["settings.travel_mode.panic_password_hash"] = await get_password_hash_async(travel_settings.panic_password)
     
     # Update user settings
     result = await db.users.update_one(
         {"id": current_user.user_id},
         {"$set": update_data}
     )
+    user_cache.invalidate(current_user.user_id)
+    travel_mode_indicator.invalidate()
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -273,7 +338,10 @@ async def update_travel_mode(
     return {"message": "Travel mode settings updated successfully"}
 
 @router.delete("/delete-account")
-async def delete_account(current_user: TokenData = Depends(get_current_active_user)):
+async def delete_account(
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """Delete user account and all associated data"""
     try:
         # Get all collections that contain user data
@@ -284,7 +352,13 @@ async def delete_account(current_user: TokenData = Depends(get_current_active_us
         # Delete all user data
         await transactions_collection.delete_many({"user_id": current_user.user_id})
         await budgets_collection.delete_many({"user_id": current_user.user_id})
+        await db.monthly_rollups.delete_many({"user_id": current_user.user_id})
+        await db.data_versions.delete_one({"_id": current_user.user_id})
+        await db.sync_tombstones.delete_many({"user_id": current_user.user_id})
+        await db.refresh_tokens.delete_many({"user_id": current_user.user_id})
         await users_collection.delete_one({"id": current_user.user_id})
+        user_cache.invalidate(current_user.user_id)
+        travel_mode_indicator.invalidate()
         
         return {"message": "Account deleted successfully"}
         
@@ -294,9 +368,11 @@ async def delete_account(current_user: TokenData = Depends(get_current_active_us
 @router.post("/change-password", response_model=dict)
 async def change_password(
     password_data: PasswordUpdate,
-    current_user: TokenData = Depends(get_current_active_user)
+    resolved: ResolvedUser = Depends(get_resolved_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Change user password"""
+    current_user = resolved.token_data
     # Validate password confirmation
     if password_data.new_password != password_data.confirm_new_password:
         raise HTTPException(
@@ -311,8 +387,8 @@ async def change_password(
             detail="New password must be at least 6 characters and contain both letters and numbers"
         )
     
-    # Get current user
-    user = await db.users.find_one({"id": current_user.user_id})
+    # Password hashes are not part of the resolved user, fetch it separately
+    user = await db.users.find_one({"id": current_user.user_id}, {"_id": 0, "password_hash": 1})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -320,14 +396,14 @@ async def change_password(
         )
     
     # Verify current password
-    if not verify_password(password_data.current_password, user["password_hash"]):
+    if not await verify_password_async(password_data.current_password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Current password is incorrect"
         )
     
     # Update password
-    new_password_hash = get_password_hash(password_data.new_password)
+    new_password_hash = await get_password_hash_async(password_data.new_password)
     result = await db.users.update_one(
         {"id": current_user.user_id},
         {
@@ -337,6 +413,7 @@ async def change_password(
             }
         }
     )
+    user_cache.invalidate(current_user.user_id)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -344,4 +421,9 @@ async def change_password(
             detail="Failed to update password"
         )
     
-    return {"message": "Password updated successfully"}
\ No newline at end of file
+    # Revoke every refresh token, this session's included, then give this
+    # session a fresh one so only the other sessions are signed out
+    await revoke_user_refresh_tokens(db, current_user.user_id)
+    refresh_token = await issue_refresh_token(db, current_user.user_id, current_user.is_panic_mode)
+    
+    return {"message": "Password updated successfully", "refresh_token": refresh_token}
\ No newline at end of file
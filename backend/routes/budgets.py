@@ -1,38 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import List, Optional
 from datetime import datetime
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
-from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from models.budget import Budget, BudgetCreate, BudgetUpdate
+from models.budget import Budget, BudgetCreate, BudgetUpdate, BudgetListItem
 from auth.dependencies import get_current_active_user, check_travel_mode, TokenData
+from database import get_db
+from serialization import FastJSONResponse, model_projection, fields_projection, select_fields
+from services.monthly_rollups import get_month_rollups
+from services.summaries import budget_status_summary
+from services.data_versions import data_etag, etag_headers, bump_data_version
+from services.sync import record_deletion
 
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
+# Only the fields of the response model, so list rows can be returned as stored
+BUDGET_PROJECTION = model_projection(Budget)
 
 router = APIRouter()
 
-# Get database connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-collection = db.budgets
-
-@router.get("/budgets", response_model=List[Budget])
+@router.get("/budgets", response_model=List[BudgetListItem], response_class=FastJSONResponse)
 async def get_budgets(
     current_user: TokenData = Depends(get_current_active_user),
-    _: bool = Depends(check_travel_mode)
+    _: bool = Depends(check_travel_mode),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included); all by default"),
+    etag: str = Depends(data_etag),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """Get all budgets"""
+    """Get all budgets, optionally only some of their fields"""
     try:
-        cursor = collection.find({"user_id": current_user.user_id}).sort("category", 1)
+        projection = BUDGET_PROJECTION if fields is None else fields_projection(select_fields(Budget, fields))
+        cursor = db.budgets.find({"user_id": current_user.user_id}, projection).sort("category", 1)
         budgets = await cursor.to_list(length=None)
         
-        return [Budget(**budget) for budget in budgets]
+        # Rows are already in response shape; skip per-row model validation
+        return FastJSONResponse(budgets, headers=etag_headers(etag))
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching budgets: {str(e)}")
 
@@ -40,31 +45,27 @@ async def get_budgets(
 async def create_budget(
     budget: BudgetCreate,
     current_user: TokenData = Depends(get_current_active_user),
-    _: bool = Depends(check_travel_mode)
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Create a new budget"""
     try:
-        # Check if budget for this category already exists
-        existing_budget = await collection.find_one({
-            "category": budget.category,
-            "user_id": current_user.user_id
-        })
-        
-        if existing_budget:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Budget for category '{budget.category}' already exists"
-            )
-        
         # Create budget object
         budget_obj = Budget(**budget.dict())
         budget_dict = budget_obj.dict()
         budget_dict["user_id"] = current_user.user_id
         
-        # Insert into database
-        result = await collection.insert_one(budget_dict)
+        # Insert into database; the unique (user_id, category) index rejects duplicates
+        try:
+            result = await db.budgets.insert_one(budget_dict)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Budget for category '{budget.category}' already exists"
+            )
         
         if result.inserted_id:
+            await bump_data_version(db, current_user.user_id)
             return budget_obj
         else:
             raise HTTPException(status_code=500, detail="Failed to create budget")
@@ -78,11 +79,12 @@ async def create_budget(
 async def get_budget_by_category(
     category: str,
     current_user: TokenData = Depends(get_current_active_user),
-    _: bool = Depends(check_travel_mode)
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get budget by category"""
     try:
-        budget = await collection.find_one({
+        budget = await db.budgets.find_one({
             "category": category,
             "user_id": current_user.user_id
         })
@@ -102,47 +104,50 @@ async def update_budget(
     category: str,
     budget_update: BudgetUpdate,
     current_user: TokenData = Depends(get_current_active_user),
-    _: bool = Depends(check_travel_mode)
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Update or create a budget for a category"""
     try:
-        # Check if budget exists
-        existing_budget = await collection.find_one({
-            "category": category,
-            "user_id": current_user.user_id
-        })
+        update_data = budget_update.dict(exclude_unset=True)
+        now = datetime.utcnow()
+        update_data["updated_at"] = now
+        
+        # Creating a budget needs an amount, updating one doesn't
+        upsert = update_data.get("amount") is not None
+        update = {"$set": update_data}
+        if upsert:
+            new_budget = Budget(category=category, amount=update_data["amount"], created_at=now, updated_at=now)
+            update["$setOnInsert"] = {
+                "id": new_budget.id,
+                "category": category,
+                "user_id": current_user.user_id,
+                "created_at": new_budget.created_at
+            }
         
-        if existing_budget:
-            # Update existing budget
-            update_data = budget_update.dict(exclude_unset=True)
-            update_data["updated_at"] = datetime.utcnow()
-            
-            result = await collection.update_one(
+        # Update or insert, and read back, in a single round-trip
+        try:
+            budget = await db.budgets.find_one_and_update(
                 {"category": category, "user_id": current_user.user_id},
-                {"$set": update_data}
+                update,
+                projection={"_id": 0},
+                upsert=upsert,
+                return_document=ReturnDocument.AFTER
             )
-            
-            if result.modified_count == 1:
-                updated_budget = await collection.find_one({
-                    "category": category,
-                    "user_id": current_user.user_id
-                })
-                return Budget(**updated_budget)
-            else:
-                raise HTTPException(status_code=500, detail="Failed to update budget")
-        else:
-            # Create new budget
-            budget_data = {"category": category, **budget_update.dict(exclude_unset=True)}
-            budget_obj = Budget(**budget_data)
-            budget_dict = budget_obj.dict()
-            budget_dict["user_id"] = current_user.user_id
-            
-            result = await collection.insert_one(budget_dict)
-            
-            if result.inserted_id:
-                return budget_obj
-            else:
-                raise HTTPException(status_code=500, detail="Failed to create budget")
+        except DuplicateKeyError:
+            # A concurrent request created it first; now it's a plain update
+            budget = await db.budgets.find_one_and_update(
+                {"category": category, "user_id": current_user.user_id},
+                {"$set": update_data},
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
+            )
+        
+        if not budget:
+            raise HTTPException(status_code=404, detail="Budget not found")
+        
+        await bump_data_version(db, current_user.user_id)
+        return Budget(**budget)
                 
     except HTTPException:
         raise
@@ -153,16 +158,20 @@ async def update_budget(
 async def delete_budget(
     category: str,
     current_user: TokenData = Depends(get_current_active_user),
-    _: bool = Depends(check_travel_mode)
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Delete a budget"""
     try:
-        result = await collection.delete_one({
-            "category": category,
-            "user_id": current_user.user_id
-        })
-        
-        if result.deleted_count == 1:
+        # The deleted budget's id goes into the sync tombstone
+        deleted = await db.budgets.find_one_and_delete(
+            {"category": category, "user_id": current_user.user_id},
+            projection={"_id": 0, "id": 1}
+        )
+        
+        if deleted:
+            await record_deletion(db, current_user.user_id, "budgets", deleted["id"])
+            await bump_data_version(db, current_user.user_id)
             return {"message": "Budget deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Budget not found")
@@ -177,7 +186,9 @@ async def get_budget_status_summary(
     current_user: TokenData = Depends(get_current_active_user),
     _: bool = Depends(check_travel_mode),
     month: int = None,
-    year: int = None
+    year: int = None,
+    etag: str = Depends(data_etag),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get budget status summary comparing budgets with actual spending"""
     try:
@@ -188,93 +199,13 @@ async def get_budget_status_summary(
             year = year or now.year
         
         # Get all budgets for current user
-        budget_cursor = collection.find({"user_id": current_user.user_id})
+        budget_cursor = db.budgets.find({"user_id": current_user.user_id})
         budgets = await budget_cursor.to_list(length=None)
         
-        # Get spending data from transactions
-        transactions_collection = db.transactions
-        
-        # Build date filter for transactions
-        start_date = f"{year}-{month:02d}-01"
-        if month == 12:
-            end_date = f"{year + 1}-01-01"
-        else:
-            end_date = f"{year}-{month + 1:02d}-01"
-        
-        # Aggregate spending by category for current user
-        spending_pipeline = [
-            {
-                "$match": {
-                    "user_id": current_user.user_id,
-                    "type": "expense",
-                    "date": {
-                        "$gte": start_date,
-                        "$lt": end_date
-                    }
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$category",
-                    "total_spent": {"$sum": "$amount"},
-                    "transaction_count": {"$sum": 1}
-                }
-            }
-        ]
-        
-        spending_cursor = transactions_collection.aggregate(spending_pipeline)
-        spending_results = await spending_cursor.to_list(length=None)
-        
-        # Convert spending results to dictionary
-        spending_by_category = {}
-        for result in spending_results:
-            spending_by_category[result["_id"]] = {
-                "spent": result["total_spent"],
-                "transactions": result["transaction_count"]
-            }
-        
-        # Build budget status summary
-        budget_status = []
-        total_budgeted = 0
-        total_spent = 0
-        
-        for budget in budgets:
-            category = budget["category"]
-            budget_amount = budget["amount"]
-            spent = spending_by_category.get(category, {}).get("spent", 0)
-            
-            total_budgeted += budget_amount
-            total_spent += spent
-            
-            percentage = (spent / budget_amount * 100) if budget_amount > 0 else 0
-            remaining = budget_amount - spent
-            
-            status = "over" if percentage >= 100 else "warning" if percentage >= 80 else "good"
-            
-            budget_status.append({
-                "category": category,
-                "budget_amount": budget_amount,
-                "spent": spent,
-                "remaining": remaining,
-                "percentage": round(percentage, 2),
-                "status": status,
-                "transaction_count": spending_by_category.get(category, {}).get("transactions", 0)
-            })
-        
-        # Sort by percentage (highest first)
-        budget_status.sort(key=lambda x: x["percentage"], reverse=True)
+        # Spending by category from the month's expense rollups
+        spending_results = await get_month_rollups(db, current_user.user_id, year, month, type="expense")
         
-        return {
-            "month": month,
-            "year": year,
-            "summary": {
-                "total_budgeted": total_budgeted,
-                "total_spent": total_spent,
-                "total_remaining": total_budgeted - total_spent,
-                "overall_percentage": round((total_spent / total_budgeted * 100) if total_budgeted > 0 else 0, 2)
-            },
-            "budget_status": budget_status
-        }
+        return budget_status_summary(budgets, spending_results, year, month)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating budget status summary: {str(e)}")
\ No newline at end of file
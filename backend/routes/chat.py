@@ -1,33 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import List, Optional
 from datetime import datetime, timedelta
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
-from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from models.chat import ChatSession, ChatMessage, ChatRequest, ChatResponse, ChatSessionResponse
+from models.chat import ChatSession, ChatMessage, ChatRequest, ChatResponse, ChatSessionResponse, ChatSessionListItem
 from services.openrouter_service import OpenRouterService
 from auth.dependencies import get_current_active_user, TokenData
-
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
+from database import get_db
+from serialization import FastJSONResponse, select_fields
+from services.monthly_rollups import get_month_rollups
 
 router = APIRouter()
 
-# Database connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 # Initialize OpenRouter service
 openrouter_service = OpenRouterService()
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(
     request: ChatRequest,
-    current_user: TokenData = Depends(get_current_active_user)
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Chat with AI assistant using user's financial context"""
     try:
@@ -47,7 +39,7 @@ async def chat_with_ai(
             session = session_dict
         
         # Get user's financial context
-        user_financial_data = await get_user_financial_context(current_user.user_id)
+        user_financial_data = await get_user_financial_context(db, current_user.user_id)
         
         # Prepare conversation history
         conversation_messages = []
@@ -97,32 +89,48 @@ async def chat_with_ai(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
 
-@router.get("/sessions", response_model=List[ChatSessionResponse])
-async def get_chat_sessions(current_user: TokenData = Depends(get_current_active_user)):
-    """Get all chat sessions for the current user"""
+# Session list fields computed on the server instead of read as stored
+SESSION_FIELD_EXPRESSIONS = {
+    "title": {"$ifNull": ["$title", "New Chat"]},
+    "message_count": {"$size": {"$ifNull": ["$messages", []]}},
+}
+
+@router.get("/sessions", response_model=List[ChatSessionListItem], response_class=FastJSONResponse)
+async def get_chat_sessions(
+    current_user: TokenData = Depends(get_current_active_user),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (session_id is always included); all by default"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get the current user's 20 most recent chat sessions.
+
+    The message count is computed in the database, so the messages
+    themselves are never sent to the API.
+    """
     try:
-        sessions = await db.chat_sessions.find(
-            {"user_id": current_user.user_id}
-        ).sort("last_accessed", -1).limit(20).to_list(20)
-        
-        return [
-            ChatSessionResponse(
-                session_id=session["session_id"],
-                title=session.get("title", "New Chat"),
-                created_at=session["created_at"],
-                last_accessed=session["last_accessed"],
-                message_count=len(session.get("messages", []))
-            )
-            for session in sessions
-        ]
-        
+        projection = {"_id": 0}
+        for field in select_fields(ChatSessionResponse, fields, always=("session_id",)):
+            projection[field] = SESSION_FIELD_EXPRESSIONS.get(field, 1)
+        
+        sessions = await db.chat_sessions.aggregate([
+            {"$match": {"user_id": current_user.user_id}},
+            {"$sort": {"last_accessed": -1}},
+            {"$limit": 20},
+            {"$project": projection}
+        ]).to_list(20)
+        
+        # Rows are already in response shape; skip per-row model validation
+        return FastJSONResponse(sessions)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching sessions: {str(e)}")
 
 @router.get("/sessions/{session_id}/messages")
 async def get_chat_history(
     session_id: str,
-    current_user: TokenData = Depends(get_current_active_user)
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get chat history for a specific session"""
     try:
@@ -146,7 +154,8 @@ async def get_chat_history(
 @router.delete("/sessions/{session_id}")
 async def delete_chat_session(
     session_id: str,
-    current_user: TokenData = Depends(get_current_active_user)
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Delete a chat session"""
     try:
@@ -163,7 +172,7 @@ async def delete_chat_session(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting session: {str(e)}")
 
-async def get_user_financial_context(user_id: str) -> dict:
+async def get_user_financial_context(db: AsyncIOMotorDatabase, user_id: str) -> dict:
     """Get user's financial data for AI context"""
     try:
         # Get current month's data
@@ -175,21 +184,11 @@ async def get_user_financial_context(user_id: str) -> dict:
             "user_id": user_id
         }).sort("date", -1).limit(10).to_list(10)
         
-        # Calculate monthly totals
-        start_date = f"{current_year}-{current_month:02d}-01"
-        if current_month == 12:
-            end_date = f"{current_year + 1}-01-01"
-        else:
-            end_date = f"{current_year}-{current_month + 1:02d}-01"
-        
-        # Monthly income and expenses
-        monthly_transactions = await db.transactions.find({
-            "user_id": user_id,
-            "date": {"$gte": start_date, "$lt": end_date}
-        }).to_list(None)
+        # Monthly income and expenses from the month's rollups
+        rollups = await get_month_rollups(db, user_id, current_year, current_month)
         
-        monthly_income = sum(t["amount"] for t in monthly_transactions if t["type"] == "income")
-        monthly_expenses = sum(t["amount"] for t in monthly_transactions if t["type"] == "expense")
+        monthly_income = sum(r["total"] for r in rollups if r["type"] == "income")
+        monthly_expenses = sum(r["total"] for r in rollups if r["type"] == "expense")
         
         # Get budgets
         budgets = await db.budgets.find({"user_id": user_id}).to_list(None)
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, Query, Depends
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import asyncio
+import time
+
+from auth.dependencies import get_current_active_user, check_travel_mode, TokenData
+from database import get_db
+from pagination import NEXT_CURSOR_HEADER, KEYSET_SORT, encode_cursor
+from serialization import FastJSONResponse
+from routes.transactions import TRANSACTION_PROJECTION, build_transaction_filter
+from routes.budgets import BUDGET_PROJECTION
+from services.monthly_rollups import get_month_rollups
+from services.summaries import monthly_summary, budget_status_summary
+from services.sync import encode_watermark
+
+router = APIRouter()
+
+async def timed(awaitable):
+    """Await and return (result, elapsed milliseconds)"""
+    start = time.perf_counter()
+    result = await awaitable
+    return result, round((time.perf_counter() - start) * 1000, 2)
+
+@router.get("/dashboard", response_class=FastJSONResponse)
+async def get_dashboard(
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
+    year: int = Query(..., ge=2000, le=2100, description="Year"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum number of transactions to return"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Everything the dashboard shows for a month, in one request.
+
+    The month's transactions (first page; X-Next-Cursor continues on GET
+    /transactions), budgets, monthly summary and budget status. The three
+    queries behind them run concurrently, and both summaries are derived
+    from the same month rollups. `timings_ms` reports each query.
+
+    Not ETagged like the lists: `sync_watermark` is when this response was
+    read, and a 304 would hand the client the watermark of an older one.
+    """
+    started = time.perf_counter()
+    
+    # Taken before reading, like GET /sync without a watermark
+    watermark = encode_watermark(datetime.utcnow())
+    
+    try:
+        (transactions, transactions_ms), (budgets, budgets_ms), (rollups, rollups_ms) = await asyncio.gather(
+            timed(
+                db.transactions.find(build_transaction_filter(current_user.user_id, month=month, year=year), TRANSACTION_PROJECTION)
+                .sort(KEYSET_SORT)
+                .limit(limit + 1)
+                .to_list(length=limit + 1)
+            ),
+            timed(db.budgets.find({"user_id": current_user.user_id}, BUDGET_PROJECTION).sort("category", 1).to_list(length=None)),
+            timed(get_month_rollups(db, current_user.user_id, year, month))
+        )
+        
+        headers = {"Cache-Control": "private, no-store"}
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            last = transactions[-1]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last["created_at"], last["id"])
+        
+        return FastJSONResponse({
+            "month": month,
+            "year": year,
+            "transactions": transactions,
+            "budgets": budgets,
+            "summary": monthly_summary(rollups, year, month),
+            "budget_status": budget_status_summary(budgets, rollups, year, month),
+            "sync_watermark": watermark,
+            "timings_ms": {
+                "transactions": transactions_ms,
+                "budgets": budgets_ms,
+                "rollups": rollups_ms,
+                "total": round((time.perf_counter() - started) * 1000, 2)
+            }
+        }, headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading dashboard: {str(e)}")
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
+from typing import Optional
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import os
+import tempfile
+import uuid
+
+from models.transaction import ImportJob
+from auth.dependencies import get_current_active_user, check_travel_mode, TokenData
+from database import get_db
+from services.statement_import import IMPORT_STALE_SECONDS, PARSERS, fail_stale_import_jobs, start_import_job
+
+router = APIRouter()
+
+# Largest statement accepted, and the chunk size used to spool it to disk
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(200 * 1024 * 1024)))
+IMPORT_UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+@router.post("/transactions/import", response_model=ImportJob, status_code=202)
+async def import_statement(
+    file: UploadFile = File(..., description="CSV or OFX bank statement"),
+    format: Optional[str] = Query(None, description="csv or ofx (defaults to the file extension)"),
+    date_order: Optional[str] = Query(None, pattern="^(dmy|mdy)$", description="dmy or mdy, for CSV dates such as 05/03/2024"),
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Start importing a bank statement; poll the returned job for progress"""
+    file_format = (format or os.path.splitext(file.filename or "")[1].lstrip(".")).lower()
+    if file_format == "qfx":
+        file_format = "ofx"
+    if file_format not in PARSERS:
+        raise HTTPException(status_code=400, detail="Unsupported statement format, use csv or ofx")
+    
+    # Spool the upload to disk in chunks so memory stays flat for any file size
+    fd, path = tempfile.mkstemp(prefix="statement-import-", suffix=f".{file_format}")
+    try:
+        size = 0
+        with os.fdopen(fd, "wb") as spool:
+            while chunk := await file.read(IMPORT_UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > IMPORT_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Statement file is too large")
+                spool.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    
+    now = datetime.utcnow()
+    job = ImportJob(
+        id=str(uuid.uuid4()),
+        status="pending",
+        format=file_format,
+        filename=file.filename,
+        created_at=now,
+        updated_at=now
+    )
+    job_dict = job.dict()
+    job_dict["user_id"] = current_user.user_id
+    await db.import_jobs.insert_one(job_dict)
+    
+    start_import_job(db, job.id, current_user.user_id, path, file_format, date_order)
+    
+    return job
+
+@router.get("/transactions/import/{job_id}", response_model=ImportJob)
+async def get_import_job(
+    job_id: str,
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get the progress of a statement import"""
+    job = await db.import_jobs.find_one({"id": job_id, "user_id": current_user.user_id})
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    
+    # A worker that died mid-import leaves its job unfinished; report it failed
+    stale_before = datetime.utcnow() - timedelta(seconds=IMPORT_STALE_SECONDS)
+    if job["status"] in ("pending", "running") and job["updated_at"] < stale_before:
+        if await fail_stale_import_jobs(db, {"id": job_id}):
+            job = await db.import_jobs.find_one({"id": job_id, "user_id": current_user.user_id})
+    
+    return ImportJob(**job)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from auth.dependencies import get_current_active_user, check_travel_mode, TokenData
+from database import get_db
+from serialization import FastJSONResponse
+from services.sync import changes_since
+
+router = APIRouter()
+
+@router.get("/sync", response_class=FastJSONResponse)
+async def sync_changes(
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    since: Optional[str] = Query(None, description="Watermark returned by the previous sync"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Transactions and budgets created, updated or deleted since a watermark.
+
+    Apply `deleted` first, then upsert `transactions` and `budgets` by id;
+    changes near the watermark can be returned twice. Responds 410 when the
+    watermark is too old or the delta too large, meaning reload everything.
+    """
+    try:
+        return FastJSONResponse(await changes_since(db, current_user.user_id, since))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error syncing changes: {str(e)}")
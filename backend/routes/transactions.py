@@ -1,81 +1,223 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
-from datetime import datetime
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, HTTPException, Query, Depends, Body, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Any, List, Optional
 import os
-from dotenv import load_dotenv
-from pathlib import Path
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 
-from models.transaction import Transaction, TransactionCreate, TransactionUpdate
+from models.transaction import (
+    Transaction, TransactionCreate, TransactionUpdate, TransactionListItem,
+    BulkTransactionResult, BulkTransactionResponse
+)
 from auth.dependencies import get_current_active_user, check_travel_mode, TokenData
+from database import get_db
+from pagination import (
+    NEXT_CURSOR_HEADER, KEYSET_SORT, keyset_filter, encode_cursor,
+    ranked_keyset_filter, encode_ranked_cursor
+)
+from serialization import (
+    FastJSONResponse, ColumnarJSONResponse, model_projection, fields_projection, select_fields,
+    to_columnar, wants_columnar
+)
+from services.bulk_writes import insert_transactions, format_validation_error
+from services.transaction_dates import date_fields, date_range_filter
+from services.transaction_search import (
+    SEARCH_INDEX_HINT, SEARCH_MAX_QUERY_TERMS, SEARCH_TRUNCATED_HEADER,
+    tokenize, search_fields, search_pipeline
+)
+from services.summary_series import build_series, parse_month, month_end
+from services.monthly_rollups import record_transactions, record_transaction_change, get_month_rollups
+from services.summaries import monthly_summary
+from services.data_versions import data_etag, etag_headers, bump_data_version
+from services.sync import record_deletion
+from services.transaction_export import (
+    EXPORT_BATCH_SIZE, EXPORT_PROJECTION, EXPORT_MEDIA_TYPES, EXPORT_WRITERS
+)
+
+# Largest number of transactions accepted by one bulk request
+BULK_MAX_TRANSACTIONS = int(os.getenv("BULK_MAX_TRANSACTIONS", "10000"))
 
-# Load environment variables
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
+# Only the fields of the response model, so list rows can be returned as stored
+TRANSACTION_PROJECTION = model_projection(Transaction)
+
+# Columnar list format: one array per field, repeated strings dictionary-encoded
+TRANSACTION_COLUMNS = list(Transaction.model_fields)
+TRANSACTION_DICTIONARY_COLUMNS = ("type", "category")
 
 router = APIRouter()
 
-# Get database connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-collection = db.transactions
+def build_transaction_filter(
+    user_id: str,
+    type: Optional[str] = None,
+    category: Optional[str] = None,
+    month: Optional[int] = None,
+    year: Optional[int] = None
+) -> dict:
+    """Build the MongoDB filter for the transaction list filters"""
+    filter_query = {"user_id": user_id}
+    
+    if type and type in ["income", "expense"]:
+        filter_query["type"] = type
+        
+    if category:
+        filter_query["category"] = category
+        
+    # Date filtering on the native date_key (see services.transaction_dates);
+    # kept under $and so it can't collide with the keyset cursor's $or
+    if year:
+        filter_query["$and"] = [date_range_filter(year, month)]
+    
+    return filter_query
 
-@router.get("/transactions", response_model=List[Transaction])
+@router.get("/transactions", response_model=List[TransactionListItem], response_class=FastJSONResponse)
 async def get_transactions(
+    request: Request,
     current_user: TokenData = Depends(get_current_active_user),
     _: bool = Depends(check_travel_mode),
     type: Optional[str] = Query(None, description="Filter by type: income or expense"),
     category: Optional[str] = Query(None, description="Filter by category"),
-    month: Optional[int] = Query(None, description="Filter by month (1-12)"),
-    year: Optional[int] = Query(None, description="Filter by year"),
-    limit: int = Query(100, le=1000, description="Maximum number of transactions to return")
+    month: Optional[int] = Query(None, ge=1, le=12, description="Filter by month (1-12)"),
+    year: Optional[int] = Query(None, ge=2000, le=2100, description="Filter by year"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of transactions to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included); all by default"),
+    etag: str = Depends(data_etag),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """Get transactions with optional filters"""
+    """Get transactions with optional filters, newest first.
+
+    Pages are keyset-paginated on (created_at, id): when more results exist
+    the X-Next-Cursor response header holds the cursor for the next page.
+    Responses carry the user's data ETag; If-None-Match with it returns 304.
+    Sending `Accept: application/vnd.budgio.columnar+json` returns the page
+    as parallel arrays per field instead (see serialization.to_columnar).
+    With `fields`, only those columns are read from MongoDB and returned.
+    """
     try:
-        # Build filter query - include user_id
-        filter_query = {"user_id": current_user.user_id}
+        columns = select_fields(Transaction, fields)
+        # created_at is read regardless, for the next page's cursor
+        projection = TRANSACTION_PROJECTION if fields is None else fields_projection([*columns, "created_at"])
         
-        if type and type in ["income", "expense"]:
-            filter_query["type"] = type
-            
-        if category:
-            filter_query["category"] = category
-            
-        # Date filtering
-        if month and year:
-            # Filter by specific month and year
-            start_date = f"{year}-{month:02d}-01"
-            if month == 12:
-                end_date = f"{year + 1}-01-01"
-            else:
-                end_date = f"{year}-{month + 1:02d}-01"
-            
-            filter_query["date"] = {
-                "$gte": start_date,
-                "$lt": end_date
-            }
-        elif year:
-            # Filter by year only
-            filter_query["date"] = {
-                "$gte": f"{year}-01-01",
-                "$lt": f"{year + 1}-01-01"
-            }
+        filter_query = build_transaction_filter(current_user.user_id, type, category, month, year)
         
-        # Get transactions from database
-        cursor = collection.find(filter_query).sort("created_at", -1).limit(limit)
-        transactions = await cursor.to_list(length=limit)
+        # Continue after the previous page
+        filter_query.update(keyset_filter(cursor))
         
-        return [Transaction(**transaction) for transaction in transactions]
+        # Get transactions from database, one extra to know if another page exists
+        db_cursor = (
+            db.transactions.find(filter_query, projection)
+            .sort(KEYSET_SORT)
+            .limit(limit + 1)
+        )
+        transactions = await db_cursor.to_list(length=limit + 1)
         
+        headers = {**etag_headers(etag), "Vary": "Accept"}
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            last = transactions[-1]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last["created_at"], last["id"])
+        
+        if "created_at" not in columns:
+            for transaction in transactions:
+                transaction.pop("created_at", None)
+        
+        if wants_columnar(request):
+            return ColumnarJSONResponse(
+                to_columnar(
+                    transactions, columns,
+                    [column for column in TRANSACTION_DICTIONARY_COLUMNS if column in columns]
+                ),
+                headers=headers
+            )
+        
+        # Rows are already in response shape; skip per-row model validation
+        return FastJSONResponse(transactions, headers=headers)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching transactions: {str(e)}")
 
+@router.get("/transactions/export")
+async def export_transactions(
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format: ndjson or csv"),
+    type: Optional[str] = Query(None, description="Filter by type: income or expense"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Filter by month (1-12)"),
+    year: Optional[int] = Query(None, ge=2000, le=2100, description="Filter by year"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Stream every matching transaction, newest first, at constant memory"""
+    filter_query = build_transaction_filter(current_user.user_id, type, category, month, year)
+    cursor = (
+        db.transactions.find(filter_query, EXPORT_PROJECTION)
+        .sort(KEYSET_SORT)
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+    
+    return StreamingResponse(
+        EXPORT_WRITERS[format](cursor),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'}
+    )
+
+@router.get("/transactions/search", response_model=List[Transaction], response_class=FastJSONResponse)
+async def search_transactions(
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for; each matches the start of a word"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of transactions to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Search descriptions and categories, best matches first, then newest first.
+
+    Every word in `q` must match the start of a word in the description or
+    category, so partial input works for typeahead. Pages are
+    keyset-paginated like GET /transactions via the X-Next-Cursor header.
+    Only the newest SEARCH_MAX_CANDIDATES matches are ranked; when a query
+    matches more, every page carries X-Search-Truncated: true and older
+    matches are not returned, so the client should ask for more words.
+    """
+    try:
+        terms = tokenize(q)[:SEARCH_MAX_QUERY_TERMS]
+        if not terms:
+            return FastJSONResponse([])
+        
+        pipeline = search_pipeline(
+            current_user.user_id, terms, ranked_keyset_filter(cursor), limit + 1, TRANSACTION_PROJECTION
+        )
+        [result] = await db.transactions.aggregate(pipeline, hint=SEARCH_INDEX_HINT).to_list(length=1)
+        transactions = result["matches"]
+        
+        headers = {}
+        if result["truncated"]:
+            headers[SEARCH_TRUNCATED_HEADER] = "true"
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            last = transactions[-1]
+            headers[NEXT_CURSOR_HEADER] = encode_ranked_cursor(last["score"], last["created_at"], last["id"])
+        
+        for transaction in transactions:
+            transaction.pop("score", None)
+        
+        return FastJSONResponse(transactions, headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching transactions: {str(e)}")
+
 @router.post("/transactions", response_model=Transaction)
 async def create_transaction(
     transaction: TransactionCreate,
     current_user: TokenData = Depends(get_current_active_user),
-    _: bool = Depends(check_travel_mode)
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Create a new transaction"""
     try:
@@ -83,11 +225,15 @@ async def create_transaction(
         transaction_obj = Transaction(**transaction.dict())
         transaction_dict = transaction_obj.dict()
         transaction_dict["user_id"] = current_user.user_id
+        transaction_dict.update(date_fields(transaction_dict["date"]))
+        transaction_dict.update(search_fields(transaction_dict["description"], transaction_dict["category"]))
         
         # Insert into database
-        result = await collection.insert_one(transaction_dict)
+        result = await db.transactions.insert_one(transaction_dict)
         
         if result.inserted_id:
+            await record_transactions(db, current_user.user_id, [transaction_dict])
+            await bump_data_version(db, current_user.user_id)
             return transaction_obj
         else:
             raise HTTPException(status_code=500, detail="Failed to create transaction")
@@ -95,15 +241,64 @@ async def create_transaction(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating transaction: {str(e)}")
 
+@router.post("/transactions/bulk", response_model=BulkTransactionResponse)
+async def create_transactions_bulk(
+    items: List[Any] = Body(..., description="Transactions to create"),
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Create many transactions at once, reporting success or errors per item"""
+    if len(items) > BULK_MAX_TRANSACTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BULK_MAX_TRANSACTIONS} transactions per request"
+        )
+    
+    try:
+        # Validate everything up front, keeping invalid items out of the write
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, TransactionCreate(**item)))
+            except ValidationError as e:
+                results[index] = BulkTransactionResult(index=index, success=False, error=format_validation_error(e))
+            except TypeError:
+                results[index] = BulkTransactionResult(index=index, success=False, error="Item must be an object")
+        
+        # Write in unordered chunks
+        inserted, write_errors = await insert_transactions(db, current_user.user_id, valid)
+        
+        inserted_iter = iter(inserted)
+        for index, _transaction in valid:
+            if index in write_errors:
+                results[index] = BulkTransactionResult(index=index, success=False, error=write_errors[index])
+            else:
+                results[index] = BulkTransactionResult(index=index, success=True, id=next(inserted_iter).id)
+        
+        inserted_count = len(inserted)
+        return BulkTransactionResponse(
+            inserted=inserted_count,
+            failed=len(items) - inserted_count,
+            results=results
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating transactions: {str(e)}")
+
 @router.get("/transactions/{transaction_id}", response_model=Transaction)
 async def get_transaction(
     transaction_id: str,
     current_user: TokenData = Depends(get_current_active_user),
-    _: bool = Depends(check_travel_mode)
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get a specific transaction by ID"""
     try:
-        transaction = await collection.find_one({
+        transaction = await db.transactions.find_one({
             "id": transaction_id,
             "user_id": current_user.user_id
         })
@@ -121,38 +316,57 @@ async def update_transaction(
     transaction_id: str,
     transaction_update: TransactionUpdate,
     current_user: TokenData = Depends(get_current_active_user),
-    _: bool = Depends(check_travel_mode)
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Update a transaction"""
     try:
-        # Get existing transaction
-        existing_transaction = await collection.find_one({
-            "id": transaction_id,
-            "user_id": current_user.user_id
-        })
-        
-        if not existing_transaction:
-            raise HTTPException(status_code=404, detail="Transaction not found")
-        
         # Update only provided fields
         update_data = transaction_update.dict(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
+        if "date" in update_data:
+            update_data.update(date_fields(update_data["date"]))
+        if "description" in update_data and "category" in update_data:
+            update_data.update(search_fields(update_data["description"], update_data["category"]))
+        searchable = [field for field in ("description", "category") if field in update_data]
+        other = None
+        if len(searchable) == 1:
+            other = "category" if searchable == ["description"] else "description"
         
-        # Update in database
-        result = await collection.update_one(
-            {"id": transaction_id, "user_id": current_user.user_id},
-            {"$set": update_data}
-        )
+        query = {"id": transaction_id, "user_id": current_user.user_id}
+        while True:
+            update, guard = update_data, {}
+            if other:
+                # One searchable field alone: the terms need the other from the stored
+                # document, and are written only while it still holds that value
+                stored = await db.transactions.find_one(query, projection={"_id": 0, other: 1})
+                if not stored:
+                    raise HTTPException(status_code=404, detail="Transaction not found")
+                guard = {other: stored.get(other)}
+                merged = {**guard, **update_data}
+                update = {**update_data, **search_fields(merged["description"], merged["category"])}
+            
+            # Update and read back in a single round-trip; the previous version
+            # tells the rollups where the amount moved from
+            previous = await db.transactions.find_one_and_update(
+                {**query, **guard},
+                {"$set": update},
+                projection={"_id": 0},
+                return_document=ReturnDocument.BEFORE
+            )
+            # A miss on a guarded write means the other field changed since the read: read again
+            if previous or not other:
+                break
         
-        if result.modified_count == 1:
-            # Return updated transaction
-            updated_transaction = await collection.find_one({
-                "id": transaction_id,
-                "user_id": current_user.user_id
-            })
-            return Transaction(**updated_transaction)
-        else:
-            raise HTTPException(status_code=500, detail="Failed to update transaction")
+        if not previous:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        
+        updated_transaction = {**previous, **update}
+        if any(field in update_data for field in ("amount", "date", "type", "category")):
+            await record_transaction_change(db, current_user.user_id, previous, updated_transaction)
+        await bump_data_version(db, current_user.user_id)
+        
+        return Transaction(**updated_transaction)
             
     except HTTPException:
         raise
@@ -163,16 +377,20 @@ async def update_transaction(
 async def delete_transaction(
     transaction_id: str,
     current_user: TokenData = Depends(get_current_active_user),
-    _: bool = Depends(check_travel_mode)
+    _: bool = Depends(check_travel_mode),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Delete a transaction"""
     try:
-        result = await collection.delete_one({
-            "id": transaction_id,
-            "user_id": current_user.user_id
-        })
+        deleted = await db.transactions.find_one_and_delete(
+            {"id": transaction_id, "user_id": current_user.user_id},
+            projection={"_id": 0, "date": 1, "date_key": 1, "year_month": 1, "type": 1, "category": 1, "amount": 1}
+        )
         
-        if result.deleted_count == 1:
+        if deleted:
+            await record_transactions(db, current_user.user_id, [deleted], sign=-1)
+            await record_deletion(db, current_user.user_id, "transactions", transaction_id)
+            await bump_data_version(db, current_user.user_id)
             return {"message": "Transaction deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Transaction not found")
@@ -187,71 +405,47 @@ async def get_monthly_summary(
     current_user: TokenData = Depends(get_current_active_user),
     _: bool = Depends(check_travel_mode),
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
-    year: int = Query(..., ge=2000, le=2100, description="Year")
+    year: int = Query(..., ge=2000, le=2100, description="Year"),
+    etag: str = Depends(data_etag),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get monthly summary of income and expenses"""
     try:
-        # Build date filter
-        start_date = f"{year}-{month:02d}-01"
-        if month == 12:
-            end_date = f"{year + 1}-01-01"
-        else:
-            end_date = f"{year}-{month + 1:02d}-01"
+        # A handful of pre-aggregated documents instead of the month's transactions
+        results = await get_month_rollups(db, current_user.user_id, year, month)
         
-        # Aggregate transactions for current user
-        pipeline = [
-            {
-                "$match": {
-                    "user_id": current_user.user_id,
-                    "date": {
-                        "$gte": start_date,
-                        "$lt": end_date
-                    }
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "type": "$type",
-                        "category": "$category"
-                    },
-                    "total": {"$sum": "$amount"},
-                    "count": {"$sum": 1}
-                }
-            }
-        ]
+        return monthly_summary(results, year, month)
         
-        cursor = collection.aggregate(pipeline)
-        results = await cursor.to_list(length=None)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating monthly summary: {str(e)}")
+
+@router.get("/transactions/summary/series")
+async def get_summary_series(
+    current_user: TokenData = Depends(get_current_active_user),
+    _: bool = Depends(check_travel_mode),
+    from_month: str = Query(..., alias="from", pattern=r"^\d{4}-\d{2}$", description="First month (YYYY-MM)"),
+    to_month: str = Query(..., alias="to", pattern=r"^\d{4}-\d{2}$", description="Last month (YYYY-MM), inclusive"),
+    granularity: str = Query("month", pattern="^(month|week|day)$", description="Period: month, week or day"),
+    etag: str = Depends(data_etag),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Income and expense totals per period over a range of months, empty periods included"""
+    first = parse_month(from_month, "from")
+    last = month_end(parse_month(to_month, "to"))
+    if first > last:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    
+    try:
+        series = await build_series(db, current_user.user_id, first, last, granularity)
         
-        # Process results
-        summary = {
-            "month": month,
-            "year": year,
-            "total_income": 0,
-            "total_expenses": 0,
-            "net_balance": 0,
-            "categories": {}
+        return {
+            "from": from_month,
+            "to": to_month,
+            "granularity": granularity,
+            "series": series
         }
         
-        for result in results:
-            type_name = result["_id"]["type"]
-            category = result["_id"]["category"]
-            total = result["total"]
-            
-            if type_name == "income":
-                summary["total_income"] += total
-            else:
-                summary["total_expenses"] += total
-            
-            if category not in summary["categories"]:
-                summary["categories"][category] = {"income": 0, "expense": 0}
-            
-            summary["categories"][category][type_name] = total
-        
-        summary["net_balance"] = summary["total_income"] - summary["total_expenses"]
-        
-        return summary
-        
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating monthly summary: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating summary series: {str(e)}")
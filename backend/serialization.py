@@ -0,0 +1,106 @@
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# pydantic-core serializer used when orjson isn't installed
+_json_adapter = TypeAdapter(Any)
+
+# Opt-in list format with one array per field, requested through Accept
+COLUMNAR_MEDIA_TYPE = "application/vnd.budgio.columnar+json"
+
+
+def fields_projection(fields: Iterable[str]) -> dict:
+    """MongoDB projection returning exactly the given fields"""
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+
+def model_projection(model: Type[BaseModel]) -> dict:
+    """MongoDB projection returning exactly the fields of a response model"""
+    return fields_projection(model.model_fields)
+
+
+def select_fields(model: Type[BaseModel], fields: Optional[str], always: Iterable[str] = ("id",)) -> List[str]:
+    """Response fields for a comma-separated `fields` query parameter, in model order.
+
+    Every name must be a field of the response model; `always` (the row's
+    identity) is added to any selection. No `fields` means all of them.
+    """
+    allowed = list(model.model_fields)
+    if not fields:
+        return allowed
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = sorted(requested - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    requested.update(always)
+    return [field for field in allowed if field in requested]
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for documents that are already in response shape.
+
+    Handlers returning this skip per-row model construction and FastAPI's
+    response_model validation; the projection is what guarantees the shape.
+    Datetimes are rendered as ISO 8601, the same as the pydantic models.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return _json_adapter.dump_json(content)
+
+
+class ColumnarJSONResponse(FastJSONResponse):
+    media_type = COLUMNAR_MEDIA_TYPE
+
+
+def header_quality(header: str, token: str, wildcard: bool = False) -> float:
+    """q-value an Accept-style header gives token; 0 when it isn't listed.
+
+    With `wildcard`, a `*` entry counts for tokens not listed explicitly.
+    """
+    qualities = {}
+    for entry in header.split(","):
+        name, *parameters = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+    if token in qualities:
+        return qualities[token]
+    return qualities.get("*", 0.0) if wildcard else 0.0
+
+
+def wants_columnar(request: Request) -> bool:
+    """Whether the Accept header explicitly asks for the columnar format"""
+    return header_quality(request.headers.get("accept", ""), COLUMNAR_MEDIA_TYPE) > 0
+
+
+def to_columnar(rows: List[dict], fields: Iterable[str], dictionary_fields: Iterable[str] = ()) -> Dict[str, Any]:
+    """Parallel arrays per field instead of one object per row.
+
+    Each of `dictionary_fields` is sent as integer codes into a list of its
+    distinct values, so repeated strings such as categories go out once:
+    row i's category is `dictionaries["category"][columns["category"][i]]`.
+    """
+    columns = {field: [row.get(field) for row in rows] for field in fields}
+    dictionaries = {}
+    for field in dictionary_fields:
+        codes: Dict[Any, int] = {}
+        columns[field] = [codes.setdefault(value, len(codes)) for value in columns[field]]
+        dictionaries[field] = list(codes)
+    return {"count": len(rows), "columns": columns, "dictionaries": dictionaries}
@@ -2,29 +2,116 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from contextlib import asynccontextmanager
 import logging
 from pathlib import Path
+from typing import Optional
+import hmac
+import time
+
+import database
+from compression import CompressionMiddleware
+from indexes import ensure_indexes
+from pagination import NEXT_CURSOR_HEADER
+from database import get_db
+from auth.user_cache import user_cache
+from auth.token_cache import token_cache
+from auth.password_pool import password_pool
+from services.statement_import import cancel_import_jobs, fail_stale_import_jobs
+from services.monthly_rollups import mark_rollups_ready_if_empty, rollups_ready
+from services.transaction_search import SEARCH_TRUNCATED_HEADER
 
 # Import routes
 from routes.transactions import router as transactions_router
 from routes.budgets import router as budgets_router
 from routes.auth import router as auth_router
 from routes.chat import router as chat_router
+from routes.imports import router as imports_router
+from routes.analytics import router as analytics_router
+from routes.sync import router as sync_router
+from routes.dashboard import router as dashboard_router
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# The /health/* statistics expose process internals; they are only served to
+# requests sending this value in X-Stats-Token, and not at all while it's unset
+HEALTH_STATS_TOKEN = os.getenv("HEALTH_STATS_TOKEN", "")
+
+# Workers can leave index creation to `python manage.py migrate` and start serving straight away
+INDEX_BOOTSTRAP_ON_STARTUP = os.getenv("INDEX_BOOTSTRAP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+async def create_indexes(db):
+    """Create any registered database indexes that are missing"""
+    try:
+        created = await ensure_indexes(db)
+        if created:
+            logger.info(f"Database indexes created: {created}")
+        else:
+            logger.info("Database indexes already up to date")
+    except Exception as e:
+        logger.error(f"Error creating database indexes: {e}")
+
+async def fail_interrupted_imports(db):
+    """Fail the imports a previous process left unfinished"""
+    try:
+        failed = await fail_stale_import_jobs(db)
+        if failed:
+            logger.warning(f"Marked {failed} interrupted import job(s) as failed")
+    except Exception as e:
+        logger.error(f"Error failing interrupted import jobs: {e}")
+
+async def check_rollups(db):
+    """Mark an empty database's rollups built; otherwise warn until rebuild-rollups has run"""
+    try:
+        await mark_rollups_ready_if_empty(db)
+        if not await rollups_ready(db):
+            logger.warning(
+                "Monthly rollups not built yet; summaries aggregate transactions until "
+                "`python manage.py rebuild-rollups` finishes"
+            )
+    except Exception as e:
+        logger.error(f"Error checking monthly rollups: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared MongoDB client on startup and close it on shutdown"""
+    started = time.perf_counter()
+    app.state.db = database.connect()
+    connected = time.perf_counter()
+    
+    if INDEX_BOOTSTRAP_ON_STARTUP:
+        await create_indexes(app.state.db)
+    indexed = time.perf_counter()
+    await fail_interrupted_imports(app.state.db)
+    await check_rollups(app.state.db)
+    
+    logger.info(
+        f"Startup finished in {(indexed - started) * 1000:.1f} ms "
+        f"(connect {(connected - started) * 1000:.1f} ms, "
+        f"indexes {(indexed - connected) * 1000:.1f} ms"
+        f"{'' if INDEX_BOOTSTRAP_ON_STARTUP else ', skipped'})"
+    )
+    yield
+    # Imports record their interruption, which needs the client still open
+    await cancel_import_jobs()
+    password_pool.shutdown()
+    database.close()
+    logger.info("Database connection closed")
 
 # Create the main app without a prefix
-app = FastAPI(title="Budget Planner API", version="1.0.0")
+app = FastAPI(title="Budget Planner API", version="1.0.0", lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -35,7 +122,7 @@ async def root():
     return {"message": "Budget Planner API is running!"}
 
 @api_router.get("/health")
-async def health_check():
+async def health_check(db: AsyncIOMotorDatabase = Depends(get_db)):
     """Health check endpoint"""
     try:
         # Test database connection
@@ -52,10 +139,44 @@ async def health_check():
             "error": str(e)
         }
 
+async def require_stats_token(x_stats_token: Optional[str] = Header(None)):
+    """Answer 404 unless the operator's statistics token is sent"""
+    if not HEALTH_STATS_TOKEN or not x_stats_token or not hmac.compare_digest(x_stats_token, HEALTH_STATS_TOKEN):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@api_router.get("/health/db-pool", dependencies=[Depends(require_stats_token)])
+async def db_pool_stats():
+    """MongoDB connection pool statistics for this worker"""
+    return database.get_pool_stats()
+
+@api_router.get("/health/db-commands", dependencies=[Depends(require_stats_token)])
+async def db_command_stats():
+    """Database round-trips issued by this worker, by command name"""
+    return database.get_command_stats()
+
+@api_router.get("/health/user-cache", dependencies=[Depends(require_stats_token)])
+async def user_cache_stats():
+    """Authentication user cache statistics for this worker"""
+    return user_cache.stats()
+
+@api_router.get("/health/token-cache", dependencies=[Depends(require_stats_token)])
+async def token_cache_stats():
+    """Verified JWT cache statistics for this worker"""
+    return token_cache.stats()
+
+@api_router.get("/health/password-hashing", dependencies=[Depends(require_stats_token)])
+async def password_hashing_stats():
+    """Password hashing pool latency and queue statistics for this worker"""
+    return password_pool.stats()
+
 # Include routers
 api_router.include_router(auth_router, tags=["authentication"])
 api_router.include_router(transactions_router, tags=["transactions"])
+api_router.include_router(imports_router, tags=["imports"])
 api_router.include_router(budgets_router, tags=["budgets"])
+api_router.include_router(analytics_router, tags=["analytics"])
+api_router.include_router(sync_router, tags=["sync"])
+api_router.include_router(dashboard_router, tags=["dashboard"])
 api_router.include_router(chat_router, prefix="/chat", tags=["chat"])
 
 # Include the main router in the app
@@ -68,43 +189,8 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SEARCH_TRUNCATED_HEADER, "ETag"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database indexes on startup"""
-    try:
-        # Create indexes for better performance
-        await db.transactions.create_index("date")
-        await db.transactions.create_index("type")
-        await db.transactions.create_index("category")
-        await db.transactions.create_index("user_id")
-        await db.transactions.create_index("created_at")
-        
-        await db.budgets.create_index("category")
-        await db.budgets.create_index("user_id")
-        await db.budgets.create_index([("category", 1), ("user_id", 1)], unique=True)
-        
-        await db.users.create_index("username", unique=True)
-        await db.users.create_index("email", unique=True)
-        await db.users.create_index("id", unique=True)
-        
-        await db.chat_sessions.create_index([("session_id", 1), ("user_id", 1)], unique=True)
-        await db.chat_sessions.create_index([("user_id", 1), ("last_accessed", -1)])
-        
-        logger.info("Database indexes created successfully")
-    except Exception as e:
-        logger.error(f"Error creating database indexes: {e}")
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    """Close database connection on shutdown"""
-    client.close()
-    logger.info("Database connection closed")
\ No newline at end of file
+# Compress large JSON responses (transaction lists, dashboard, sync)
+app.add_middleware(CompressionMiddleware)
@@ -0,0 +1,348 @@
+"""
+Spending analytics computed on columnar arrays.
+
+A user's transactions for the needed date range are loaded once into a
+pandas DataFrame (`load_frame`); every insight is then a handful of
+vectorized numpy/pandas operations (bincount, cumsum, integer-keyed
+groupby) instead of per-row Python loops.
+The compute functions take the frame and plain dates so they can be
+benchmarked without a database (see benchmarks/bench_analytics.py).
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+import calendar
+import os
+
+import numpy as np
+import pandas as pd
+
+from services.transaction_dates import date_key_range_filter
+
+# Documents fetched per getMore when loading a user's history
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "5000"))
+# History scanned for recurring payments
+RECURRING_LOOKBACK_DAYS = int(os.getenv("RECURRING_LOOKBACK_DAYS", "400"))
+
+# Recurring payment cadences: (name, shortest and longest gap in days)
+CADENCES = [("weekly", 6, 8), ("biweekly", 13, 15), ("monthly", 27, 32), ("quarterly", 88, 93), ("yearly", 360, 370)]
+# Cadences that follow the calendar rather than a fixed number of days
+CALENDAR_CADENCES = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
+
+def empty_frame() -> pd.DataFrame:
+    return build_frame([], [], [], [], [])
+
+
+def _parse_days(dates: List[str]) -> np.ndarray:
+    """datetime64 days for ISO date strings, NaT where unparsable; each distinct date is parsed once"""
+    codes, uniques = pd.factorize(pd.Series(dates, dtype="object"))
+    parsed = pd.to_datetime(
+        pd.Series(uniques, dtype="object").str.slice(0, 10), format="%Y-%m-%d", errors="coerce"
+    ).to_numpy()
+    return np.append(parsed, np.datetime64("NaT"))[codes]
+
+
+def build_frame(dates: List[str], types: List[str], categories: List[str], amounts: List[float], descriptions: List[str]) -> pd.DataFrame:
+    """Columnar frame from parallel lists; rows with unparsable dates are dropped.
+
+    type and category are categoricals, so filters and groupbys work on
+    integer codes rather than strings.
+    """
+    frame = pd.DataFrame({
+        "day": _parse_days(dates).astype("datetime64[ns]"),
+        "type": pd.Categorical(types),
+        "category": pd.Categorical(categories),
+        "amount": np.asarray(amounts, dtype=np.float64),
+        "description": pd.Series(descriptions, dtype="object"),
+    })
+    valid = frame["day"].notna().to_numpy()
+    return frame if valid.all() else frame[valid]
+
+
+async def load_frame(db: AsyncIOMotorDatabase, user_id: str, first: date, last: date) -> pd.DataFrame:
+    """A user's transactions dated from first to last, as a DataFrame"""
+    cursor = db.transactions.find(
+        {"user_id": user_id, **date_key_range_filter(first, last)},
+        {"_id": 0, "date": 1, "type": 1, "category": 1, "amount": 1, "description": 1}
+    ).batch_size(ANALYTICS_BATCH_SIZE)
+
+    # Append straight into columns; no per-row objects are kept
+    dates, types, categories, amounts, descriptions = [], [], [], [], []
+    async for document in cursor:
+        dates.append(document.get("date"))
+        types.append(document.get("type"))
+        categories.append(document.get("category"))
+        amounts.append(document.get("amount", 0.0))
+        descriptions.append(document.get("description", ""))
+    return build_frame(dates, types, categories, amounts, descriptions)
+
+
+def _expenses(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame[(frame["type"] == "expense").to_numpy()]
+
+
+def _expense_mask(frame: pd.DataFrame) -> np.ndarray:
+    return (frame["type"] == "expense").to_numpy()
+
+
+def _day_numbers(frame: pd.DataFrame) -> np.ndarray:
+    """Days since 1970-01-01 for each row"""
+    return frame["day"].to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def _day_number(day: date) -> int:
+    return int(np.datetime64(day, "D").astype(np.int64))
+
+
+def _round(values) -> List[float]:
+    return np.round(np.asarray(values, dtype=np.float64), 2).tolist()
+
+
+def rolling_spending(frame: pd.DataFrame, first: date, last: date, windows=(7, 30)) -> List[dict]:
+    """Daily expense totals from first to last with trailing rolling averages.
+
+    The frame should start max(windows) - 1 days before `first` so the
+    first averages cover full windows.
+    """
+    history_start = _day_number(first) - (max(windows) - 1)
+    length = _day_number(last) - history_start + 1
+
+    offsets = _day_numbers(frame) - history_start
+    selected = _expense_mask(frame) & (offsets >= 0) & (offsets < length)
+    daily = np.bincount(offsets[selected], weights=frame["amount"].to_numpy()[selected], minlength=length)
+
+    # Trailing window sums from one cumulative sum
+    cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+    shown = slice(max(windows) - 1, length)
+    columns = {"spent": _round(daily[shown])}
+    for window in windows:
+        ends = np.arange(1, length + 1)
+        sums = cumulative[ends] - cumulative[np.maximum(ends - window, 0)]
+        columns[f"avg_{window}d"] = _round((sums / np.minimum(ends, window))[shown])
+
+    days = np.arange(history_start, history_start + length).astype("datetime64[D]")[shown].astype(str).tolist()
+    return [
+        {"date": day, **{name: values[i] for name, values in columns.items()}}
+        for i, day in enumerate(days)
+    ]
+
+
+def category_deltas(frame: pd.DataFrame, year: int, month: int) -> List[dict]:
+    """Expense per category for a month against the previous month, largest change first"""
+    current = (year - 1970) * 12 + month - 1
+
+    months = frame["day"].to_numpy().astype("datetime64[M]").astype(np.int64)
+    expense = _expense_mask(frame)
+    codes = frame["category"].cat.codes.to_numpy()
+    amounts = frame["amount"].to_numpy()
+    names = frame["category"].cat.categories.to_numpy()
+
+    def totals(month_number):
+        selected = expense & (months == month_number)
+        return np.bincount(codes[selected], weights=amounts[selected], minlength=len(names))
+
+    current_totals, previous_totals = totals(current), totals(current - 1)
+    present = (current_totals != 0) | (previous_totals != 0)
+    names, current_totals, previous_totals = names[present], current_totals[present], previous_totals[present]
+
+    delta = current_totals - previous_totals
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.where(previous_totals > 0, delta / previous_totals * 100, np.nan)
+
+    order = np.argsort(-np.abs(delta), kind="stable")
+    categories = names[order]
+    current_list, previous_list, delta_list = _round(current_totals[order]), _round(previous_totals[order]), _round(delta[order])
+    percent_list = [None if np.isnan(value) else round(float(value), 2) for value in percent[order]]
+
+    return [
+        {
+            "category": categories[i],
+            "current": current_list[i],
+            "previous": previous_list[i],
+            "delta": delta_list[i],
+            "percent_change": percent_list[i],
+        }
+        for i in range(len(categories))
+    ]
+
+
+def payee_keys(descriptions: pd.Series) -> np.ndarray:
+    """Descriptions with case, digits and reference characters stripped, for grouping payments"""
+    codes, uniques = pd.factorize(descriptions.fillna(""))
+    keys = (
+        pd.Series(uniques, dtype="object").str.lower()
+        .str.replace(r"[\d#*]+", "", regex=True)
+        .str.replace(r"\s+", " ", regex=True).str.strip()
+        .to_numpy()
+    )
+    return keys[codes] if len(keys) else np.array([], dtype=object)
+
+
+def recurring_payments(frame: pd.DataFrame, min_occurrences: int = 3, tolerance: float = 0.1) -> List[dict]:
+    """Expenses repeating on a regular cadence with a stable amount.
+
+    Payments are grouped by normalized description (case and digits
+    ignored) and category; a group is recurring when the median gap
+    between payments matches a cadence in CADENCES and amounts stay within
+    `tolerance` of their median.
+    """
+    expenses = _expenses(frame)
+    if expenses.empty:
+        return []
+
+    # One integer id per (payee key, category) so grouping never touches strings
+    key_codes, key_names = pd.factorize(payee_keys(expenses["description"]))
+    category_names = expenses["category"].cat.categories.to_numpy()
+    width = len(category_names) + 1
+    group_ids = key_codes.astype(np.int64) * width + expenses["category"].cat.codes.to_numpy()
+    days = expenses["day"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    amounts = expenses["amount"].to_numpy()
+
+    keep = (key_names != "")[key_codes]
+    group_ids, days, amounts = group_ids[keep], days[keep], amounts[keep]
+    order = np.lexsort((days, group_ids))
+    group_ids, days, amounts = group_ids[order], days[order], amounts[order]
+
+    # Gap to the previous payment of the same group (NaN for each group's first)
+    gaps = np.full(len(days), np.nan)
+    same_group = group_ids[1:] == group_ids[:-1]
+    gaps[1:][same_group] = np.diff(days)[same_group]
+
+    stats = pd.DataFrame({"group": group_ids, "day": days, "amount": amounts, "gap": gaps}).groupby("group", sort=False).agg(
+        occurrences=("amount", "size"),
+        median_amount=("amount", "median"),
+        min_amount=("amount", "min"),
+        max_amount=("amount", "max"),
+        last_day=("day", "max"),
+        median_gap=("gap", "median"),
+    )
+    stats = stats[stats["occurrences"].to_numpy() >= min_occurrences]
+    group_index = stats.index.to_numpy()
+    stats.index = pd.MultiIndex.from_arrays(
+        [key_names[group_index // width], category_names[group_index % width]], names=["key", "category"]
+    )
+    stats["last_day"] = pd.to_datetime(stats["last_day"].to_numpy().astype("datetime64[D]"))
+
+    median_amount = stats["median_amount"].to_numpy()
+    stable = (
+        (stats["max_amount"].to_numpy() <= median_amount * (1 + tolerance))
+        & (stats["min_amount"].to_numpy() >= median_amount * (1 - tolerance))
+    )
+    gaps = stats["median_gap"].to_numpy()
+    cadence = np.full(len(stats), None, dtype=object)
+    for name, shortest, longest in CADENCES:
+        cadence[(gaps >= shortest) & (gaps <= longest)] = name
+    matched = stable & pd.notna(cadence)
+    recurring = stats[matched].assign(cadence=cadence[matched])
+
+    recurring = recurring.sort_values("median_amount", ascending=False)
+    # Calendar cadences land on the same day of the month; the rest add the median gap
+    last_days = recurring["last_day"]
+    next_days = last_days + pd.to_timedelta(recurring["median_gap"].round(), unit="D")
+    for name, months in CALENDAR_CADENCES.items():
+        is_cadence = (recurring["cadence"] == name).to_numpy()
+        next_days = next_days.where(~is_cadence, last_days + pd.DateOffset(months=months))
+    return [
+        {
+            "description": description,
+            "category": category,
+            "cadence": row_cadence,
+            "amount": round(float(amount), 2),
+            "occurrences": int(occurrences),
+            "interval_days": round(float(gap), 1),
+            "last_date": last_day.strftime("%Y-%m-%d"),
+            "next_expected": next_day.strftime("%Y-%m-%d"),
+        }
+        for (description, category), row_cadence, amount, occurrences, gap, last_day, next_day in zip(
+            recurring.index, recurring["cadence"], recurring["median_amount"], recurring["occurrences"],
+            recurring["median_gap"], recurring["last_day"], next_days
+        )
+    ]
+
+
+def month_projection(
+    frame: pd.DataFrame,
+    today: date,
+    budgets: Optional[Dict[str, float]] = None,
+    recurring: Optional[List[dict]] = None
+) -> dict:
+    """Projected end-of-month spend, overall and per category.
+
+    Spending so far is extended by this month's daily pace of variable
+    (non-recurring) expenses, plus the recurring payments from
+    `recurring_payments` still expected before the month ends.
+    """
+    budgets = budgets or {}
+    recurring = recurring or []
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+    days_elapsed = today.day
+    month_end = today.replace(day=days_in_month)
+
+    days = _day_numbers(frame)
+    in_month = frame[
+        _expense_mask(frame) & (days >= _day_number(today.replace(day=1))) & (days <= _day_number(today))
+    ]
+    recurring_keys = pd.MultiIndex.from_tuples(
+        [(item["description"], item["category"]) for item in recurring], names=["key", "category"]
+    ) if recurring else None
+    is_recurring = (
+        pd.MultiIndex.from_arrays([payee_keys(in_month["description"]), in_month["category"].to_numpy()]).isin(recurring_keys)
+        if recurring_keys is not None else np.zeros(len(in_month), dtype=bool)
+    )
+
+    spent_by_category = in_month.groupby("category", observed=True)["amount"].sum()
+    spent_by_category.index = spent_by_category.index.astype("object")
+    variable_by_category = in_month[~is_recurring].groupby("category", observed=True)["amount"].sum()
+    variable_by_category.index = variable_by_category.index.astype("object")
+
+    # Recurring payments due between tomorrow and the end of the month
+    upcoming: Dict[str, float] = {}
+    for item in recurring:
+        due = date.fromisoformat(item["next_expected"])
+        step = timedelta(days=max(1, round(item["interval_days"])))
+        while due <= month_end:
+            if due > today:
+                upcoming[item["category"]] = upcoming.get(item["category"], 0.0) + item["amount"]
+            if item["cadence"] in CALENDAR_CADENCES:
+                # Calendar cadences come around at most once in the month
+                break
+            due += step
+
+    categories_index = (
+        spent_by_category.index
+        .union(pd.Index(list(upcoming), dtype="object"))
+        .union(pd.Index(list(budgets), dtype="object"))
+    )
+    spent = spent_by_category.reindex(categories_index, fill_value=0.0).to_numpy()
+    variable = variable_by_category.reindex(categories_index, fill_value=0.0).to_numpy()
+    expected = pd.Series(upcoming, dtype="float64").reindex(categories_index, fill_value=0.0).to_numpy()
+    projected = spent + variable / days_elapsed * (days_in_month - days_elapsed) + expected
+
+    budget = pd.Series(budgets, dtype="float64").reindex(categories_index).to_numpy()
+    over = np.where(np.isnan(budget), False, projected > budget)
+
+    spent_list, projected_list, expected_list = _round(spent), _round(projected), _round(expected)
+    categories = [
+        {
+            "category": category,
+            "spent": spent_list[i],
+            "projected": projected_list[i],
+            "recurring_expected": expected_list[i],
+            "budget": None if np.isnan(budget[i]) else round(float(budget[i]), 2),
+            "projected_over_budget": bool(over[i]),
+        }
+        for i, category in enumerate(categories_index)
+    ]
+    categories.sort(key=lambda item: item["projected"], reverse=True)
+
+    return {
+        "month": today.month,
+        "year": today.year,
+        "days_elapsed": days_elapsed,
+        "days_in_month": days_in_month,
+        "spent": round(float(spent.sum()), 2),
+        "projected": round(float(projected.sum()), 2),
+        "categories": categories,
+    }
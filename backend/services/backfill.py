@@ -0,0 +1,70 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from datetime import datetime
+from typing import Callable, Optional
+import asyncio
+
+
+async def backfill_transactions(
+    db: AsyncIOMotorDatabase,
+    backfill_id: str,
+    field: str,
+    projection: dict,
+    compute: Callable[[dict], dict],
+    batch_size: int = 1000,
+    restart: bool = False,
+    pause_seconds: float = 0.0,
+    progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """Set fields derived by `compute` on transactions still missing `field`, in _id order.
+
+    The last _id of each batch is checkpointed in `migrations` under
+    `backfill_id`, so an interrupted run resumes where it stopped unless
+    `restart` is set. `pause_seconds` between batches keeps the load on a
+    live database low. Documents for which `compute` leaves `field` as None
+    are counted as skipped.
+    """
+    if restart:
+        await db.migrations.delete_one({"_id": backfill_id})
+    state = await db.migrations.find_one({"_id": backfill_id}) or {
+        "_id": backfill_id, "last_id": None, "updated": 0, "skipped": 0
+    }
+    state["completed_at"] = None
+
+    while True:
+        query = {field: {"$exists": False}}
+        if state["last_id"] is not None:
+            query["_id"] = {"$gt": state["last_id"]}
+        batch = await (
+            db.transactions.find(query, {"_id": 1, **projection})
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+
+        operations = []
+        for document in batch:
+            fields = compute(document)
+            if fields.get(field) is None:
+                state["skipped"] += 1
+            # Only fill documents still missing the field; concurrent writers win
+            operations.append(UpdateOne(
+                {"_id": document["_id"], field: {"$exists": False}},
+                {"$set": fields}
+            ))
+        result = await db.transactions.bulk_write(operations, ordered=False)
+
+        state["updated"] += result.modified_count
+        state["last_id"] = batch[-1]["_id"]
+        state["updated_at"] = datetime.utcnow()
+        await db.migrations.replace_one({"_id": backfill_id}, state, upsert=True)
+        if progress:
+            progress(state)
+        if pause_seconds:
+            await asyncio.sleep(pause_seconds)
+
+    state["completed_at"] = datetime.utcnow()
+    await db.migrations.replace_one({"_id": backfill_id}, state, upsert=True)
+    return state
@@ -0,0 +1,77 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+from pydantic import ValidationError
+from typing import Dict, List, Tuple
+import os
+
+from models.transaction import Transaction, TransactionCreate
+from services.monthly_rollups import record_transactions
+from services.data_versions import bump_data_version
+from services.transaction_dates import date_fields
+from services.transaction_search import search_fields
+
+# Documents per insert_many call
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000"))
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """One-line summary of a pydantic validation error"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+async def insert_transactions(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    items: List[Tuple[int, TransactionCreate]],
+    chunk_size: int = BULK_INSERT_CHUNK_SIZE
+) -> Tuple[List[Transaction], Dict[int, str]]:
+    """Insert validated transactions with unordered insert_many in chunks.
+
+    `items` pairs each transaction with the caller's index for it. Returns the
+    inserted transactions and a map of caller index to error message for the
+    documents the server rejected; one bad document doesn't stop the rest.
+    """
+    inserted = []
+    errors = {}
+    # Set once a write may have reached the server, even if it then failed
+    written = False
+
+    try:
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            transactions = [Transaction(**transaction.dict()) for _, transaction in chunk]
+            documents = []
+            for transaction in transactions:
+                document = transaction.dict()
+                document["user_id"] = user_id
+                document.update(date_fields(document["date"]))
+                document.update(search_fields(document["description"], document["category"]))
+                documents.append(document)
+
+            failed = set()
+            written = True
+            try:
+                await db.transactions.insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                for write_error in e.details.get("writeErrors", []):
+                    position = write_error["index"]
+                    failed.add(position)
+                    errors[chunk[position][0]] = write_error.get("errmsg", "Write failed")
+
+            inserted.extend(
+                transaction for position, transaction in enumerate(transactions)
+                if position not in failed
+            )
+            await record_transactions(
+                db, user_id,
+                (document for position, document in enumerate(documents) if position not in failed)
+            )
+    finally:
+        # Earlier chunks are committed even when a later one raises, so the
+        # version must move or clients would keep revalidating a stale copy
+        if written:
+            await bump_data_version(db, user_id)
+    return inserted, errors
@@ -0,0 +1,87 @@
+"""
+Per-user data version, bumped by every transaction and budget write.
+
+`data_versions` holds one document per user (`_id` is the user id) with a
+counter that only goes up. The list and summary endpoints turn it into a
+strong ETag via the `data_etag` dependency, so a client revalidating with
+If-None-Match gets a 304 after a single _id lookup, before the handler runs
+any query or serializes anything.
+
+Writers bump the version *after* their write: a read racing a write may
+then pair new data with the old tag, which only costs the next request a
+full response, never a stale 304.
+"""
+
+from fastapi import Depends, HTTPException, Request, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import datetime
+from typing import Optional
+import hashlib
+
+from auth.dependencies import get_current_active_user, TokenData
+from compression import identity_etag
+from database import get_db
+from serialization import wants_columnar
+
+
+async def bump_data_version(db: AsyncIOMotorDatabase, user_id: str):
+    """Mark the user's transactions and budgets as changed"""
+    await db.data_versions.update_one(
+        {"_id": user_id},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+async def get_data_version(db: AsyncIOMotorDatabase, user_id: str) -> int:
+    document = await db.data_versions.find_one({"_id": user_id}, {"_id": 0, "version": 1})
+    return document["version"] if document else 0
+
+
+def make_etag(user_id: str, version: int, now: Optional[datetime] = None, columnar: bool = False) -> str:
+    """Strong ETag for a user's data at a version.
+
+    The user part keeps tags from matching across accounts sharing a
+    browser cache, and the current month is included because endpoints
+    such as the budget status default to it. The columnar format is a
+    different body, so it gets its own tag.
+    """
+    user_tag = hashlib.blake2s(user_id.encode(), digest_size=4).hexdigest()
+    month = (now or datetime.utcnow()).strftime("%Y%m")
+    return f'"{user_tag}-{version}-{month}{"-columnar" if columnar else ""}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists etag (weak comparison, as RFC 9110 requires).
+
+    Tags of compressed responses match their uncompressed one.
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(identity_etag(candidate.removeprefix("W/")) == etag for candidate in candidates)
+
+
+def etag_headers(etag: str) -> dict:
+    # no-cache: browsers keep the response but revalidate it on every use
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+async def data_etag(
+    request: Request,
+    response: Response,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+) -> str:
+    """ETag of the current user's data; answers 304 right away when If-None-Match already has it.
+
+    Declare it after check_travel_mode so restricted users still get their
+    404. Handlers returning their own Response must add `etag_headers`.
+    """
+    version = await get_data_version(db, current_user.user_id)
+    etag = make_etag(current_user.user_id, version, columnar=wants_columnar(request))
+    headers = etag_headers(etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return etag
@@ -0,0 +1,270 @@
+"""
+Per-user monthly totals, maintained incrementally on every transaction write.
+
+`monthly_rollups` holds one document per (user_id, year, month, type,
+category) with the summed amount and transaction count. Writers call
+`record_transactions` / `record_transaction_change` right after they touch
+`transactions`; the summary endpoints read the rollups instead of
+aggregating raw transactions. `rebuild_rollups` and `verify_rollups` (see
+`python manage.py rebuild-rollups` / `verify-rollups`) recompute them
+from the transactions.
+
+Until a full rebuild-rollups has recorded ROLLUPS_READY_ID in
+`migrations`, the rollups of data written before they existed are
+missing, and summaries aggregate the transactions instead.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.data_versions import bump_data_version
+from services.transaction_dates import date_fields, date_range_filter
+
+RollupKey = Tuple[int, int, str, str]
+
+# Totals are stored as floats; differences below this are rounding noise
+ROLLUP_TOLERANCE = 0.005
+# Repair passes rebuild_rollups makes before giving up on a user whose writes keep racing it
+ROLLUP_REBUILD_PASSES = 3
+
+# migrations document recording that every user's rollups have been built
+ROLLUPS_READY_ID = "monthly_rollups"
+# Once seen, the marker stays: rollups never go back to missing
+_rollups_ready = False
+
+
+def rollup_key(transaction: dict) -> Optional[RollupKey]:
+    """(year, month, type, category) for a transaction, None if it has no usable date"""
+    year_month = transaction.get("year_month")
+    if not isinstance(year_month, int):
+        # Not backfilled yet: parse the string date the way the backfill would
+        year_month = date_fields(transaction.get("date"))["year_month"]
+    if year_month is None or "type" not in transaction or "category" not in transaction:
+        return None
+    year, month = divmod(year_month, 100)
+    return year, month, transaction["type"], transaction["category"]
+
+
+def _deltas(transactions: Iterable[dict], sign: int, deltas: Dict[RollupKey, List[float]]):
+    for transaction in transactions:
+        key = rollup_key(transaction)
+        if key is None:
+            continue
+        delta = deltas.setdefault(key, [0.0, 0])
+        delta[0] += sign * transaction["amount"]
+        delta[1] += sign
+
+
+async def _apply(db: AsyncIOMotorDatabase, user_id: str, deltas: Dict[RollupKey, List[float]]):
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"user_id": user_id, "year": year, "month": month, "type": type_, "category": category},
+            {"$inc": {"total": total, "count": count}, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for (year, month, type_, category), (total, count) in deltas.items()
+        if total or count
+    ]
+    if operations:
+        await db.monthly_rollups.bulk_write(operations, ordered=False)
+
+
+async def record_transactions(db: AsyncIOMotorDatabase, user_id: str, transactions: Iterable[dict], sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) transactions from the user's rollups in one write"""
+    deltas: Dict[RollupKey, List[float]] = {}
+    _deltas(transactions, sign, deltas)
+    await _apply(db, user_id, deltas)
+
+
+async def record_transaction_change(db: AsyncIOMotorDatabase, user_id: str, before: dict, after: dict):
+    """Move an updated transaction's amount between rollups (month, type or category may change)"""
+    deltas: Dict[RollupKey, List[float]] = {}
+    _deltas([before], -1, deltas)
+    _deltas([after], 1, deltas)
+    await _apply(db, user_id, deltas)
+
+
+async def rollups_ready(db: AsyncIOMotorDatabase) -> bool:
+    """Whether the rollups cover every transaction; looked up until it first is"""
+    global _rollups_ready
+    if not _rollups_ready:
+        _rollups_ready = await db.migrations.find_one({"_id": ROLLUPS_READY_ID}, {"_id": 1}) is not None
+    return _rollups_ready
+
+
+async def mark_rollups_ready(db: AsyncIOMotorDatabase):
+    await db.migrations.replace_one(
+        {"_id": ROLLUPS_READY_ID},
+        {"_id": ROLLUPS_READY_ID, "completed_at": datetime.utcnow()},
+        upsert=True
+    )
+
+
+async def mark_rollups_ready_if_empty(db: AsyncIOMotorDatabase):
+    """A database without transactions has nothing to rebuild"""
+    if not await rollups_ready(db) and await db.transactions.find_one({}, {"_id": 1}) is None:
+        await mark_rollups_ready(db)
+
+
+async def aggregate_month_rollups(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    year: int,
+    month: int,
+    type: Optional[str] = None
+) -> List[dict]:
+    """The rollups of one month computed from the transactions, for before they are built"""
+    query = {"user_id": user_id, "$and": [date_range_filter(year, month)]}
+    if type:
+        query["type"] = type
+    pipeline = [
+        {"$match": query},
+        {
+            "$group": {
+                "_id": {"type": "$type", "category": "$category"},
+                "total": {"$sum": "$amount"},
+                "count": {"$sum": 1}
+            }
+        }
+    ]
+    return [
+        {**result["_id"], "total": round(result["total"], 2), "count": result["count"]}
+        async for result in db.transactions.aggregate(pipeline)
+    ]
+
+
+async def get_month_rollups(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    year: int,
+    month: int,
+    type: Optional[str] = None
+) -> List[dict]:
+    """The non-empty rollups of one month, optionally for one transaction type"""
+    if not await rollups_ready(db):
+        return await aggregate_month_rollups(db, user_id, year, month, type)
+    query = {"user_id": user_id, "year": year, "month": month, "count": {"$gt": 0}}
+    if type:
+        query["type"] = type
+    cursor = db.monthly_rollups.find(query, {"_id": 0, "type": 1, "category": 1, "total": 1, "count": 1})
+    rollups = await cursor.to_list(length=None)
+    for rollup in rollups:
+        rollup["total"] = round(rollup["total"], 2)
+    return rollups
+
+
+async def compute_rollups(db: AsyncIOMotorDatabase, user_id: str) -> Dict[RollupKey, Tuple[float, int]]:
+    """Rollups for a user recomputed from the raw transactions, grouped by year_month"""
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {
+            "$group": {
+                "_id": {
+                    "year_month": {"$ifNull": ["$year_month", "$date"]},
+                    "type": "$type",
+                    "category": "$category"
+                },
+                "total": {"$sum": "$amount"},
+                "count": {"$sum": 1}
+            }
+        }
+    ]
+    rollups = {}
+    async for result in db.transactions.aggregate(pipeline):
+        # year_month is an int once backfilled, otherwise the whole date string,
+        # so one month can come back as several groups that add up
+        key = rollup_key({**result["_id"], "date": result["_id"]["year_month"]})
+        if key is not None:
+            total, count = rollups.get(key, (0.0, 0))
+            rollups[key] = (total + result["total"], count + result["count"])
+    return rollups
+
+
+async def stored_rollups(db: AsyncIOMotorDatabase, user_id: str) -> Dict[RollupKey, Tuple[float, int]]:
+    """The user's non-empty rollups as currently stored"""
+    cursor = db.monthly_rollups.find({"user_id": user_id, "count": {"$gt": 0}}, {"_id": 0})
+    return {
+        (rollup["year"], rollup["month"], rollup["type"], rollup["category"]): (rollup["total"], rollup["count"])
+        async for rollup in cursor
+    }
+
+
+async def rollup_user_ids(db: AsyncIOMotorDatabase) -> List[str]:
+    """Every user with transactions or rollups"""
+    user_ids = set(await db.transactions.distinct("user_id"))
+    user_ids.update(await db.monthly_rollups.distinct("user_id"))
+    return sorted(user_ids)
+
+
+def _differences(
+    expected: Dict[RollupKey, Tuple[float, int]],
+    stored: Dict[RollupKey, Tuple[float, int]]
+) -> Dict[RollupKey, Tuple[float, int]]:
+    """The expected value of every rollup whose stored value differs from it"""
+    differences = {}
+    for key in set(expected) | set(stored):
+        expected_total, expected_count = expected.get(key, (0.0, 0))
+        stored_total, stored_count = stored.get(key, (0.0, 0))
+        if expected_count != stored_count or abs(expected_total - stored_total) > ROLLUP_TOLERANCE:
+            differences[key] = (expected_total, expected_count)
+    return differences
+
+
+async def rebuild_rollups(db: AsyncIOMotorDatabase, user_id: str) -> int:
+    """Bring a user's rollups in line with the transactions; returns rollups written.
+
+    Rollups that differ are overwritten in place, never deleted first, so
+    summaries read the old figures until each one is replaced. A live write
+    landing between the recompute and the overwrite is lost by it, so every
+    pass verifies again and repairs what changed; RuntimeError if writes
+    keep racing it for ROLLUP_REBUILD_PASSES passes.
+    """
+    written = 0
+    for attempt in range(ROLLUP_REBUILD_PASSES + 1):
+        differences = _differences(await compute_rollups(db, user_id), await stored_rollups(db, user_id))
+        if not differences:
+            break
+        if attempt == ROLLUP_REBUILD_PASSES:
+            raise RuntimeError(
+                f"Rollups of user {user_id} still differ after {ROLLUP_REBUILD_PASSES} rebuild passes"
+            )
+
+        now = datetime.utcnow()
+        await db.monthly_rollups.bulk_write([
+            UpdateOne(
+                {"user_id": user_id, "year": year, "month": month, "type": type_, "category": category},
+                {"$set": {"total": total, "count": count, "updated_at": now}},
+                upsert=True
+            )
+            for (year, month, type_, category), (total, count) in differences.items()
+        ], ordered=False)
+        written += len(differences)
+
+    if written:
+        # Summaries read the rollups, so cached ones may now be wrong
+        await bump_data_version(db, user_id)
+    return written
+
+
+async def verify_rollups(db: AsyncIOMotorDatabase, user_id: str) -> List[dict]:
+    """Differences between a user's stored rollups and the transactions"""
+    expected = await compute_rollups(db, user_id)
+    stored = await stored_rollups(db, user_id)
+
+    mismatches = []
+    for key, (expected_total, expected_count) in sorted(_differences(expected, stored).items()):
+        stored_total, stored_count = stored.get(key, (0.0, 0))
+        year, month, type_, category = key
+        mismatches.append({
+            "user_id": user_id,
+            "year": year,
+            "month": month,
+            "type": type_,
+            "category": category,
+            "expected": {"total": round(expected_total, 2), "count": expected_count},
+            "stored": {"total": round(stored_total, 2), "count": stored_count},
+        })
+    return mismatches
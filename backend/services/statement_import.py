@@ -0,0 +1,312 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+import asyncio
+import csv
+import io
+import itertools
+import logging
+import os
+import re
+
+from models.transaction import TransactionCreate
+from services.bulk_writes import insert_transactions, format_validation_error
+
+logger = logging.getLogger(__name__)
+
+# Rows parsed per worker-thread call, insert batch and progress update
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# A pending or running job without a progress update for this long has lost its worker
+IMPORT_STALE_SECONDS = int(os.getenv("IMPORT_STALE_SECONDS", "600"))
+# Row errors kept on the job document; the rest are only counted
+IMPORT_MAX_REPORTED_ERRORS = 100
+# Bytes read from the statement at a time
+IMPORT_READ_CHUNK_BYTES = 64 * 1024
+
+DEFAULT_CATEGORY = "Uncategorized"
+
+# Accepted CSV header names for each transaction field
+CSV_COLUMNS = {
+    "type": {"type", "transaction type"},
+    "category": {"category"},
+    "amount": {"amount", "value"},
+    "description": {"description", "memo", "name", "payee", "details"},
+    "date": {"date", "transaction date", "posted date", "booking date"},
+}
+
+
+# Year first (2024-03-05, 2024/3/5, 2024.03.05), possibly followed by a time
+YEAR_FIRST_DATE = re.compile(r"^(\d{4})([-/.])(\d{1,2})\2(\d{1,2})(?!\d)")
+# Year last: 05.03.2024 is always day first, 05/03/2024 and 05-03-2024 can be either
+YEAR_LAST_DATE = re.compile(r"^(\d{1,2})([-/.])(\d{1,2})\2(\d{4})(?!\d)")
+
+
+class AmbiguousDateError(Exception):
+    """A statement's dates read both day first and month first.
+
+    Deliberately not a ValueError: it fails the whole import instead of
+    one row, since every other date in the file is just as ambiguous.
+    """
+
+
+def detect_date_order(value: str) -> Optional[str]:
+    """'dmy' or 'mdy' when a year-last date can only be read one way, else None"""
+    match = YEAR_LAST_DATE.match(value.strip())
+    if not match:
+        return None
+    first, separator, second = int(match.group(1)), match.group(2), int(match.group(3))
+    if separator == "." or first > 12:
+        return "dmy"
+    if second > 12:
+        return "mdy"
+    return None
+
+
+def _normalize_date(value: str, date_order: Optional[str] = None) -> str:
+    """Statement date to YYYY-MM-DD.
+
+    Accepts OFX (YYYYMMDD...), year-first dates with -, / or . separators
+    and year-last dates; date_order ('dmy' or 'mdy') settles year-last
+    dates that can't be told apart by their numbers.
+    """
+    value = value.strip()
+    if re.match(r"^\d{8}", value):
+        return datetime.strptime(value[:8], "%Y%m%d").strftime("%Y-%m-%d")
+
+    match = YEAR_FIRST_DATE.match(value)
+    if match:
+        year, month, day = match.group(1), match.group(3), match.group(4)
+    else:
+        match = YEAR_LAST_DATE.match(value)
+        if not match:
+            raise ValueError(f"Unrecognized date: {value!r}")
+        order = "dmy" if match.group(2) == "." else date_order or detect_date_order(value)
+        if order is None:
+            raise AmbiguousDateError(
+                f"Dates like {value!r} can be read day first or month first; import again with date_order=dmy or date_order=mdy"
+            )
+        first, second, year = match.group(1), match.group(3), match.group(4)
+        day, month = (first, second) if order == "dmy" else (second, first)
+
+    return datetime(int(year), int(month), int(day)).strftime("%Y-%m-%d")
+
+
+def _row_error(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return format_validation_error(error)
+    return str(error)
+
+
+def _build_transaction(
+    amount: str,
+    date: str,
+    description: str,
+    category: Optional[str] = None,
+    type_: Optional[str] = None,
+    date_order: Optional[str] = None
+) -> TransactionCreate:
+    """Map statement fields to a transaction; a signed amount decides the type when none is given"""
+    value = float(amount.replace(",", "").strip())
+    if type_:
+        type_ = type_.strip().lower()
+    else:
+        type_ = "expense" if value < 0 else "income"
+
+    return TransactionCreate(
+        type=type_,
+        category=(category or "").strip() or DEFAULT_CATEGORY,
+        amount=abs(value),
+        description=(description or "").strip(),
+        date=_normalize_date(date, date_order)
+    )
+
+
+def parse_csv(stream, date_order: Optional[str] = None) -> Iterator[Tuple[int, Optional[TransactionCreate], Optional[str]]]:
+    """Yield (row number, transaction, error) for each CSV row, one row at a time.
+
+    Without date_order, the first date that can only be read one way sets
+    it for the rest of the file; an ambiguous date before that raises
+    AmbiguousDateError.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+
+    columns = {}
+    for field, names in CSV_COLUMNS.items():
+        for header in reader.fieldnames or []:
+            if header and header.strip().lower() in names:
+                columns[field] = header
+                break
+
+    missing = [field for field in ("amount", "date") if field not in columns]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+
+    for row_number, row in enumerate(reader, start=2):
+        date = row[columns["date"]] or ""
+        if date_order is None:
+            date_order = detect_date_order(date)
+        try:
+            yield row_number, _build_transaction(
+                amount=row[columns["amount"]] or "",
+                date=date,
+                description=row.get(columns.get("description"), "") if "description" in columns else "",
+                category=row.get(columns["category"]) if "category" in columns else None,
+                type_=row.get(columns["type"]) if "type" in columns else None,
+                date_order=date_order
+            ), None
+        except (ValueError, ValidationError) as e:
+            yield row_number, None, _row_error(e)
+
+
+def _ofx_tokens(stream) -> Iterator[Tuple[str, str]]:
+    """Yield (tag, text) pairs from an OFX (SGML or XML) stream, chunk by chunk"""
+    buffer = ""
+    while True:
+        chunk = stream.read(IMPORT_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        buffer += chunk.decode("utf-8", errors="replace")
+        parts = buffer.split("<")
+        buffer = parts.pop()
+        for part in parts:
+            if ">" in part:
+                tag, _, text = part.partition(">")
+                yield tag.strip().upper(), text.strip()
+    if ">" in buffer:
+        tag, _, text = buffer.partition(">")
+        yield tag.strip().upper(), text.strip()
+
+
+def parse_ofx(stream, date_order: Optional[str] = None) -> Iterator[Tuple[int, Optional[TransactionCreate], Optional[str]]]:
+    """Yield (transaction number, transaction, error) for each OFX STMTTRN block.
+
+    OFX dates are always YYYYMMDD, so date_order is ignored.
+    """
+    current: Optional[Dict[str, str]] = None
+    number = 0
+
+    for tag, text in _ofx_tokens(stream):
+        if tag == "STMTTRN":
+            current = {}
+        elif tag == "/STMTTRN" and current is not None:
+            number += 1
+            try:
+                yield number, _build_transaction(
+                    amount=current.get("TRNAMT", ""),
+                    date=current.get("DTPOSTED", ""),
+                    description=current.get("NAME") or current.get("MEMO") or "",
+                    category=None
+                ), None
+            except (ValueError, ValidationError) as e:
+                yield number, None, _row_error(e)
+            current = None
+        elif current is not None and not tag.startswith("/"):
+            current[tag] = text
+
+
+PARSERS = {"csv": parse_csv, "ofx": parse_ofx}
+
+# Running import tasks, kept referenced until they finish
+import_tasks = set()
+
+
+def start_import_job(*args) -> asyncio.Task:
+    """Run run_import_job(*args) in the background, tracked for shutdown"""
+    task = asyncio.create_task(run_import_job(*args))
+    import_tasks.add(task)
+    task.add_done_callback(import_tasks.discard)
+    return task
+
+
+async def cancel_import_jobs():
+    """Cancel the running imports and wait for them to record it; call before closing the client"""
+    tasks = list(import_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fail_stale_import_jobs(db: AsyncIOMotorDatabase, query: Optional[dict] = None) -> int:
+    """Mark unfinished jobs whose worker stopped updating them (a crash or restart) as failed"""
+    now = datetime.utcnow()
+    result = await db.import_jobs.update_many(
+        {
+            **(query or {}),
+            "status": {"$in": ["pending", "running"]},
+            "updated_at": {"$lt": now - timedelta(seconds=IMPORT_STALE_SECONDS)}
+        },
+        {"$set": {"status": "failed", "error": "Import interrupted", "updated_at": now, "finished_at": now}}
+    )
+    return result.modified_count
+
+
+async def run_import_job(
+    db: AsyncIOMotorDatabase,
+    job_id: str,
+    user_id: str,
+    path: str,
+    file_format: str,
+    date_order: Optional[str] = None
+):
+    """Parse a spooled statement file and insert it in batches, recording progress on the job"""
+    progress = {"rows_read": 0, "inserted": 0, "failed": 0}
+    errors: List[dict] = []
+
+    async def save(extra: dict):
+        await db.import_jobs.update_one(
+            {"id": job_id},
+            {"$set": {**progress, "errors": errors, "updated_at": datetime.utcnow(), **extra}}
+        )
+
+    async def flush(batch: List[Tuple[int, TransactionCreate]]):
+        inserted, write_errors = await insert_transactions(db, user_id, batch)
+        progress["inserted"] += len(inserted)
+        progress["failed"] += len(write_errors)
+        for row, message in write_errors.items():
+            if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                errors.append({"row": row, "error": message})
+        await save({})
+
+    try:
+        await save({"status": "running"})
+
+        with open(path, "rb") as stream:
+            rows = PARSERS[file_format](stream, date_order)
+            while True:
+                # Parse in a worker thread so the event loop is never held by the
+                # file, even by long stretches of bad rows or non-transaction OFX
+                chunk = await asyncio.to_thread(list, itertools.islice(rows, IMPORT_BATCH_SIZE))
+                if not chunk:
+                    break
+
+                batch: List[Tuple[int, TransactionCreate]] = []
+                for row, transaction, error in chunk:
+                    progress["rows_read"] += 1
+                    if error:
+                        progress["failed"] += 1
+                        if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                            errors.append({"row": row, "error": error})
+                    else:
+                        batch.append((row, transaction))
+
+                # Progress is saved for every full batch read, valid rows or not;
+                # the completed status below covers the last, partial one
+                if batch:
+                    await flush(batch)
+                elif len(chunk) == IMPORT_BATCH_SIZE:
+                    await save({})
+
+        await save({"status": "completed", "finished_at": datetime.utcnow()})
+    except asyncio.CancelledError:
+        await save({"status": "failed", "error": "Import interrupted", "finished_at": datetime.utcnow()})
+        raise
+    except Exception as e:
+        logger.error(f"Import job {job_id} failed: {e}")
+        await save({"status": "failed", "error": str(e), "finished_at": datetime.utcnow()})
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,88 @@
+from typing import List
+
+
+def monthly_summary(rollups: List[dict], year: int, month: int) -> dict:
+    """Income, expenses and per-category totals of a month from its rollups"""
+    summary = {
+        "month": month,
+        "year": year,
+        "total_income": 0,
+        "total_expenses": 0,
+        "net_balance": 0,
+        "categories": {}
+    }
+
+    for result in rollups:
+        type_name = result["type"]
+        category = result["category"]
+        total = result["total"]
+
+        if type_name == "income":
+            summary["total_income"] += total
+        else:
+            summary["total_expenses"] += total
+
+        if category not in summary["categories"]:
+            summary["categories"][category] = {"income": 0, "expense": 0}
+
+        summary["categories"][category][type_name] = total
+
+    summary["net_balance"] = summary["total_income"] - summary["total_expenses"]
+
+    return summary
+
+
+def budget_status_summary(budgets: List[dict], rollups: List[dict], year: int, month: int) -> dict:
+    """Each budget compared with the month's spending; expense rollups only are used"""
+    # Convert spending results to dictionary
+    spending_by_category = {}
+    for result in rollups:
+        if result["type"] != "expense":
+            continue
+        spending_by_category[result["category"]] = {
+            "spent": result["total"],
+            "transactions": result["count"]
+        }
+
+    # Build budget status summary
+    budget_status = []
+    total_budgeted = 0
+    total_spent = 0
+
+    for budget in budgets:
+        category = budget["category"]
+        budget_amount = budget["amount"]
+        spent = spending_by_category.get(category, {}).get("spent", 0)
+
+        total_budgeted += budget_amount
+        total_spent += spent
+
+        percentage = (spent / budget_amount * 100) if budget_amount > 0 else 0
+        remaining = budget_amount - spent
+
+        status = "over" if percentage >= 100 else "warning" if percentage >= 80 else "good"
+
+        budget_status.append({
+            "category": category,
+            "budget_amount": budget_amount,
+            "spent": spent,
+            "remaining": remaining,
+            "percentage": round(percentage, 2),
+            "status": status,
+            "transaction_count": spending_by_category.get(category, {}).get("transactions", 0)
+        })
+
+    # Sort by percentage (highest first)
+    budget_status.sort(key=lambda x: x["percentage"], reverse=True)
+
+    return {
+        "month": month,
+        "year": year,
+        "summary": {
+            "total_budgeted": total_budgeted,
+            "total_spent": total_spent,
+            "total_remaining": total_budgeted - total_spent,
+            "overall_percentage": round((total_spent / total_budgeted * 100) if total_budgeted > 0 else 0, 2)
+        },
+        "budget_status": budget_status
+    }
@@ -0,0 +1,139 @@
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+import os
+
+from services.monthly_rollups import rollups_ready
+from services.transaction_dates import date_key_range_filter, from_date_key
+
+# Longest series returned by one request
+SERIES_MAX_PERIODS = int(os.getenv("SERIES_MAX_PERIODS", "400"))
+
+GRANULARITIES = ("month", "week", "day")
+
+
+def parse_month(value: str, name: str) -> date:
+    """First day of a YYYY-MM month"""
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"'{name}' must be a month in YYYY-MM format")
+
+
+def month_end(first: date) -> date:
+    following = date(first.year + 1, 1, 1) if first.month == 12 else date(first.year, first.month + 1, 1)
+    return following - timedelta(days=1)
+
+
+def period_start(day: date, granularity: str) -> date:
+    """Start of the period containing day; weeks start on Monday"""
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def next_period(start: date, granularity: str) -> date:
+    if granularity == "month":
+        return month_end(start) + timedelta(days=1)
+    return start + timedelta(days=7 if granularity == "week" else 1)
+
+
+def period_label(start: date, granularity: str) -> str:
+    return start.strftime("%Y-%m") if granularity == "month" else start.isoformat()
+
+
+def empty_series(first: date, last: date, granularity: str) -> Dict[date, dict]:
+    """Zeroed entries for every period from first to last, so gaps show up as zeros"""
+    series = {}
+    start = period_start(first, granularity)
+    while start <= last:
+        if len(series) >= SERIES_MAX_PERIODS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Series too long: at most {SERIES_MAX_PERIODS} periods per request"
+            )
+        series[start] = {
+            "period": period_label(start, granularity),
+            "start": start.isoformat(),
+            "total_income": 0,
+            "total_expenses": 0,
+            "net_balance": 0,
+            "categories": {}
+        }
+        start = next_period(start, granularity)
+    return series
+
+
+def add_total(entry: dict, type_name: str, category: str, total: float):
+    if type_name == "income":
+        entry["total_income"] += total
+    else:
+        entry["total_expenses"] += total
+    categories = entry["categories"].setdefault(category, {"income": 0, "expense": 0})
+    categories[type_name] += total
+
+
+async def _month_totals(db: AsyncIOMotorDatabase, user_id: str, first: date, last: date) -> List[Tuple[date, str, str, float]]:
+    """Monthly totals straight from monthly_rollups"""
+    cursor = db.monthly_rollups.find(
+        {"user_id": user_id, "year": {"$gte": first.year, "$lte": last.year}, "count": {"$gt": 0}},
+        {"_id": 0, "year": 1, "month": 1, "type": 1, "category": 1, "total": 1}
+    )
+    return [
+        (date(rollup["year"], rollup["month"], 1), rollup["type"], rollup["category"], rollup["total"])
+        async for rollup in cursor
+        if first <= date(rollup["year"], rollup["month"], 1) <= last
+    ]
+
+
+async def _daily_totals(db: AsyncIOMotorDatabase, user_id: str, first: date, last: date) -> List[Tuple[date, str, str, float]]:
+    """Per-day totals from a single $group over the transactions in range"""
+    pipeline = [
+        {"$match": {"user_id": user_id, **date_key_range_filter(first, last)}},
+        {
+            "$group": {
+                "_id": {
+                    # date_key once backfilled, otherwise the ISO date string
+                    "day": {"$ifNull": ["$date_key", "$date"]},
+                    "type": "$type",
+                    "category": "$category"
+                },
+                "total": {"$sum": "$amount"}
+            }
+        }
+    ]
+    totals = []
+    async for result in db.transactions.aggregate(pipeline):
+        day = from_date_key(result["_id"]["day"])
+        if day is not None:
+            totals.append((day, result["_id"]["type"], result["_id"]["category"], result["total"]))
+    return totals
+
+
+async def build_series(db: AsyncIOMotorDatabase, user_id: str, first: date, last: date, granularity: str) -> List[dict]:
+    """Income, expenses and per-category totals for each period from first to last, inclusive"""
+    series = empty_series(first, last, granularity)
+
+    # Daily totals add up to months too, which covers the time before rollups are built
+    if granularity == "month" and await rollups_ready(db):
+        totals = await _month_totals(db, user_id, first, last)
+    else:
+        totals = await _daily_totals(db, user_id, first, last)
+
+    for day, type_name, category, total in totals:
+        entry = series.get(period_start(day, granularity))
+        if entry is not None:
+            add_total(entry, type_name, category, total)
+
+    for entry in series.values():
+        entry["total_income"] = round(entry["total_income"], 2)
+        entry["total_expenses"] = round(entry["total_expenses"], 2)
+        entry["net_balance"] = round(entry["total_income"] - entry["total_expenses"], 2)
+        for totals_by_type in entry["categories"].values():
+            for type_name in totals_by_type:
+                totals_by_type[type_name] = round(totals_by_type[type_name], 2)
+
+    return list(series.values())
@@ -0,0 +1,106 @@
+"""
+Delta sync: the transactions and budgets a client hasn't seen yet.
+
+Every write to `transactions` and `budgets` sets `updated_at`, and deletes
+leave a tombstone in `sync_tombstones`, so everything that changed after
+a point in time is one indexed range on (user_id, updated_at) per
+collection. A watermark is an opaque encoding of that point in time.
+
+Reads start SYNC_OVERLAP_SECONDS before the watermark so writes that were
+timestamped before it but committed after the previous sync are not
+missed. Clients therefore see some changes twice and must apply them
+idempotently: remove the deleted ids, then upsert the changed documents
+by id.
+"""
+
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import datetime, timedelta
+from typing import Optional
+import base64
+import binascii
+import os
+
+from models.budget import Budget
+from models.transaction import Transaction
+from serialization import model_projection
+
+# Margin for writes committed after the previous sync read past them
+SYNC_OVERLAP_SECONDS = int(os.getenv("SYNC_OVERLAP_SECONDS", "5"))
+
+# Tombstones are kept this long; older watermarks need a full reload
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+
+# Larger deltas are refused; reloading is cheaper at that point
+SYNC_MAX_CHANGES = int(os.getenv("SYNC_MAX_CHANGES", "5000"))
+
+SYNC_PROJECTIONS = {
+    "transactions": model_projection(Transaction),
+    "budgets": model_projection(Budget),
+}
+
+
+def encode_watermark(point: datetime) -> str:
+    return base64.urlsafe_b64encode(point.isoformat().encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_watermark(watermark: str) -> datetime:
+    """Parse a watermark produced by encode_watermark"""
+    try:
+        padded = watermark + "=" * (-len(watermark) % 4)
+        return datetime.fromisoformat(base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii"))
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid watermark")
+
+
+async def record_deletion(db: AsyncIOMotorDatabase, user_id: str, kind: str, item_id: str):
+    """Leave a tombstone for a deleted transaction or budget (kind is the collection name)"""
+    await db.sync_tombstones.insert_one({
+        "user_id": user_id,
+        "kind": kind,
+        "id": item_id,
+        "updated_at": datetime.utcnow()
+    })
+
+
+async def _changed(db: AsyncIOMotorDatabase, collection: str, user_id: str, start: datetime, projection: dict) -> list:
+    cursor = (
+        db[collection].find({"user_id": user_id, "updated_at": {"$gte": start}}, projection)
+        .sort("updated_at", 1)
+        .limit(SYNC_MAX_CHANGES + 1)
+    )
+    documents = await cursor.to_list(length=SYNC_MAX_CHANGES + 1)
+    if len(documents) > SYNC_MAX_CHANGES:
+        raise HTTPException(status_code=410, detail="Too many changes since the watermark; reload everything")
+    return documents
+
+
+async def changes_since(db: AsyncIOMotorDatabase, user_id: str, watermark: Optional[str]) -> dict:
+    """Changed and deleted transactions and budgets since a watermark, plus the next watermark.
+
+    Without a watermark only the current one is returned; take it before
+    the initial full load so nothing written during the load is missed.
+    """
+    now = datetime.utcnow()
+    result = {
+        "watermark": encode_watermark(now),
+        "transactions": [],
+        "budgets": [],
+        "deleted": {"transactions": [], "budgets": []}
+    }
+    if not watermark:
+        return result
+
+    since = decode_watermark(watermark)
+    if since < now - timedelta(days=SYNC_TOMBSTONE_DAYS):
+        raise HTTPException(status_code=410, detail="Watermark is too old; reload everything")
+
+    start = since - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    for collection, projection in SYNC_PROJECTIONS.items():
+        result[collection] = await _changed(db, collection, user_id, start, projection)
+
+    tombstones = await _changed(db, "sync_tombstones", user_id, start, {"_id": 0, "kind": 1, "id": 1})
+    for tombstone in tombstones:
+        result["deleted"][tombstone["kind"]].append(tombstone["id"])
+
+    return result
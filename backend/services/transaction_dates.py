@@ -0,0 +1,103 @@
+"""
+Native date fields stored alongside a transaction's `date` string.
+
+`date_key` (int yyyymmdd) and `year_month` (int yyyymm) are written with
+every transaction and indexed with user_id, so date ranges are tight
+integer bounds and monthly buckets need no string parsing. Transactions
+written before these fields existed are filled in by
+`backfill_date_fields` (`python manage.py backfill-dates`); until that has
+finished, TRANSACTION_DATE_READS=dual makes range filters also match
+documents that only have the string date.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+import os
+
+from services.backfill import backfill_transactions
+
+# "dual" while old transactions may lack date_key, "native" once the backfill has finished
+TRANSACTION_DATE_READS = os.getenv("TRANSACTION_DATE_READS", "dual")
+
+# Checkpoint document for the backfill in the migrations collection
+BACKFILL_ID = "transaction_date_fields"
+
+
+def to_date_key(day: date) -> int:
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+def date_fields(value: str) -> dict:
+    """date_key and year_month for an ISO date string; None for both if it can't be parsed"""
+    try:
+        parsed = datetime.strptime((value or "")[:10], "%Y-%m-%d")
+    except ValueError:
+        return {"date_key": None, "year_month": None}
+    return {"date_key": to_date_key(parsed), "year_month": parsed.year * 100 + parsed.month}
+
+
+def from_date_key(value) -> Optional[date]:
+    """date for a date_key int or an ISO date string, None if neither parses"""
+    try:
+        if isinstance(value, int):
+            return date(value // 10000, value // 100 % 100, value % 100)
+        return datetime.strptime((value or "")[:10], "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return None
+
+
+def date_key_range_filter(first: date, last: date) -> dict:
+    """Filter for transactions dated from first to last, inclusive"""
+    native = {"date_key": {"$gte": to_date_key(first), "$lte": to_date_key(last)}}
+    if TRANSACTION_DATE_READS == "native":
+        return native
+
+    # Not yet backfilled (missing or null date_key): fall back to the string date
+    return {
+        "$or": [
+            native,
+            {"date_key": None, "date": {"$gte": first.isoformat(), "$lt": (last + timedelta(days=1)).isoformat()}}
+        ]
+    }
+
+
+def date_range_filter(year: int, month: Optional[int] = None) -> dict:
+    """Filter for transactions dated in a month, or a whole year when month is None.
+
+    Matches year_month by equality (or $in of the year's months), so the
+    (user_id, year_month, created_at, id) index hands the list its
+    newest-first order without an in-memory sort.
+    """
+    if month:
+        native = {"year_month": year * 100 + month}
+        first = date(year, month, 1)
+        following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    else:
+        native = {"year_month": {"$in": [year * 100 + m for m in range(1, 13)]}}
+        first, following = date(year, 1, 1), date(year + 1, 1, 1)
+    if TRANSACTION_DATE_READS == "native":
+        return native
+
+    # Not yet backfilled (missing or null year_month): fall back to the string date
+    return {
+        "$or": [
+            native,
+            {"year_month": None, "date": {"$gte": first.isoformat(), "$lt": following.isoformat()}}
+        ]
+    }
+
+
+async def backfill_date_fields(
+    db: AsyncIOMotorDatabase,
+    batch_size: int = 1000,
+    restart: bool = False,
+    pause_seconds: float = 0.0,
+    progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """Add date_key/year_month to transactions missing them; resumable (see backfill_transactions)"""
+    return await backfill_transactions(
+        db, BACKFILL_ID, "date_key", {"date": 1},
+        lambda document: date_fields(document.get("date")),
+        batch_size, restart, pause_seconds, progress
+    )
@@ -0,0 +1,65 @@
+from motor.motor_asyncio import AsyncIOMotorCursor
+from datetime import datetime
+from typing import AsyncIterator
+import csv
+import io
+import json
+import os
+
+# Documents fetched per getMore, and rows per chunk written to the response
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_FIELDS = ["id", "date", "type", "category", "amount", "description", "created_at", "updated_at"]
+EXPORT_PROJECTION = {"_id": 0, **{field: 1 for field in EXPORT_FIELDS}}
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+async def stream_ndjson(cursor: AsyncIOMotorCursor) -> AsyncIterator[bytes]:
+    """One JSON object per line, flushed every EXPORT_BATCH_SIZE rows"""
+    lines = []
+    async for document in cursor:
+        lines.append(json.dumps(document, default=_json_default, separators=(",", ":")))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def stream_csv(cursor: AsyncIOMotorCursor) -> AsyncIterator[bytes]:
+    """CSV with a header row, flushed every EXPORT_BATCH_SIZE rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    rows = 0
+
+    async for document in cursor:
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (document.get(field) for field in EXPORT_FIELDS)
+        ])
+        rows += 1
+        if rows >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+EXPORT_WRITERS = {
+    "ndjson": stream_ndjson,
+    "csv": stream_csv,
+}
@@ -0,0 +1,104 @@
+"""
+Prefix search over transaction descriptions and categories.
+
+Each transaction stores `search_terms`, the distinct lower-cased words of
+its description and category, indexed together with user_id. A query
+matches transactions having, for every query word, a term starting with
+that word, so "cof sho" finds "Coffee shop" while the user is still
+typing. Results are ranked by how many query words match a term exactly,
+then newest first, within the newest SEARCH_MAX_CANDIDATES matches: a
+short prefix can match most of a long history, and scoring it all would
+sort it in memory on every keystroke.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Callable, List, Optional
+import os
+import re
+
+from services.backfill import backfill_transactions
+
+# Terms kept per transaction, and characters kept per term
+SEARCH_MAX_TERMS = 64
+SEARCH_MAX_TERM_LENGTH = 32
+# Words used from a query
+SEARCH_MAX_QUERY_TERMS = 8
+# Newest matches ranked per search; older ones are never scored
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "1000"))
+# Response header set when a search filled the candidate window, so older matches went unranked
+SEARCH_TRUNCATED_HEADER = "X-Search-Truncated"
+# Index the candidates are read through, newest first, so they need no in-memory sort.
+# The search_terms index would scan only matches but sort them all; this one stops
+# after SEARCH_MAX_CANDIDATES matches, at worst walking the user's whole history.
+SEARCH_INDEX_HINT = [("user_id", 1), ("created_at", -1), ("id", -1)]
+
+BACKFILL_ID = "transaction_search_terms"
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Distinct lower-cased words, in order of first appearance"""
+    terms = []
+    for word in _WORD.findall((text or "").casefold()):
+        word = word[:SEARCH_MAX_TERM_LENGTH]
+        if word not in terms:
+            terms.append(word)
+    return terms
+
+
+def search_fields(description: str, category: str) -> dict:
+    """The search_terms field for a transaction"""
+    return {"search_terms": tokenize(f"{description or ''} {category or ''}")[:SEARCH_MAX_TERMS]}
+
+
+def search_pipeline(user_id: str, terms: List[str], after: dict, limit: int, projection: dict) -> List[dict]:
+    """Aggregation for up to `limit` matches of the query terms, best first; run it with SEARCH_INDEX_HINT.
+
+    Yields one document: `matches`, and `truncated`, true when the query
+    filled the candidate window so older matches went unranked.
+    """
+    return [
+        {
+            "$match": {
+                "user_id": user_id,
+                "$and": [{"search_terms": {"$regex": f"^{re.escape(term)}"}} for term in terms]
+            }
+        },
+        # Bound the candidates before scoring; with SEARCH_INDEX_HINT the sort and
+        # limit are an index walk that stops at the cap
+        {"$sort": {"created_at": -1, "id": -1}},
+        {"$limit": SEARCH_MAX_CANDIDATES},
+        {
+            "$facet": {
+                "matches": [
+                    # Relevance: query words matching a whole term rather than only its prefix
+                    {"$addFields": {"score": {"$add": [{"$cond": [{"$in": [term, "$search_terms"]}, 1, 0]} for term in terms]}}},
+                    *([{"$match": after}] if after else []),
+                    {"$sort": {"score": -1, "created_at": -1, "id": -1}},
+                    {"$limit": limit},
+                    {"$project": {**projection, "score": 1}}
+                ],
+                "candidates": [{"$count": "count"}]
+            }
+        },
+        {"$project": {
+            "matches": 1,
+            "truncated": {"$gte": [{"$ifNull": [{"$arrayElemAt": ["$candidates.count", 0]}, 0]}, SEARCH_MAX_CANDIDATES]}
+        }}
+    ]
+
+
+async def backfill_search_terms(
+    db: AsyncIOMotorDatabase,
+    batch_size: int = 1000,
+    restart: bool = False,
+    pause_seconds: float = 0.0,
+    progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """Add search_terms to transactions missing them; resumable (see backfill_transactions)"""
+    return await backfill_transactions(
+        db, BACKFILL_ID, "search_terms", {"description": 1, "category": 1},
+        lambda document: search_fields(document.get("description"), document.get("category")),
+        batch_size, restart, pause_seconds, progress
+    )
@@ -1,42 +1,37 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { useBudget } from '../contexts/BudgetContext';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 
+const MONTHS_SHOWN = 6;
+
+const toMonthParam = (date) =>
+  `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`;
+
 const IncomeExpenseChart = () => {
-  const { transactions } = useBudget();
+  const { transactions, getSummarySeries } = useBudget();
+  const [data, setData] = useState([]);
 
-  // Generate last 6 months data
-  const generateMonthlyData = () => {
-    const monthlyData = [];
+  // Last 6 months from the summary series endpoint; refetch when transactions change
+  useEffect(() => {
     const currentDate = new Date();
-    
-    for (let i = 5; i >= 0; i--) {
-      const date = new Date(currentDate.getFullYear(), currentDate.getMonth() - i, 1);
-      const monthTransactions = transactions.filter(t => {
-        const transactionDate = new Date(t.date);
-        return transactionDate.getMonth() === date.getMonth() && 
-               transactionDate.getFullYear() === date.getFullYear();
-      });
-      
-      const income = monthTransactions
-        .filter(t => t.type === 'income')
-        .reduce((sum, t) => sum + t.amount, 0);
-      
-      const expenses = monthTransactions
-        .filter(t => t.type === 'expense')
-        .reduce((sum, t) => sum + t.amount, 0);
-      
-      monthlyData.push({
-        month: date.toLocaleDateString('en-US', { month: 'short' }),
-        income,
-        expenses
-      });
-    }
-    
-    return monthlyData;
-  };
+    const from = new Date(currentDate.getFullYear(), currentDate.getMonth() - (MONTHS_SHOWN - 1), 1);
+    let cancelled = false;
+
+    getSummarySeries(toMonthParam(from), toMonthParam(currentDate))
+      .then(series => {
+        if (cancelled) return;
+        setData(series.map(period => ({
+          month: new Date(`${period.start}T00:00:00`).toLocaleDateString('en-US', { month: 'short' }),
+          income: period.total_income,
+          expenses: period.total_expenses
+        })));
+      })
+      .catch(err => console.error('Error loading monthly overview:', err));
 
-  const data = generateMonthlyData();
+    return () => {
+      cancelled = true;
+    };
+  }, [transactions]);
 
   const CustomTooltip = ({ active, payload, label }) => {
     if (active && payload && payload.length) {
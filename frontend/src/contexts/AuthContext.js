@@ -29,6 +29,53 @@ export const AuthProvider = ({ children }) => {
     }
   }, [token]);
 
+  // Renew the access token with the refresh token when a request gets a 401
+  useEffect(() => {
+    let refreshPromise = null;
+
+    const interceptor = axios.interceptors.response.use(
+      (response) => response,
+      async (error) => {
+        const originalRequest = error.config;
+        const refreshToken = localStorage.getItem('refresh_token');
+
+        if (
+          error.response?.status !== 401 ||
+          !refreshToken ||
+          originalRequest._retried ||
+          originalRequest.url?.endsWith('/refresh')
+        ) {
+          return Promise.reject(error);
+        }
+
+        originalRequest._retried = true;
+        try {
+          // Share one refresh call between requests that fail together
+          refreshPromise = refreshPromise || axios.post(`${API_BASE_URL}/refresh`, {
+            refresh_token: refreshToken
+          });
+          const response = await refreshPromise;
+          const { access_token, refresh_token } = response.data;
+
+          localStorage.setItem('token', access_token);
+          localStorage.setItem('refresh_token', refresh_token);
+          axios.defaults.headers.common['Authorization'] = `Bearer ${access_token}`;
+          setToken(access_token);
+
+          originalRequest.headers['Authorization'] = `Bearer ${access_token}`;
+          return axios(originalRequest);
+        } catch (refreshError) {
+          logout();
+          return Promise.reject(error);
+        } finally {
+          refreshPromise = null;
+        }
+      }
+    );
+
+    return () => axios.interceptors.response.eject(interceptor);
+  }, []);
+
   // Load user data on mount
   useEffect(() => {
     const initializeAuth = async () => {
@@ -74,7 +121,7 @@ export const AuthProvider = ({ children }) => {
         password
       });
       
-      const { access_token, user: userData } = response.data;
+      const { access_token, refresh_token, user: userData } = response.data;
       
       setToken(access_token);
       setUser(userData);
@@ -82,6 +129,7 @@ export const AuthProvider = ({ children }) => {
       setIsPanicMode(false);
       
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       return { success: true };
     } catch (error) {
       console.error('Login error:', error);
@@ -99,7 +147,7 @@ export const AuthProvider = ({ children }) => {
         password
       });
       
-      const { access_token, user: userData } = response.data;
+      const { access_token, refresh_token, user: userData } = response.data;
       
       setToken(access_token);
       setUser(userData);
@@ -107,6 +155,7 @@ export const AuthProvider = ({ children }) => {
       setIsPanicMode(true);
       
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       return { success: true };
     } catch (error) {
       console.error('Panic login error:', error);
@@ -121,7 +170,7 @@ export const AuthProvider = ({ children }) => {
     try {
       const response = await axios.post(`${API_BASE_URL}/register`, userData);
       
-      const { access_token, user: newUser } = response.data;
+      const { access_token, refresh_token, user: newUser } = response.data;
       
       setToken(access_token);
       setUser(newUser);
@@ -129,6 +178,7 @@ export const AuthProvider = ({ children }) => {
       setIsPanicMode(false);
       
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       return { success: true };
     } catch (error) {
       console.error('Registration error:', error);
@@ -140,11 +190,17 @@ export const AuthProvider = ({ children }) => {
   };
 
   const logout = () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      axios.post(`${API_BASE_URL}/logout`, { refresh_token: refreshToken }).catch(() => {});
+    }
+
     setToken(null);
     setUser(null);
     setTravelMode(false);
     setIsPanicMode(false);
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     delete axios.defaults.headers.common['Authorization'];
   };
 
@@ -169,7 +225,9 @@ export const AuthProvider = ({ children }) => {
 
   const changePassword = async (passwordData) => {
     try {
-      await axios.post(`${API_BASE_URL}/change-password`, passwordData);
+      const response = await axios.post(`${API_BASE_URL}/change-password`, passwordData);
+      // Every earlier refresh token was revoked; keep this session signed in
+      localStorage.setItem('refresh_token', response.data.refresh_token);
       return { success: true };
     } catch (error) {
       console.error('Password change error:', error);
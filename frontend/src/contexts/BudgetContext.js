@@ -1,9 +1,24 @@
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 
 const BudgetContext = createContext();
 
 const API_BASE_URL = process.env.REACT_APP_BACKEND_URL + '/api';
+const TRANSACTIONS_PAGE_SIZE = 500;
+
+// Apply a sync delta to a list: drop deleted ids, replace changed items,
+// add new ones in front; `keep` filters out items that no longer belong
+const applyChanges = (items, changed, deletedIds, keep = () => true) => {
+  const changedById = new Map(changed.map(item => [item.id, item]));
+  const deleted = new Set(deletedIds);
+  const known = new Set(items.map(item => item.id));
+  const updated = items
+    .filter(item => !deleted.has(item.id))
+    .map(item => changedById.get(item.id) || item)
+    .filter(keep);
+  const added = changed.filter(item => !known.has(item.id) && !deleted.has(item.id) && keep(item));
+  return [...added, ...updated];
+};
 
 export const useBudget = () => {
   const context = useContext(BudgetContext);
@@ -20,6 +35,7 @@ export const BudgetProvider = ({ children }) => {
   const [currentYear, setCurrentYear] = useState(new Date().getFullYear());
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const syncWatermark = useRef(null);
 
   // Load data from API
   useEffect(() => {
@@ -36,20 +52,34 @@ export const BudgetProvider = ({ children }) => {
       setLoading(true);
       setError(null);
       
-      // Load transactions with current month/year filter
-      const transactionsResponse = await axios.get(`${API_BASE_URL}/transactions`, {
+      // Month's first page of transactions, budgets and the sync watermark in one request
+      const dashboardResponse = await axios.get(`${API_BASE_URL}/dashboard`, {
         params: {
           month: currentMonth + 1, // API expects 1-12, JS uses 0-11
           year: currentYear,
-          limit: 1000
+          limit: TRANSACTIONS_PAGE_SIZE
         }
       });
+      const monthTransactions = [...dashboardResponse.data.transactions];
       
-      // Load budgets
-      const budgetsResponse = await axios.get(`${API_BASE_URL}/budgets`);
+      // Load the rest of the month's transactions, page by page
+      let cursor = dashboardResponse.headers['x-next-cursor'];
+      while (cursor) {
+        const transactionsResponse = await axios.get(`${API_BASE_URL}/transactions`, {
+          params: {
+            month: currentMonth + 1,
+            year: currentYear,
+            limit: TRANSACTIONS_PAGE_SIZE,
+            cursor
+          }
+        });
+        monthTransactions.push(...transactionsResponse.data);
+        cursor = transactionsResponse.headers['x-next-cursor'];
+      }
       
-      setTransactions(transactionsResponse.data);
-      setBudgets(budgetsResponse.data);
+      setTransactions(monthTransactions);
+      setBudgets(dashboardResponse.data.budgets);
+      syncWatermark.current = dashboardResponse.data.sync_watermark;
     } catch (err) {
       console.error('Error loading data:', err);
       setError('Failed to load data');
@@ -58,6 +88,41 @@ export const BudgetProvider = ({ children }) => {
     }
   };
 
+  // Fetch only what changed since the last load or sync
+  const syncData = async () => {
+    if (!syncWatermark.current) {
+      return;
+    }
+    try {
+      const response = await axios.get(`${API_BASE_URL}/sync`, {
+        params: { since: syncWatermark.current }
+      });
+      const { watermark, deleted } = response.data;
+      const inCurrentMonth = transaction => {
+        const transactionDate = new Date(transaction.date);
+        return transactionDate.getMonth() === currentMonth &&
+               transactionDate.getFullYear() === currentYear;
+      };
+      
+      setTransactions(prev => applyChanges(prev, response.data.transactions, deleted.transactions, inCurrentMonth));
+      setBudgets(prev => applyChanges(prev, response.data.budgets, deleted.budgets));
+      syncWatermark.current = watermark;
+    } catch (err) {
+      if (err.response && err.response.status === 410) {
+        // Too old or too many changes for a delta
+        loadData();
+      } else {
+        console.error('Error syncing data:', err);
+      }
+    }
+  };
+
+  // Catch up on changes made elsewhere when the window regains focus
+  useEffect(() => {
+    window.addEventListener('focus', syncData);
+    return () => window.removeEventListener('focus', syncData);
+  }, [currentMonth, currentYear]);
+
   const addTransaction = async (transaction) => {
     try {
       const response = await axios.post(`${API_BASE_URL}/transactions`, transaction);
@@ -134,6 +199,14 @@ export const BudgetProvider = ({ children }) => {
       .reduce((sum, t) => sum + t.amount, 0);
   };
 
+  // Income/expense totals per period, one request for the whole range
+  const getSummarySeries = async (from, to, granularity = 'month') => {
+    const response = await axios.get(`${API_BASE_URL}/transactions/summary/series`, {
+      params: { from, to, granularity }
+    });
+    return response.data.series;
+  };
+
   const getCategoryTotals = () => {
     const monthlyTransactions = getMonthlyTransactions();
     const categoryTotals = {};
@@ -166,7 +239,9 @@ export const BudgetProvider = ({ children }) => {
     getMonthlyIncome,
     getMonthlyExpenses,
     getCategoryTotals,
+    getSummarySeries,
     loadData,
+    syncData,
   };
 
   return (
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    """An empty in-memory database"""
+    from mongomock_motor import AsyncMongoMockClient
+    return AsyncMongoMockClient()["budget_planner_test"]
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """A test client signed in as a new user, with the app using db"""
+    import server
+    from database import get_db
+
+    # As after rebuild-rollups, so summaries read the rollups
+    monkeypatch.setattr("services.monthly_rollups._rollups_ready", True)
+
+    server.app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(server.app)
+        response = client.post("/api/register", json={
+            "username": "alice", "email": "alice@example.com", "password": "abc123", "confirm_password": "abc123"
+        })
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        # Warm the user cache, as it is for every request but the first
+        client.get("/api/budgets")
+        yield client
+    finally:
+        server.app.dependency_overrides.pop(get_db, None)
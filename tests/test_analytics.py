@@ -0,0 +1,96 @@
+from datetime import date
+
+from services import analytics
+
+
+def frame_of(*rows):
+    """Frame from (date, type, category, amount, description) rows"""
+    return analytics.build_frame(*(list(column) for column in zip(*rows)))
+
+
+def test_rolling_spending_counts_expenses_only():
+    frame = frame_of(
+        ("2024-03-01", "expense", "Food", 10.0, "Lunch"),
+        ("2024-03-02", "income", "Salary", 100.0, "Pay"),
+        ("2024-03-03", "expense", "Food", 20.0, "Dinner"),
+        ("not a date", "expense", "Food", 1000.0, "Dropped"),
+    )
+    days = analytics.rolling_spending(frame, date(2024, 3, 2), date(2024, 3, 4), windows=(2, 3))
+    assert days == [
+        {"date": "2024-03-02", "spent": 0.0, "avg_2d": 5.0, "avg_3d": 3.33},
+        {"date": "2024-03-03", "spent": 20.0, "avg_2d": 10.0, "avg_3d": 10.0},
+        {"date": "2024-03-04", "spent": 0.0, "avg_2d": 10.0, "avg_3d": 6.67},
+    ]
+
+
+def test_category_deltas_largest_change_first():
+    frame = frame_of(
+        ("2024-02-10", "expense", "Food", 10.0, ""),
+        ("2024-02-01", "expense", "Rent", 500.0, ""),
+        ("2024-03-10", "expense", "Food", 15.0, ""),
+        ("2024-03-12", "expense", "Fun", 30.0, ""),
+        ("2024-03-15", "income", "Salary", 900.0, ""),
+    )
+    assert analytics.category_deltas(frame, 2024, 3) == [
+        {"category": "Rent", "current": 0.0, "previous": 500.0, "delta": -500.0, "percent_change": -100.0},
+        {"category": "Fun", "current": 30.0, "previous": 0.0, "delta": 30.0, "percent_change": None},
+        {"category": "Food", "current": 15.0, "previous": 10.0, "delta": 5.0, "percent_change": 50.0},
+    ]
+
+
+SUBSCRIPTION = [
+    ("2024-01-05", "expense", "Entertainment", 15.99, "Netflix #1001"),
+    ("2024-02-05", "expense", "Entertainment", 15.99, "NETFLIX #1002"),
+    ("2024-03-05", "expense", "Entertainment", 15.99, "Netflix #1003"),
+]
+
+
+def test_recurring_payments_match_a_cadence_and_stable_amount():
+    frame = frame_of(
+        *SUBSCRIPTION,
+        # Irregular gaps and amounts
+        ("2024-03-01", "expense", "Food", 3.0, "Coffee"),
+        ("2024-03-02", "expense", "Food", 9.0, "Coffee"),
+        ("2024-03-04", "expense", "Food", 4.0, "Coffee"),
+    )
+    assert analytics.recurring_payments(frame) == [{
+        "description": "netflix",
+        "category": "Entertainment",
+        "cadence": "monthly",
+        "amount": 15.99,
+        "occurrences": 3,
+        "interval_days": 30.0,
+        "last_date": "2024-03-05",
+        "next_expected": "2024-04-05",
+    }]
+    assert analytics.recurring_payments(frame_of(*SUBSCRIPTION[:2])) == []
+    assert analytics.recurring_payments(analytics.empty_frame()) == []
+
+
+def test_month_projection_extends_variable_spending_only():
+    frame = frame_of(*SUBSCRIPTION, ("2024-03-02", "expense", "Food", 20.0, "Groceries"))
+    recurring = analytics.recurring_payments(frame)
+    projection = analytics.month_projection(frame, date(2024, 3, 10), {"Food": 50.0}, recurring)
+
+    assert (projection["days_elapsed"], projection["days_in_month"]) == (10, 31)
+    food, entertainment = projection["categories"]
+    # 20 so far at 2 a day for the remaining 21 days
+    assert food == {
+        "category": "Food", "spent": 20.0, "projected": 62.0, "recurring_expected": 0.0,
+        "budget": 50.0, "projected_over_budget": True,
+    }
+    # Already paid this month and not due again until April
+    assert (entertainment["spent"], entertainment["projected"], entertainment["budget"]) == (15.99, 15.99, None)
+    assert projection["projected"] == 77.99
+
+
+def test_category_deltas_route(client):
+    for amount, date_value in ((10, "2024-02-10"), (25, "2024-03-10")):
+        transaction = {"type": "expense", "category": "Food", "amount": amount, "description": "Lunch", "date": date_value}
+        assert client.post("/api/transactions", json=transaction).status_code == 200
+
+    response = client.get("/api/analytics/category-deltas", params={"month": 3, "year": 2024})
+    assert response.status_code == 200
+    assert response.json()["categories"] == [
+        {"category": "Food", "current": 25.0, "previous": 10.0, "delta": 15.0, "percent_change": 150.0}
+    ]
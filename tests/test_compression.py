@@ -0,0 +1,62 @@
+from compression import COMPRESSION_MIN_SIZE, choose_coding
+
+TRANSACTION = {"type": "expense", "category": "Food", "amount": 5, "description": "Lunch", "date": "2024-03-05"}
+
+
+def add_transactions(client, count=20):
+    for _ in range(count):
+        assert client.post("/api/transactions", json=TRANSACTION).status_code == 200
+
+
+def test_not_modified_keeps_the_coded_etag(client):
+    add_transactions(client)
+    for coding in ("br", "gzip"):
+        headers = {"Accept-Encoding": coding}
+        response = client.get("/api/transactions", headers=headers)
+        etag = response.headers["ETag"]
+        assert etag.endswith(f'-{coding}"')
+
+        revalidated = client.get("/api/transactions", headers={**headers, "If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["ETag"] == etag
+        assert "Accept-Encoding" in revalidated.headers["Vary"]
+
+    # A client holding the uncompressed body keeps its uncompressed tag
+    response = client.get("/api/transactions", headers={"Accept-Encoding": "identity"})
+    revalidated = client.get("/api/transactions", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == response.headers["ETag"]
+
+
+def test_large_json_is_compressed_with_a_coded_etag(client):
+    add_transactions(client)
+    plain = client.get("/api/transactions", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert len(plain.content) >= COMPRESSION_MIN_SIZE
+
+    for coding in ("br", "gzip"):
+        response = client.get("/api/transactions", headers={"Accept-Encoding": coding})
+        assert response.headers["content-encoding"] == coding
+        assert response.headers["ETag"] == f'{plain.headers["ETag"][:-1]}-{coding}"'
+        assert "Accept-Encoding" in response.headers["Vary"]
+        # httpx decodes the body; it must be the same document
+        assert response.json() == plain.json()
+
+
+def test_small_and_streamed_responses_are_not_compressed(client):
+    response = client.get("/api/transactions", headers={"Accept-Encoding": "gzip"})
+    assert len(response.content) < COMPRESSION_MIN_SIZE
+    assert "content-encoding" not in response.headers
+    assert not response.headers["ETag"].endswith('-gzip"')
+
+    add_transactions(client)
+    export = client.get("/api/transactions/export", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in export.headers
+
+
+def test_choose_coding():
+    assert choose_coding("gzip, deflate, br") == "br"
+    assert choose_coding("br;q=0, gzip") == "gzip"
+    assert choose_coding("*") == "br"
+    assert choose_coding("identity") is None
+    assert choose_coding("") is None
@@ -0,0 +1,14 @@
+from services.sync import decode_watermark
+
+
+def test_dashboard_is_not_revalidated(client):
+    # A 304 would leave the client with the sync watermark of its cached copy
+    params = {"month": 3, "year": 2024}
+    first = client.get("/api/dashboard", params=params)
+    assert first.status_code == 200
+    assert "etag" not in first.headers
+    assert first.headers["cache-control"] == "private, no-store"
+
+    second = client.get("/api/dashboard", params=params, headers={"If-None-Match": "*"})
+    assert second.status_code == 200
+    assert decode_watermark(second.json()["sync_watermark"]) >= decode_watermark(first.json()["sync_watermark"])
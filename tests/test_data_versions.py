@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+
+from compression import identity_etag
+from services.data_versions import bump_data_version, etag_matches, get_data_version, make_etag
+
+NOW = datetime(2024, 3, 5)
+
+
+def test_make_etag_varies_by_user_version_month_and_format():
+    etag = make_etag("user-1", 3, NOW)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag != make_etag("user-2", 3, NOW)
+    assert etag != make_etag("user-1", 4, NOW)
+    assert etag != make_etag("user-1", 3, datetime(2024, 4, 1))
+    assert etag != make_etag("user-1", 3, NOW, columnar=True)
+
+
+def test_etag_matches():
+    etag = make_etag("user-1", 3, NOW)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("user-1", 2, NOW), etag)
+
+
+def test_compressed_etags_match_their_uncompressed_tag():
+    etag = make_etag("user-1", 3, NOW)
+    for coding in ("gzip", "br"):
+        compressed = f"{etag[:-1]}-{coding}\""
+        assert identity_etag(compressed) == etag
+        assert etag_matches(compressed, etag)
+    # Only a trailing coding suffix is stripped
+    assert not etag_matches(f"{etag[:-1]}-deflate\"", etag)
+    assert not etag_matches(make_etag("user-1", 3, NOW, columnar=True), etag)
+
+
+@pytest.mark.anyio
+async def test_bump_data_version(db):
+    assert await get_data_version(db, "user-1") == 0
+    await bump_data_version(db, "user-1")
+    await bump_data_version(db, "user-1")
+    assert await get_data_version(db, "user-1") == 2
+    assert await get_data_version(db, "user-2") == 0
+
+
+@pytest.mark.anyio
+async def test_insert_transactions_bumps_version_when_a_later_chunk_fails(db, monkeypatch):
+    from pymongo.errors import AutoReconnect
+
+    from models.transaction import TransactionCreate
+    from services.bulk_writes import insert_transactions
+
+    collection_class = type(db.transactions)
+    insert_many = collection_class.insert_many
+    calls = 0
+
+    async def fail_second_chunk(self, documents, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise AutoReconnect("connection lost")
+        return await insert_many(self, documents, **kwargs)
+
+    monkeypatch.setattr(collection_class, "insert_many", fail_second_chunk)
+    items = [
+        (index, TransactionCreate(type="expense", category="Food", amount=1, description="", date="2024-03-05"))
+        for index in range(2)
+    ]
+    with pytest.raises(AutoReconnect):
+        await insert_transactions(db, "user-1", items, chunk_size=1)
+
+    # The first chunk is stored, so cached copies must stop revalidating
+    assert await db.transactions.count_documents({}) == 1
+    assert await get_data_version(db, "user-1") == 1
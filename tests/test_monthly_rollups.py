@@ -0,0 +1,126 @@
+import pytest
+
+from services.monthly_rollups import (
+    compute_rollups, get_month_rollups, mark_rollups_ready_if_empty, rebuild_rollups, record_transaction_change,
+    record_transactions, rollup_key, rollups_ready, verify_rollups
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def ready(monkeypatch):
+    monkeypatch.setattr("services.monthly_rollups._rollups_ready", True)
+
+
+def transaction(amount, date="2024-03-05", type_="expense", category="Food", **extra):
+    return {"user_id": "user-1", "amount": amount, "date": date, "type": type_, "category": category, **extra}
+
+
+def test_rollup_key_prefers_year_month():
+    assert rollup_key(transaction(1, year_month=202403)) == (2024, 3, "expense", "Food")
+    assert rollup_key(transaction(1, date="2024-04-01")) == (2024, 4, "expense", "Food")
+    assert rollup_key(transaction(1, date="2024-4-1")) == (2024, 4, "expense", "Food")
+    assert rollup_key(transaction(1, date="")) is None
+
+
+async def totals(db, month=3):
+    return {
+        (rollup["type"], rollup["category"]): (rollup["total"], rollup["count"])
+        for rollup in await get_month_rollups(db, "user-1", 2024, month)
+    }
+
+
+async def test_record_transactions_increments_and_decrements(db):
+    docs = [transaction(10.0), transaction(5.25), transaction(100.0, type_="income", category="Salary")]
+    await record_transactions(db, "user-1", docs)
+    assert await totals(db) == {("expense", "Food"): (15.25, 2), ("income", "Salary"): (100.0, 1)}
+
+    await record_transactions(db, "user-1", [docs[0]], sign=-1)
+    assert await totals(db) == {("expense", "Food"): (5.25, 1), ("income", "Salary"): (100.0, 1)}
+
+    # Emptied rollups are left at zero and not reported
+    await record_transactions(db, "user-1", docs[1:], sign=-1)
+    assert await totals(db) == {}
+
+
+async def test_record_transaction_change_moves_amount(db):
+    before = transaction(10.0)
+    await record_transactions(db, "user-1", [before])
+
+    after = {**before, "amount": 12.0, "category": "Transport", "date": "2024-04-02"}
+    await record_transaction_change(db, "user-1", before, after)
+
+    assert await totals(db, 3) == {}
+    assert await totals(db, 4) == {("expense", "Transport"): (12.0, 1)}
+
+
+async def test_writes_through_rollups_verify_clean(db):
+    docs = [transaction(10.0), transaction(4.0, date="2024-04-01")]
+    await db.transactions.insert_many([dict(doc) for doc in docs])
+    await record_transactions(db, "user-1", docs)
+    assert await verify_rollups(db, "user-1") == []
+
+
+async def test_compute_rollups_adds_backfilled_and_unbackfilled_groups(db):
+    # Mid-backfill, one month groups under both its year_month and its raw dates
+    docs = [transaction(10.0, year_month=202403), transaction(5.0), transaction(2.5, date="2024-3-9")]
+    await db.transactions.insert_many([dict(doc) for doc in docs])
+    await record_transactions(db, "user-1", docs)
+
+    assert await compute_rollups(db, "user-1") == {(2024, 3, "expense", "Food"): (17.5, 3)}
+    assert await verify_rollups(db, "user-1") == []
+
+
+async def test_rebuild_repairs_in_place_and_is_idempotent(db):
+    docs = [transaction(10.0), transaction(4.0, date="2024-04-01")]
+    await db.transactions.insert_many([dict(doc) for doc in docs])
+    # Drifted: March too high, a stale category, April missing
+    await record_transactions(db, "user-1", [transaction(99.0), transaction(1.0, category="Old")])
+
+    assert await rebuild_rollups(db, "user-1") == 3
+    assert await totals(db, 3) == {("expense", "Food"): (10.0, 1)}
+    assert await totals(db, 4) == {("expense", "Food"): (4.0, 1)}
+    assert await verify_rollups(db, "user-1") == []
+    # Nothing left to write, and no rollup was deleted along the way
+    assert await rebuild_rollups(db, "user-1") == 0
+    assert await db.monthly_rollups.count_documents({"user_id": "user-1"}) == 3
+
+
+async def test_summaries_aggregate_transactions_until_rollups_are_built(db, monkeypatch):
+    monkeypatch.setattr("services.monthly_rollups._rollups_ready", False)
+    await db.transactions.insert_many([dict(transaction(10.0)), dict(transaction(2.5, category="Transport"))])
+
+    assert not await rollups_ready(db)
+    assert await totals(db) == {("expense", "Food"): (10.0, 1), ("expense", "Transport"): (2.5, 1)}
+
+    # Only a database without transactions counts as built on startup
+    await mark_rollups_ready_if_empty(db)
+    assert not await rollups_ready(db)
+    await db.transactions.delete_many({})
+    await mark_rollups_ready_if_empty(db)
+    assert await rollups_ready(db)
+
+
+async def test_rebuild_repairs_a_write_racing_it(db, monkeypatch):
+    from services import monthly_rollups
+
+    await db.transactions.insert_one(dict(transaction(10.0)))
+    compute = monthly_rollups.compute_rollups
+    raced = False
+
+    async def compute_then_write(db, user_id):
+        nonlocal raced
+        rollups = await compute(db, user_id)
+        if not raced:
+            # A live write lands after the recompute read the transactions
+            raced = True
+            late = transaction(5.0)
+            await db.transactions.insert_one(dict(late))
+            await record_transactions(db, user_id, [late])
+        return rollups
+
+    monkeypatch.setattr(monthly_rollups, "compute_rollups", compute_then_write)
+    await rebuild_rollups(db, "user-1")
+
+    assert await totals(db) == {("expense", "Food"): (15.0, 2)}
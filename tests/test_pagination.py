@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import (
+    decode_cursor, encode_cursor, encode_ranked_cursor, keyset_filter, ranked_keyset_filter
+)
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 3, 5, 12, 30, 1, 123000)
+    cursor = encode_cursor(created_at, "abc")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "abc")
+
+
+def test_keyset_filter_selects_items_after_cursor():
+    created_at = datetime(2024, 3, 5)
+    assert keyset_filter(encode_cursor(created_at, "abc")) == {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": "abc"}},
+        ]
+    }
+    assert keyset_filter(None) == {}
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", encode_cursor(datetime(2024, 1, 1), "a")[:-3], "!!!!"])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        keyset_filter(cursor)
+    assert error.value.status_code == 400
+
+
+def test_ranked_cursor_round_trip_and_tampering():
+    created_at = datetime(2024, 3, 5)
+    query = ranked_keyset_filter(encode_ranked_cursor(2.0, created_at, "abc"))
+    assert query["$or"][0] == {"score": {"$lt": 2.0}}
+    assert query["$or"][2] == {"score": 2.0, "created_at": created_at, "id": {"$lt": "abc"}}
+
+    with pytest.raises(HTTPException):
+        ranked_keyset_filter(encode_cursor(created_at, "abc"))
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from auth.password_pool import PasswordHashPool
+
+
+@pytest.mark.anyio
+async def test_saturated_pool_rejects_with_503():
+    pool = PasswordHashPool(workers=1, queue_depth=1)
+    release = threading.Event()
+    try:
+        running = asyncio.create_task(pool.run(release.wait))
+        waiting = asyncio.create_task(pool.run(lambda: "hashed"))
+        while pool.waiting < 1:
+            await asyncio.sleep(0)
+
+        # One hashing and one queued: the next caller is turned away without waiting
+        with pytest.raises(HTTPException) as error:
+            await pool.run(lambda: "rejected")
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == "1"
+
+        release.set()
+        assert await running is True
+        assert await waiting == "hashed"
+        assert (pool.stats()["completed"], pool.stats()["rejected"]) == (2, 1)
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_login_is_rejected_while_the_pool_is_full(client, monkeypatch):
+    from auth.password_pool import password_pool
+
+    monkeypatch.setattr(password_pool, "waiting", password_pool.queue_depth)
+    response = client.post("/api/login", json={"username": "alice", "password": "abc123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    monkeypatch.setattr(password_pool, "waiting", 0)
+    assert client.post("/api/login", json={"username": "alice", "password": "abc123"}).status_code == 200
@@ -0,0 +1,41 @@
+import pytest
+
+from auth.refresh_tokens import (
+    consume_refresh_token, issue_refresh_token, revoke_user_refresh_tokens
+)
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_rotation_consumes_token_once(db):
+    token = await issue_refresh_token(db, "user-1", False)
+
+    record = await consume_refresh_token(db, token)
+    assert record["user_id"] == "user-1"
+    assert record["is_panic_mode"] is False
+    assert await consume_refresh_token(db, token) is None
+
+
+async def test_reusing_rotated_token_revokes_whole_family(db):
+    first = await issue_refresh_token(db, "user-1", False)
+    record = await consume_refresh_token(db, first)
+    second = await issue_refresh_token(db, "user-1", False, family_id=record["family_id"])
+    other_family = await issue_refresh_token(db, "user-1", False)
+
+    # The rotated token shows up again: it leaked, so its successor dies too
+    assert await consume_refresh_token(db, first) is None
+    assert await consume_refresh_token(db, second) is None
+    assert await consume_refresh_token(db, other_family) is not None
+
+
+async def test_unknown_token_is_rejected(db):
+    assert await consume_refresh_token(db, "never-issued") is None
+
+
+async def test_revoke_user_refresh_tokens(db):
+    tokens = [await issue_refresh_token(db, "user-1", False) for _ in range(2)]
+    kept = await issue_refresh_token(db, "user-2", False)
+
+    assert await revoke_user_refresh_tokens(db, "user-1") == 2
+    assert all([await consume_refresh_token(db, token) is None for token in tokens])
+    assert await consume_refresh_token(db, kept) is not None
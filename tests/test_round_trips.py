@@ -0,0 +1,114 @@
+"""
+Database round trips per endpoint.
+
+Each expected list is the sequence of commands an endpoint issues with a
+warm user cache, so a change that adds a query or write to a hot endpoint
+shows up here and has to update the count on purpose.
+"""
+
+import mongomock.collection
+import pytest
+
+# Collection methods that each cost one round trip; cursors count once, on find/aggregate
+COMMANDS = (
+    "find", "find_one", "insert_one", "insert_many", "update_one", "update_many",
+    "replace_one", "delete_one", "delete_many", "find_one_and_update",
+    "find_one_and_delete", "find_one_and_replace", "bulk_write", "aggregate",
+    "count_documents", "distinct",
+)
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    """Record "collection.method" for every command the app sends"""
+    issued = []
+    depth = 0
+
+    def counting(name, method):
+        def wrapper(self, *args, **kwargs):
+            nonlocal depth
+            # mongomock implements some methods with others; only the outer call is a round trip
+            if depth == 0:
+                issued.append(f"{self.name}.{name}")
+            depth += 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                depth -= 1
+        return wrapper
+
+    for name in COMMANDS:
+        monkeypatch.setattr(mongomock.collection.Collection, name, counting(name, getattr(mongomock.collection.Collection, name)))
+    return issued
+
+
+def request(client, commands, method, url, **kwargs):
+    commands.clear()
+    response = client.request(method, url, **kwargs)
+    assert response.status_code == 200, response.text
+    return response, list(commands)
+
+
+TRANSACTION = {"type": "expense", "category": "Food", "amount": 5, "description": "Lunch", "date": "2024-03-05"}
+
+
+def test_transaction_writes(client, commands):
+    response, issued = request(client, commands, "POST", "/api/transactions", json=TRANSACTION)
+    assert issued == ["transactions.insert_one", "monthly_rollups.bulk_write", "data_versions.update_one"]
+    transaction_id = response.json()["id"]
+
+    # Read-modify-write in one round trip, then rollups and the data version
+    _, issued = request(client, commands, "PUT", f"/api/transactions/{transaction_id}", json={"amount": 7, "date": "2024-04-05"})
+    assert issued == ["transactions.find_one_and_update", "monthly_rollups.bulk_write", "data_versions.update_one"]
+
+    # One searchable field alone reads the other first; the terms go in the same write
+    _, issued = request(client, commands, "PUT", f"/api/transactions/{transaction_id}", json={"description": "Dinner"})
+    assert issued == ["transactions.find_one", "transactions.find_one_and_update", "data_versions.update_one"]
+    response = client.get("/api/transactions/search", params={"q": "dinner food"})
+    assert [transaction["id"] for transaction in response.json()] == [transaction_id]
+
+    # The tombstone lets GET /sync report the deletion
+    _, issued = request(client, commands, "DELETE", f"/api/transactions/{transaction_id}")
+    assert issued == [
+        "transactions.find_one_and_delete", "monthly_rollups.bulk_write",
+        "sync_tombstones.insert_one", "data_versions.update_one",
+    ]
+
+
+def test_budget_writes(client, commands):
+    _, issued = request(client, commands, "POST", "/api/budgets", json={"category": "Food", "amount": 100})
+    assert issued == ["budgets.insert_one", "data_versions.update_one"]
+
+
+def test_reads(client, commands):
+    request(client, commands, "POST", "/api/transactions", json=TRANSACTION)
+
+    _, issued = request(client, commands, "GET", "/api/transactions")
+    assert issued == ["data_versions.find_one", "transactions.find"]
+
+    _, issued = request(client, commands, "GET", "/api/transactions/summary/monthly", params={"month": 3, "year": 2024})
+    assert issued == ["data_versions.find_one", "monthly_rollups.find"]
+
+    _, issued = request(client, commands, "GET", "/api/dashboard", params={"month": 3, "year": 2024})
+    assert sorted(issued) == ["budgets.find", "monthly_rollups.find", "transactions.find"]
+
+
+def test_revalidation_is_one_round_trip(client, commands):
+    response, _ = request(client, commands, "GET", "/api/transactions")
+
+    commands.clear()
+    response = client.get("/api/transactions", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    assert commands == ["data_versions.find_one"]
+
+
+def test_delete_decrements_rollup_of_unpadded_date(client, commands):
+    # Dates such as 2024-3-5 validate; only the stored year_month places them in a month
+    response, _ = request(client, commands, "POST", "/api/transactions", json={**TRANSACTION, "date": "2024-3-5"})
+    params = {"month": 3, "year": 2024}
+    summary, _ = request(client, commands, "GET", "/api/transactions/summary/monthly", params=params)
+    assert summary.json()["total_expenses"] == 5
+
+    request(client, commands, "DELETE", f"/api/transactions/{response.json()['id']}")
+    summary, _ = request(client, commands, "GET", "/api/transactions/summary/monthly", params=params)
+    assert summary.json()["total_expenses"] == 0
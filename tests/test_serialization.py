@@ -0,0 +1,121 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from models.budget import Budget, BudgetListItem
+from models.chat import ChatSessionListItem, ChatSessionResponse
+from models.transaction import Transaction, TransactionListItem
+from serialization import (
+    COLUMNAR_MEDIA_TYPE, FastJSONResponse, header_quality, model_projection, select_fields, to_columnar,
+    wants_columnar
+)
+
+
+def request_with(accept):
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+def test_model_projection():
+    assert model_projection(Budget) == {"_id": 0, **{field: 1 for field in Budget.model_fields}}
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "pydantic-core"])
+def test_fast_json_matches_model_serialization(monkeypatch, encoder):
+    if encoder == "pydantic-core":
+        monkeypatch.setattr("serialization.orjson", None)
+    document = {
+        "id": "a", "type": "expense", "category": "Food", "amount": 12.5, "description": "Lunch",
+        "date": "2024-03-05", "created_at": datetime(2024, 3, 5, 12, 30, 1, 250000),
+        "updated_at": datetime(2024, 3, 5, 12, 30, 1, 250000),
+    }
+    body = FastJSONResponse([document]).body
+    assert json.loads(body) == [json.loads(Transaction(**document).model_dump_json())]
+
+
+def test_to_columnar_dictionary_encodes_repeated_values():
+    rows = [
+        {"id": "a", "type": "expense", "category": "Food", "amount": 1.5},
+        {"id": "b", "type": "income", "category": "Salary", "amount": 100.0},
+        {"id": "c", "type": "expense", "category": "Food", "amount": 2.0},
+    ]
+    result = to_columnar(rows, ["id", "type", "category", "amount"], ["type", "category"])
+
+    assert result["count"] == 3
+    assert result["columns"]["id"] == ["a", "b", "c"]
+    assert result["columns"]["amount"] == [1.5, 100.0, 2.0]
+    assert result["dictionaries"] == {"type": ["expense", "income"], "category": ["Food", "Salary"]}
+    assert result["columns"]["category"] == [0, 1, 0]
+
+    decoded = [
+        {field: result["dictionaries"][field][codes[i]] if field in result["dictionaries"] else codes[i]
+         for field, codes in result["columns"].items()}
+        for i in range(result["count"])
+    ]
+    assert decoded == rows
+
+
+def test_to_columnar_empty_page():
+    assert to_columnar([], ["id", "type"], ["type"]) == {
+        "count": 0, "columns": {"id": [], "type": []}, "dictionaries": {"type": []}
+    }
+
+
+def test_header_quality():
+    assert header_quality("gzip, br;q=0.5", "br") == 0.5
+    assert header_quality("gzip;q=0", "gzip") == 0.0
+    assert header_quality("identity", "gzip") == 0.0
+    assert header_quality("*;q=0.3", "gzip", wildcard=True) == 0.3
+    assert header_quality("*", "gzip") == 0.0
+
+
+def test_wants_columnar_only_when_asked_for_explicitly():
+    assert wants_columnar(request_with(COLUMNAR_MEDIA_TYPE))
+    assert wants_columnar(request_with(f"{COLUMNAR_MEDIA_TYPE};q=0.9, application/json"))
+    assert not wants_columnar(request_with(f"{COLUMNAR_MEDIA_TYPE};q=0"))
+    assert not wants_columnar(request_with("*/*"))
+    assert not wants_columnar(request_with("application/json"))
+
+
+def test_select_fields_keeps_model_order_and_identity():
+    assert select_fields(Transaction, None) == list(Transaction.model_fields)
+    assert select_fields(Transaction, "date, amount") == ["amount", "date", "id"]
+    assert select_fields(Budget, "amount", always=("category",)) == ["category", "amount"]
+
+
+def test_select_fields_rejects_unknown_fields():
+    with pytest.raises(HTTPException) as error:
+        select_fields(Transaction, "amount,user_id,password_hash")
+    assert error.value.status_code == 400
+    assert "password_hash, user_id" in error.value.detail
+
+
+@pytest.mark.parametrize("model, list_item, identity", [
+    (Transaction, TransactionListItem, "id"),
+    (Budget, BudgetListItem, "id"),
+    (ChatSessionResponse, ChatSessionListItem, "session_id"),
+])
+def test_list_items_document_partial_rows(model, list_item, identity):
+    # Every field a selection can return, required only where a selection always includes it
+    assert set(list_item.model_fields) == set(model.model_fields)
+    assert [name for name, field in list_item.model_fields.items() if field.is_required()] == [identity]
+    list_item(**{identity: "x"})
+
+
+def test_list_routes_declare_partial_rows(client):
+    openapi = client.get("/openapi.json").json()
+    routes = [
+        ("/api/transactions", "TransactionListItem"),
+        ("/api/budgets", "BudgetListItem"),
+        ("/api/chat/sessions", "ChatSessionListItem"),
+    ]
+    for path, model in routes:
+        schema = openapi["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema["items"]["$ref"] == f"#/components/schemas/{model}"
+
+    client.post("/api/transactions", json={"type": "expense", "category": "Food", "amount": 5, "description": "Lunch", "date": "2024-03-05"})
+    [row] = client.get("/api/transactions", params={"fields": "amount"}).json()
+    TransactionListItem(**row)
+    assert set(row) == {"id", "amount"}
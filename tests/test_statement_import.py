@@ -0,0 +1,176 @@
+import asyncio
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.statement_import import (
+    DEFAULT_CATEGORY,
+    IMPORT_STALE_SECONDS,
+    AmbiguousDateError,
+    _normalize_date,
+    cancel_import_jobs,
+    fail_stale_import_jobs,
+    parse_csv,
+    parse_ofx,
+    run_import_job,
+    start_import_job,
+)
+
+
+def csv_stream(text):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def test_parse_csv_maps_columns_and_signed_amounts():
+    rows = list(parse_csv(csv_stream(
+        "Posted Date,Amount,Payee,Category\n"
+        "2024-03-05,-12.50,Coffee shop,Food\n"
+        "20240306,\"1,500.00\",Salary,\n"
+    )))
+
+    assert [(number, error) for number, _, error in rows] == [(2, None), (3, None)]
+    coffee, salary = rows[0][1], rows[1][1]
+    assert (coffee.type, coffee.amount, coffee.date, coffee.category, coffee.description) == (
+        "expense", 12.5, "2024-03-05", "Food", "Coffee shop"
+    )
+    assert (salary.type, salary.amount, salary.date, salary.category) == (
+        "income", 1500.0, "2024-03-06", DEFAULT_CATEGORY
+    )
+
+
+def test_parse_csv_explicit_type_wins_over_sign():
+    [(_, transaction, error)] = parse_csv(csv_stream("date,amount,type\n2024-03-05,20,Expense\n"))
+    assert error is None
+    assert (transaction.type, transaction.amount) == ("expense", 20.0)
+
+
+def test_parse_csv_reports_bad_rows_and_keeps_going():
+    rows = list(parse_csv(csv_stream("date,amount\nyesterday,5\n2024-03-05,abc\n2024-03-05,5\n")))
+    assert [number for number, transaction, _ in rows if transaction is None] == [2, 3]
+    assert all(error for _, transaction, error in rows if transaction is None)
+    assert rows[2][1] is not None
+
+
+def test_parse_csv_requires_amount_and_date_columns():
+    with pytest.raises(ValueError, match="amount"):
+        list(parse_csv(csv_stream("date,description\n2024-03-05,x\n")))
+
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240305120000[0:GMT]<TRNAMT>-42.10<NAME>Grocer<MEMO>card</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240306<TRNAMT>2000.00<MEMO>Payroll</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>garbage<TRNAMT>-1</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_parse_ofx_sgml():
+    rows = list(parse_ofx(io.BytesIO(OFX.encode("utf-8"))))
+
+    assert [number for number, _, _ in rows] == [1, 2, 3]
+    grocer, payroll = rows[0][1], rows[1][1]
+    assert (grocer.type, grocer.amount, grocer.date, grocer.description) == ("expense", 42.1, "2024-03-05", "Grocer")
+    assert (payroll.type, payroll.amount, payroll.description) == ("income", 2000.0, "Payroll")
+    assert rows[2][1] is None and rows[2][2]
+
+
+def test_parse_ofx_across_read_chunks(monkeypatch):
+    # Tags split between reads must still parse
+    monkeypatch.setattr("services.statement_import.IMPORT_READ_CHUNK_BYTES", 7)
+    rows = list(parse_ofx(io.BytesIO(OFX.encode("utf-8"))))
+    assert [transaction.amount for _, transaction, _ in rows[:2]] == [42.1, 2000.0]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-03-05T10:30:00", "2024-03-05"),
+    ("2024-3-5", "2024-03-05"),
+    ("2024/03/05", "2024-03-05"),
+    ("05.03.2024", "2024-03-05"),
+    ("25/12/2024", "2024-12-25"),
+    ("12/25/2024", "2024-12-25"),
+])
+def test_normalize_date_formats(value, expected):
+    assert _normalize_date(value) == expected
+
+
+def test_normalize_date_order_settles_ambiguous_dates():
+    assert _normalize_date("05/03/2024", "dmy") == "2024-03-05"
+    assert _normalize_date("05/03/2024", "mdy") == "2024-05-03"
+    with pytest.raises(AmbiguousDateError):
+        _normalize_date("05/03/2024")
+    with pytest.raises(ValueError):
+        _normalize_date("31/31/2024", "dmy")
+
+
+def test_parse_csv_takes_date_order_from_first_unambiguous_date():
+    rows = list(parse_csv(csv_stream("date,amount\n25/03/2024,-1\n05/03/2024,-2\n")))
+    assert [transaction.date for _, transaction, _ in rows] == ["2024-03-25", "2024-03-05"]
+
+    with pytest.raises(AmbiguousDateError):
+        list(parse_csv(csv_stream("date,amount\n05/03/2024,-1\n25/03/2024,-2\n")))
+
+
+@pytest.mark.anyio
+async def test_import_job_reports_progress_on_files_of_bad_rows(db, tmp_path, monkeypatch):
+    # No row is valid, so nothing is flushed; progress must still be saved per batch
+    monkeypatch.setattr("services.statement_import.IMPORT_BATCH_SIZE", 2)
+    path = tmp_path / "statement.csv"
+    path.write_text("date,amount\n" + "yesterday,5\n" * 5)
+    await db.import_jobs.insert_one({"id": "job", "status": "pending"})
+
+    saved = []
+    collection_class = type(db.import_jobs)
+    update_one = collection_class.update_one
+
+    async def record_update(self, filter, update, **kwargs):
+        if self.name == "import_jobs":
+            saved.append(update["$set"]["rows_read"])
+        return await update_one(self, filter, update, **kwargs)
+
+    monkeypatch.setattr(collection_class, "update_one", record_update)
+    await run_import_job(db, "job", "user-1", str(path), "csv")
+
+    assert saved == [0, 2, 4, 5]
+    job = await db.import_jobs.find_one({"id": "job"})
+    assert (job["status"], job["rows_read"], job["failed"], job["inserted"]) == ("completed", 5, 5, 0)
+    assert not path.exists()
+
+
+@pytest.mark.anyio
+async def test_cancelled_import_records_interruption(db, tmp_path, monkeypatch):
+    # As on shutdown: the job is cancelled mid-insert and must say so before the client closes
+    started = asyncio.Event()
+
+    async def hang(*args):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr("services.statement_import.insert_transactions", hang)
+    path = tmp_path / "statement.csv"
+    path.write_text("date,amount\n2024-03-05,-5\n")
+    await db.import_jobs.insert_one({"id": "job", "status": "pending"})
+
+    start_import_job(db, "job", "user-1", str(path), "csv")
+    await started.wait()
+    await cancel_import_jobs()
+
+    job = await db.import_jobs.find_one({"id": "job"})
+    assert (job["status"], job["error"]) == ("failed", "Import interrupted")
+    assert not path.exists()
+
+
+@pytest.mark.anyio
+async def test_fail_stale_import_jobs(db):
+    now = datetime.utcnow()
+    await db.import_jobs.insert_many([
+        {"id": "lost", "status": "running", "updated_at": now - timedelta(seconds=IMPORT_STALE_SECONDS + 60)},
+        {"id": "live", "status": "running", "updated_at": now},
+        {"id": "done", "status": "completed", "updated_at": now - timedelta(days=1)},
+    ])
+
+    assert await fail_stale_import_jobs(db) == 1
+    statuses = {job["id"]: job["status"] async for job in db.import_jobs.find()}
+    assert statuses == {"lost": "failed", "live": "running", "done": "completed"}
@@ -0,0 +1,55 @@
+import pytest
+
+TRANSACTIONS = [
+    {"type": "expense", "category": "Food", "amount": 10.5, "description": "Lunch", "date": "2024-01-15"},
+    {"type": "expense", "category": "Food", "amount": 4.25, "description": "Coffee", "date": "2024-01-31"},
+    {"type": "income", "category": "Salary", "amount": 100, "description": "Pay", "date": "2024-03-02"},
+]
+
+
+@pytest.fixture
+def series(client):
+    for transaction in TRANSACTIONS:
+        assert client.post("/api/transactions", json=transaction).status_code == 200
+
+    def get(first, last, granularity="month"):
+        response = client.get("/api/transactions/summary/series", params={"from": first, "to": last, "granularity": granularity})
+        assert response.status_code == 200, response.text
+        return response.json()["series"]
+    return get
+
+
+@pytest.mark.parametrize("rollups_ready", [True, False])
+def test_months_without_transactions_are_zero(series, monkeypatch, rollups_ready):
+    monkeypatch.setattr("services.monthly_rollups._rollups_ready", rollups_ready)
+    months = series("2023-12", "2024-04")
+
+    assert [entry["period"] for entry in months] == ["2023-12", "2024-01", "2024-02", "2024-03", "2024-04"]
+    assert [(entry["total_income"], entry["total_expenses"]) for entry in months] == [
+        (0, 0), (0, 14.75), (0, 0), (100, 0), (0, 0)
+    ]
+    assert months[1]["categories"] == {"Food": {"income": 0, "expense": 14.75}}
+    assert months[2]["categories"] == {}
+    assert months[3]["net_balance"] == 100
+
+
+def test_weeks_start_on_monday_and_cover_the_range(series):
+    weeks = series("2024-01", "2024-02", "week")
+    # 2024-01-01 is a Monday; 2024-02-29 falls in the week of 2024-02-26
+    assert weeks[0]["start"] == "2024-01-01" and weeks[-1]["start"] == "2024-02-26"
+    assert len(weeks) == 9
+    totals = {entry["start"]: entry["total_expenses"] for entry in weeks if entry["total_expenses"]}
+    assert totals == {"2024-01-15": 10.5, "2024-01-29": 4.25}
+
+
+def test_days_fill_the_whole_month(series):
+    days = series("2024-02", "2024-02", "day")
+    assert len(days) == 29
+    assert all(entry["total_income"] == entry["total_expenses"] == 0 for entry in days)
+
+
+def test_series_range_is_checked(client, monkeypatch):
+    monkeypatch.setattr("services.summary_series.SERIES_MAX_PERIODS", 3)
+    params = {"from": "2024-01", "to": "2024-04"}
+    assert client.get("/api/transactions/summary/series", params=params).status_code == 400
+    assert client.get("/api/transactions/summary/series", params={"from": "2024-04", "to": "2024-01"}).status_code == 400
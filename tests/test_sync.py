@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from services.sync import SYNC_TOMBSTONE_DAYS, encode_watermark
+
+TRANSACTION = {"type": "expense", "category": "Food", "amount": 5, "description": "Lunch", "date": "2024-03-05"}
+
+
+def sync(client, since=None):
+    return client.get("/api/sync", params={"since": since} if since else {})
+
+
+def test_watermark_older_than_tombstones_needs_a_reload(client):
+    too_old = encode_watermark(datetime.utcnow() - timedelta(days=SYNC_TOMBSTONE_DAYS, minutes=1))
+    response = sync(client, too_old)
+    assert response.status_code == 410
+    assert "reload" in response.json()["detail"]
+
+    recent = encode_watermark(datetime.utcnow() - timedelta(days=SYNC_TOMBSTONE_DAYS - 1))
+    assert sync(client, recent).status_code == 200
+    assert sync(client, "not a watermark!").status_code == 400
+
+
+def test_too_many_changes_needs_a_reload(client, monkeypatch):
+    monkeypatch.setattr("services.sync.SYNC_MAX_CHANGES", 1)
+    watermark = sync(client).json()["watermark"]
+    for _ in range(2):
+        client.post("/api/transactions", json=TRANSACTION)
+    assert sync(client, watermark).status_code == 410
+
+
+def test_sync_returns_changes_and_deletions(client):
+    watermark = sync(client).json()["watermark"]
+    kept = client.post("/api/transactions", json=TRANSACTION).json()["id"]
+    deleted = client.post("/api/transactions", json=TRANSACTION).json()["id"]
+    client.delete(f"/api/transactions/{deleted}")
+
+    changes = sync(client, watermark).json()
+    assert kept in {transaction["id"] for transaction in changes["transactions"]}
+    assert changes["deleted"]["transactions"] == [deleted]
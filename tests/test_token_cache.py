@@ -0,0 +1,49 @@
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+from auth.security import create_access_token, verify_token
+from auth.token_cache import VerifiedTokenCache, token_cache
+
+
+def test_entries_expire_with_their_token(monkeypatch):
+    cache = VerifiedTokenCache(max_size=10)
+    now = time.time()
+    cache.set("token", {"user_id": "user-1"}, now + 60)
+    assert cache.get("token") == {"user_id": "user-1"}
+
+    monkeypatch.setattr("auth.token_cache.time", SimpleNamespace(time=lambda: now + 61))
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+    # Tokens already expired are never cached
+    cache.set("stale", {"user_id": "user-1"}, now + 30)
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerifiedTokenCache(max_size=2)
+    expires_at = time.time() + 60
+    for token in ("a", "b"):
+        cache.set(token, {"user_id": token}, expires_at)
+    cache.get("a")
+    cache.set("c", {"user_id": "c"}, expires_at)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"user_id": "a"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_verify_token_decodes_again_after_expiry(monkeypatch):
+    token_cache.clear()
+    token = create_access_token({"sub": "alice", "user_id": "user-1"}, timedelta(minutes=1))
+    verify_token(token)
+    misses = token_cache.stats()["misses"]
+    assert verify_token(token)["user_id"] == "user-1"
+    assert token_cache.stats()["misses"] == misses
+
+    # Past the token's exp the cache no longer answers for it
+    later = time.time() + 120
+    monkeypatch.setattr("auth.token_cache.time", SimpleNamespace(time=lambda: later))
+    assert token_cache.get(token) is None
+    assert token_cache.stats()["size"] == 0
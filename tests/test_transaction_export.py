@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+
+from services.transaction_export import EXPORT_FIELDS
+
+TRANSACTION = {"type": "expense", "category": "Food", "amount": 5, "description": "Lunch, with \"friends\"", "date": "2024-03-05"}
+
+
+def add_transactions(client):
+    ids = []
+    for amount, date, type in ((5, "2024-03-05", "expense"), (7, "2024-03-06", "expense"), (100, "2024-04-01", "income")):
+        response = client.post("/api/transactions", json={**TRANSACTION, "amount": amount, "date": date, "type": type})
+        ids.append(response.json()["id"])
+    return ids
+
+
+def test_export_ndjson_streams_matches_newest_first(client, monkeypatch):
+    # Rows cross a flush boundary
+    monkeypatch.setattr("services.transaction_export.EXPORT_BATCH_SIZE", 2)
+    ids = add_transactions(client)
+
+    response = client.get("/api/transactions/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == 'attachment; filename="transactions.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == ids[::-1]
+    assert all(set(row) == set(EXPORT_FIELDS) for row in rows)
+
+    rows = [json.loads(line) for line in client.get("/api/transactions/export", params={"month": 3, "year": 2024}).text.splitlines()]
+    assert [row["amount"] for row in rows] == [7, 5]
+
+
+def test_export_csv(client, monkeypatch):
+    monkeypatch.setattr("services.transaction_export.EXPORT_BATCH_SIZE", 2)
+    ids = add_transactions(client)
+
+    response = client.get("/api/transactions/export", params={"format": "csv", "type": "expense"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == EXPORT_FIELDS
+    assert [row[0] for row in rows] == [ids[1], ids[0]]
+    assert rows[0][EXPORT_FIELDS.index("description")] == TRANSACTION["description"]
+
+
+def test_empty_export(client):
+    assert client.get("/api/transactions/export").text == ""
+    assert client.get("/api/transactions/export", params={"format": "csv"}).text.strip() == ",".join(EXPORT_FIELDS)
@@ -0,0 +1,69 @@
+import pytest
+
+
+@pytest.mark.parametrize("url", ["/api/transactions", "/api/transactions/export"])
+@pytest.mark.parametrize("params", [{"month": 0}, {"month": 13}, {"year": 1999}, {"year": 2101}])
+def test_month_and_year_filters_are_bounded(client, url, params):
+    assert client.get(url, params=params).status_code == 422
+
+
+def test_month_and_year_filters_in_range(client):
+    assert client.get("/api/transactions", params={"month": 12, "year": 2024}).status_code == 200
+
+
+def test_month_and_year_filters_select_by_year_month(client):
+    for date in ("2024-03-05", "2024-12-31", "2025-01-01"):
+        client.post("/api/transactions", json={
+            "type": "expense", "category": "Food", "amount": 1, "description": "", "date": date
+        })
+
+    def dates(**params):
+        return [transaction["date"] for transaction in client.get("/api/transactions", params=params).json()]
+
+    assert dates(month=3, year=2024) == ["2024-03-05"]
+    assert sorted(dates(year=2024)) == ["2024-03-05", "2024-12-31"]
+
+
+@pytest.mark.anyio
+async def test_dual_date_reads_match_documents_without_year_month(db):
+    from services.transaction_dates import date_range_filter
+
+    await db.transactions.insert_many([
+        {"id": "new", "year_month": 202403, "date": "2024-03-05"},
+        {"id": "old", "date": "2024-03-09"},
+        {"id": "other", "date": "2023-03-09"},
+    ])
+    for query in (date_range_filter(2024, 3), date_range_filter(2024)):
+        found = {document["id"] async for document in db.transactions.find(query)}
+        assert found == ({"new", "old"} if "$or" in query else {"new"})
+
+
+def test_bulk_create_reports_each_item_when_some_fail(client, monkeypatch):
+    import mongomock.collection
+    from pymongo.errors import BulkWriteError
+
+    insert_many = mongomock.collection.Collection.insert_many
+
+    # The server rejects the second document of the write; unordered, the rest still go in
+    def reject_second(self, documents, ordered=True, **kwargs):
+        documents = list(documents)
+        insert_many(self, documents[:1] + documents[2:], ordered=ordered, **kwargs)
+        raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "E11000 duplicate key"}], "nInserted": len(documents) - 1})
+
+    monkeypatch.setattr(mongomock.collection.Collection, "insert_many", reject_second)
+    item = {"type": "expense", "category": "Food", "amount": 5, "description": "Lunch", "date": "2024-03-05"}
+    response = client.post("/api/transactions/bulk", json=[item, {**item, "amount": -1}, item, "text", {**item, "amount": 7}])
+    assert response.status_code == 200
+    body = response.json()
+
+    assert (body["inserted"], body["failed"]) == (2, 3)
+    assert [result["success"] for result in body["results"]] == [True, False, False, False, True]
+    assert "amount" in body["results"][1]["error"]
+    assert body["results"][2]["error"] == "E11000 duplicate key"
+    assert body["results"][3]["error"] == "Item must be an object"
+
+    # Only the inserted transactions are listed and counted in the month's totals
+    listed = client.get("/api/transactions").json()
+    assert sorted(transaction["id"] for transaction in listed) == sorted(body["results"][i]["id"] for i in (0, 4))
+    summary = client.get("/api/transactions/summary/monthly", params={"month": 3, "year": 2024}).json()
+    assert summary["total_expenses"] == 12
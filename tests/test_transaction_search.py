@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from indexes import _plan_stages, _winning_plans
+from services.transaction_search import search_fields, search_pipeline
+
+pytestmark = pytest.mark.anyio
+
+
+async def search(db, terms, limit=10):
+    pipeline = search_pipeline("user-1", terms, {}, limit, {"_id": 0, "description": 1})
+    [result] = await db.transactions.aggregate(pipeline).to_list(length=1)
+    return [document["description"] for document in result["matches"]]
+
+
+async def test_search_ranks_within_newest_candidates(db, monkeypatch):
+    start = datetime(2024, 3, 1)
+    await db.transactions.insert_many([
+        {"user_id": "user-1", "id": str(day), "description": description, "created_at": start + timedelta(days=day),
+         **search_fields(description, "Food")}
+        for day, description in enumerate(["Coffee", "Coffeehouse", "Coffee shop", "Tea"])
+    ])
+
+    # Exact matches rank first, then newest
+    assert await search(db, ["coffee"]) == ["Coffee shop", "Coffee", "Coffeehouse"]
+
+    # Only the newest two matches are scored, so the older exact match drops out
+    monkeypatch.setattr("services.transaction_search.SEARCH_MAX_CANDIDATES", 2)
+    assert await search(db, ["coffee"]) == ["Coffee shop", "Coffeehouse"]
+
+
+def test_search_flags_a_full_candidate_window(client, monkeypatch):
+    monkeypatch.setattr("services.transaction_search.SEARCH_MAX_CANDIDATES", 3)
+    for day in range(1, 4):
+        transaction = {"type": "expense", "category": "Food", "amount": 1, "description": "Coffee", "date": f"2024-03-0{day}"}
+        assert client.post("/api/transactions", json=transaction).status_code == 200
+
+    # A full window can't tell whether older matches exist, so every page says so
+    response = client.get("/api/transactions/search", params={"q": "coffee", "limit": 2})
+    assert "X-Search-Truncated" in response.headers
+    next_page = client.get("/api/transactions/search", params={"q": "coffee", "cursor": response.headers["X-Next-Cursor"]})
+    assert len(response.json()) + len(next_page.json()) == 3
+    assert next_page.headers["X-Search-Truncated"] == "true"
+
+    # One short of the window: all matches were ranked
+    monkeypatch.setattr("services.transaction_search.SEARCH_MAX_CANDIDATES", 4)
+    response = client.get("/api/transactions/search", params={"q": "coffee"})
+    assert len(response.json()) == 3 and "X-Search-Truncated" not in response.headers
+    assert client.get("/api/transactions/search", params={"q": "tea"}).json() == []
+
+
+def test_audit_reads_winning_plans_of_aggregations():
+    explain = {
+        "stages": [
+            {"$cursor": {"queryPlanner": {
+                "winningPlan": {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}},
+                "rejectedPlans": [{"stage": "COLLSCAN"}],
+            }}},
+            {"$sort": {"sortKey": {"score": -1}}},
+        ]
+    }
+    assert [_plan_stages(plan) for plan in _winning_plans(explain)] == [["LIMIT", "FETCH", "IXSCAN"]]